@@ -15,9 +15,19 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # 在创建数据库引擎之前安装协程等待回调并配置连接池；只有 eventlet 已打补丁的进程才启用协程模式
+    from app.utils import green_db
+    if app.config.get('DB_GREEN_MODE') and green_db.is_green_runtime():
+        green_db.install()
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', green_db.engine_options(config_class))
+
     db.init_app(app)
     migrate.init_app(app, db)
 
+    from app.utils.pool_monitor import pool_monitor
+    with app.app_context():
+        pool_monitor.attach(db.engine)
+
     socketio.init_app(app,
                       cors_allowed_origins="*",
                       async_mode='eventlet',
@@ -35,6 +45,27 @@ def create_app(config_class=Config):
     from app.services.cleanup_scheduler import cleanup_scheduler
     cleanup_scheduler.init_app(app)
 
+    from app.services.fleet_orchestrator import fleet_orchestrator
+    fleet_orchestrator.init_app(app)
+
+    from app.services.deferred_actions import deferred_actions
+    deferred_actions.init_app(app)
+
+    from app.services.write_behind import write_behind
+    write_behind.init_app(app)
+
+    from app.services.config_cache import config_cache
+    config_cache.init_app(app)
+
+    from app.services.device_channel import device_push
+    device_push.init_app(app)
+
+    from app.services.dashboard_channel import dashboard_rooms
+    dashboard_rooms.init_app(app)
+
+    from app.services.url_events import url_events
+    url_events.init_app(app)
+
     from app.main import bp as main_bp
     app.register_blueprint(main_bp)
 
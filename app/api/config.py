@@ -1,34 +1,46 @@
-import datetime
+from flask import current_app, jsonify, request
 
-from flask import jsonify, request
-
-from app import db, socketio
+from app import db
 from app.api import bp
 from app.auth.decorators import login_required, token_required
 from app.models.config_data import ConfigData
 from app.models.url_data import UrlData
+from app.services.config_cache import config_cache
+from app.services.config_delta import build_sync, parse_since
+from app.services.url_events import RUNNING_FIELDS, make_delta, next_version, url_events
 
 
 @bp.route('/config', methods=['GET'])
 @token_required
 def get_config():
     pade_code = request.args.get('pade_code')
-    config = ConfigData.query.filter_by(pade_code=pade_code).first()
-    if config:
-        return jsonify({
-            'success_time': [config.success_time_min, config.success_time_max],
-            'reset_time': config.reset_time,
-            'message': config.message,
-            'urldata': [url.to_dict() for url in config.urls if url.is_active]
-        })
-    return jsonify({'error': 'Config not found'}), 404
+
+    if 'since' in request.args:
+        # 增量同步：只返回游标之后变更的URL
+        config = ConfigData.query.filter_by(pade_code=pade_code).first()
+        if not config:
+            return jsonify({'error': 'Config not found'}), 404
+        return jsonify(build_sync(config, parse_since(request.args.get('since'))))
+
+    entry = config_cache.load(pade_code)
+    if entry is None:
+        return jsonify({'error': 'Config not found'}), 404
+
+    if request.if_none_match.contains(entry.etag):
+        config_cache.record_not_modified()
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    return response
 
 
 @bp.route('/config/<int:config_id>/urls', methods=['GET'])
 @login_required
 def get_config_urls(config_id):
-    """获取配置的所有URL"""
+    """获取配置的所有URL，version 为查询前取得的版本号，前端丢弃不比它新的增量"""
     try:
+        version = next_version()
         config = db.session.get(ConfigData, config_id)
         if not config:
             return jsonify({'error': 'Config not found'}), 404
@@ -50,12 +62,13 @@ def get_config_urls(config_id):
             urls = query.order_by(UrlData.id).all()
             return jsonify({
                 'config_id': config_id,
+                'version': version,
                 'urls': [url.to_dict() | {'pade_code': config.pade_code} for url in urls],
                 'pagination': None,  # 表示不分页
                 'total': len(urls),
                 'active': UrlData.query.filter_by(config_id=config_id, is_active=True).count(),
                 'inactive': UrlData.query.filter_by(config_id=config_id, is_active=False).count(),
-                'available': UrlData.query.filter_by(config_id=config_id, is_active=True).filter(UrlData.current_count < UrlData.max_num).count(),
+                'available': UrlData.query.filter_by(config_id=config_id, is_active=True, is_exhausted=False).count(),
                 'running': UrlData.query.filter_by(config_id=config_id, is_running=True).count(),
             })
 
@@ -68,6 +81,7 @@ def get_config_urls(config_id):
 
         return jsonify({
             'config_id': config_id,
+            'version': version,
             'urls': [url.to_dict() | {'pade_code': config.pade_code} for url in urls],
             'pagination': {
                 'page': pagination.page,
@@ -80,7 +94,7 @@ def get_config_urls(config_id):
             'total': pagination.total,
             'active': UrlData.query.filter_by(config_id=config_id, is_active=True).count(),
             'inactive': UrlData.query.filter_by(config_id=config_id, is_active=False).count(),
-            'available': UrlData.query.filter_by(config_id=config_id, is_active=True).filter(UrlData.current_count < UrlData.max_num).count(),
+            'available': UrlData.query.filter_by(config_id=config_id, is_active=True, is_exhausted=False).count(),
             'running': UrlData.query.filter_by(config_id=config_id, is_running=True).count(),
         })
     except Exception as e:
@@ -96,17 +110,18 @@ def get_config_status(config_id):
         if not config:
             return jsonify({'error': 'Config not found'}), 404
 
-        urls = UrlData.query.filter_by(config_id=config_id, is_active=True).all()
+        summary = UrlData.summarize(config_id)
+        running_urls = UrlData.query.filter_by(config_id=config_id, is_active=True, is_running=True).all()
 
         stats = {
             'config': config.to_dict(),
-            'total_urls': len(urls),
-            'available_urls': len([url for url in urls if url.can_execute()]),
-            'completed_urls': len([url for url in urls if url.current_count >= url.max_num]),
-            'running_urls': len([url for url in urls if url.is_running]),
-            'total_executions': sum(url.current_count for url in urls),
-            'max_possible_executions': sum(url.max_num for url in urls),
-            'total_running_time': sum(url.get_running_duration() for url in urls if url.is_running)
+            'total_urls': summary['active'],
+            'available_urls': summary['available'],
+            'completed_urls': summary['completed'],
+            'running_urls': summary['running'],
+            'total_executions': summary['total_executions'],
+            'max_possible_executions': summary['max_possible_executions'],
+            'total_running_time': sum(url.get_running_duration() for url in running_urls)
         }
 
         return jsonify(stats)
@@ -140,8 +155,9 @@ def start_all_config_urls(config_id):
 
         urls = UrlData.query.filter_by(
             config_id=config_id,
-            is_active=True
-        ).filter(UrlData.current_count < UrlData.max_num).all()
+            is_active=True,
+            is_exhausted=False
+        ).all()
 
         started_count = 0
         for url in urls:
@@ -207,7 +223,7 @@ def get_config_running_status(config_id):
             url_data = url.to_dict()
             if url.is_running:
                 running_urls.append(url_data)
-            elif url.current_count >= url.max_num:
+            elif url.is_exhausted:
                 completed_urls.append(url_data)
             else:
                 pending_urls.append(url_data)
@@ -244,26 +260,22 @@ def start_config_urls(config_id):
 
         urls = UrlData.query.filter_by(
             config_id=config_id,
-            is_active=True
-        ).filter(UrlData.current_count < UrlData.max_num).all()
+            is_active=True,
+            is_exhausted=False
+        ).all()
 
         started_count = 0
         started_urls = []
         for url in urls:
             if url.start_running():
                 started_count += 1
-                started_urls.append(url.to_dict())
+                started_urls.append((url.id, url.config_id, url.to_delta(*RUNNING_FIELDS)))
 
         db.session.commit()
 
-        # 批量推送启动事件
-        for url_data in started_urls:
-            socketio.emit('url_started', {
-                'url_id': url_data['id'],
-                'config_id': config_id,
-                'url_data': url_data,
-                'timestamp': datetime.datetime.now().isoformat()
-            })
+        # 批量推送启动事件，版本号在提交之后生成，刷新页面取得的快照不会比增量更新却缺少该变更
+        for url_id, config_id, changes in started_urls:
+            url_events.emit('url_started', make_delta(url_id, config_id, changes))
 
         return jsonify({
             'message': f'Started {started_count} URLs successfully',
@@ -292,18 +304,13 @@ def stop_config_urls(config_id):
         for url in urls:
             if url.stop_running():
                 stopped_count += 1
-                stopped_urls.append(url.to_dict())
+                stopped_urls.append((url.id, url.config_id, url.to_delta(*RUNNING_FIELDS)))
 
         db.session.commit()
 
-        # 批量推送停止事件
-        for url_data in stopped_urls:
-            socketio.emit('url_stopped', {
-                'url_id': url_data['id'],
-                'config_id': config_id,
-                'url_data': url_data,
-                'timestamp': datetime.datetime.now().isoformat()
-            })
+        # 批量推送停止事件，版本号在提交之后生成
+        for url_id, config_id, changes in stopped_urls:
+            url_events.emit('url_stopped', make_delta(url_id, config_id, changes))
 
         return jsonify({
             'message': f'Stopped {stopped_count} URLs successfully',
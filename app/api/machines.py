@@ -1,16 +1,23 @@
 import datetime
-from time import sleep
 from typing import Any
 
-from flask import jsonify, request
+from flask import jsonify, request, session
 from loguru import logger
+from sqlalchemy.exc import IntegrityError
 
-from app import db, Config, socketio
+from app import db, Config
 from app.api import bp
 from app.auth.decorators import login_required, admin_required
 from app.models import UrlData
 from app.models.config_data import ConfigData
-from app.utils.vmos import get_phone_list, start_app, stop_app, open_root
+from app.services.dashboard_channel import dashboard_rooms
+from app.services.deferred_actions import deferred_actions
+from app.services.fleet_orchestrator import fleet_orchestrator
+from app.services.pad_list_cache import pad_list_cache
+from app.services.url_events import RUNNING_FIELDS, make_delta, url_events
+from app.services.vmos_dispatcher import call_chunk, commit_running_state, get_batch_size, iter_chunks, machine_info, \
+    parse_pad_results, release_connection
+from app.utils.vmos import start_app, stop_app, open_root
 
 
 def get_current_pkg_names():
@@ -53,6 +60,7 @@ def stop():
     try:
         # 动态获取包名配置
         pkg_names = get_current_pkg_names()
+        release_connection()
 
         # 停止VMOS应用
         result = stop_app([pad_code], package_name=pkg_names['pkg_name'])
@@ -68,23 +76,18 @@ def stop():
             stopped_urls = []
             for url in urls:
                 if url.stop_running():
-                    stopped_urls.append(url.to_dict())
+                    stopped_urls.append((url.id, url.config_id, url.to_delta(*RUNNING_FIELDS)))
             config.is_running = False
             db.session.commit()
-            socketio.emit('machine_info_update', {
+            dashboard_rooms.emit_fleet('machine_info_update', {
                 'machine_id': config.id,
                 'is_running': False,
                 'phone_number': config.phone_number
             })
 
-            # 推送所有停止的URL事件
-            for url_data in stopped_urls:
-                socketio.emit('url_stopped', {
-                    'url_id': url_data['id'],
-                    'config_id': config.id,
-                    'url_data': url_data,
-                    'timestamp': datetime.datetime.now().isoformat()
-                })
+            # 推送所有停止的URL事件，版本号在提交之后生成，刷新页面取得的快照不会比增量更新却缺少该变更
+            for url_id, config_id, changes in stopped_urls:
+                url_events.emit('url_stopped', make_delta(url_id, config_id, changes))
 
             logger.info(f"已停止配置 {config.id} 下 {len(urls)} 个URL的运行状态")
 
@@ -108,14 +111,30 @@ def start():
     try:
         # 动态获取包名配置
         pkg_names = get_current_pkg_names()
+        release_connection()
 
-        # 启动VMOS应用
-        open_root(
+        # 启动VMOS应用：先开启root，5秒后由延迟动作服务启动应用，不阻塞当前请求
+        result = open_root(
             pad_code_list=[pad_code],
             pkg_name=pkg_names['pkg_name'],
         )
-        sleep(5)
-        result = start_app([pad_code], pkg_name=pkg_names['pkg_name'])
+        deferred_actions.schedule(
+            5, _finish_start, pad_code, pkg_names['pkg_name'], name=f'start_app:{pad_code}'
+        )
+
+        return jsonify({"message": "启动中", "msg": result}), 202
+    except Exception as e:
+        logger.error(f"启动失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _finish_start(pad_code: str, pkg_name: str):
+    """root生效后启动应用并更新运行状态（由延迟动作服务调用）"""
+    try:
+        result = start_app([pad_code], pkg_name=pkg_name)
+        pad_result = parse_pad_results([pad_code], result)[pad_code]
+        if not pad_result['success']:
+            raise RuntimeError(pad_result['message'])
         logger.success(f"{pad_code}: 启动成功, {result}")
 
         # 更新数据库中的运行状态
@@ -124,40 +143,50 @@ def start():
             # 启动该配置下所有可用URL的运行状态
             urls = UrlData.query.filter_by(
                 config_id=config.id,
-                is_active=True
-            ).filter(UrlData.current_count < UrlData.max_num).all()
+                is_active=True,
+                is_exhausted=False
+            ).all()
 
             started_count = 0
             started_urls = []
             for url in urls:
                 if url.start_running():
                     started_count += 1
-                    started_urls.append(url.to_dict())
+                    started_urls.append((url.id, url.config_id, url.to_delta(*RUNNING_FIELDS)))
             config.is_running = True
             db.session.commit()
 
-            socketio.emit('machine_info_update', {
+            dashboard_rooms.emit_fleet('machine_info_update', {
                 'machine_id': config.id,
                 'is_running': True,
                 'phone_number': config.phone_number
             })
 
-            # 推送所有启动的URL事件
-            for url_data in started_urls:
-                socketio.emit('url_started', {
-                    'url_id': url_data['id'],
-                    'config_id': config.id,
-                    'url_data': url_data,
-                    'timestamp': datetime.datetime.now().isoformat()
-                })
+            # 推送所有启动的URL事件，版本号在提交之后生成
+            for url_id, config_id, changes in started_urls:
+                url_events.emit('url_started', make_delta(url_id, config_id, changes))
 
             logger.info(f"已启动配置 {config.id} 下 {started_count} 个URL的运行状态")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"{pad_code}: 启动失败: {e}")
+        _notify_start_failed(pad_code, str(e))
+        raise
+
 
-        return jsonify({"message": "启动成功", "msg": result})
+def _notify_start_failed(pad_code: str, error: str):
+    """/api/start 已返回 202，后台启动失败时推送给仪表盘，运行状态保持不变"""
+    try:
+        config = ConfigData.query.filter_by(pade_code=pad_code).first()
+        dashboard_rooms.emit_fleet('machine_start_failed', {
+            'machine_id': config.id if config else None,
+            'pade_code': pad_code,
+            'is_running': config.is_running if config else False,
+            'error': error
+        })
     except Exception as e:
         db.session.rollback()
-        logger.error(f"启动失败: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error(f"{pad_code}: 推送启动失败事件失败: {e}")
 
 
 @bp.route('/machines', methods=['POST'])
@@ -198,6 +227,10 @@ def create_machine():
             'machine': new_machine.to_dict()
         }), 201
 
+    except IntegrityError:
+        # 并发创建同一机器代码时由唯一索引兜底
+        db.session.rollback()
+        return jsonify({'error': f'Machine code "{data["pade_code"]}" already exists'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -276,20 +309,24 @@ def toggle_machine_status(machine_id):
         if not machine:
             return jsonify({'error': 'Machine not found'}), 404
 
-        if machine.is_active:
-            if machine.is_running:
-                pade_code = machine.pade_code
-                result = stop_app([pade_code], package_name=Config.PKG_NAME)
-                logger.success(f"{pade_code}: 停止成功, {result}")
-                result_tg = stop_app([pade_code], package_name=Config.TG_PKG_NAME)
-                logger.success(f"{pade_code}: 停止成功, {result_tg}")
-                machine.is_running = False
-            machine.is_active = False
-            machine.updated_at = datetime.datetime.now()
-        else:
-            machine.is_active = True
-            machine.updated_at = datetime.datetime.now()
+        deactivate = bool(machine.is_active)
+        stop_pade_code = machine.pade_code if deactivate and machine.is_running else None
+        release_connection()
 
+        # 不持有数据库连接等待VMOS
+        if stop_pade_code:
+            result = stop_app([stop_pade_code], package_name=Config.PKG_NAME)
+            logger.success(f"{stop_pade_code}: 停止成功, {result}")
+            result_tg = stop_app([stop_pade_code], package_name=Config.TG_PKG_NAME)
+            logger.success(f"{stop_pade_code}: 停止成功, {result_tg}")
+
+        machine = db.session.get(ConfigData, machine_id)
+        if not machine:
+            return jsonify({'error': 'Machine not found'}), 404
+        if stop_pade_code:
+            machine.is_running = False
+        machine.is_active = not deactivate
+        machine.updated_at = datetime.datetime.now()
         db.session.commit()
 
         return jsonify({
@@ -330,17 +367,16 @@ def get_machine_stats(machine_id):
         if not machine:
             return jsonify({'error': 'Machine not found'}), 404
 
-        urls = machine.urls
-        active_urls = [url for url in urls if url.is_active]
+        summary = UrlData.summarize(machine_id)
 
         stats = {
             'machine': machine.to_dict(),
-            'total_urls': len(urls),
-            'active_urls': len(active_urls),
-            'available_urls': len([url for url in active_urls if url.can_execute()]),
-            'completed_urls': len([url for url in active_urls if url.current_count >= url.max_num]),
-            'total_executions': sum(url.current_count for url in active_urls),
-            'max_possible_executions': sum(url.max_num for url in active_urls)
+            'total_urls': summary['total'],
+            'active_urls': summary['active'],
+            'available_urls': summary['available'],
+            'completed_urls': summary['completed'],
+            'total_executions': summary['total_executions'],
+            'max_possible_executions': summary['max_possible_executions']
         }
 
         return jsonify(stats)
@@ -351,7 +387,7 @@ def get_machine_stats(machine_id):
 @bp.route('/machines/batch-start', methods=['POST'])
 @login_required
 def batch_start_machines():
-    """批量启动机器"""
+    """批量启动机器（后台编排执行，立即返回任务ID）"""
     try:
         data = request.json
         machine_ids = data.get('machine_ids', [])
@@ -365,55 +401,33 @@ def batch_start_machines():
                 ConfigData.is_active == True
             ).all()
 
-        results = []
-        for machine in machines:
-            if machine.pade_code:
-                try:
-                    # 调用VMOS API启动机器
-                    open_root(
-                        pad_code_list=[machine.pade_code], pkg_name=Config.PKG_NAME
-                    )
-                    sleep(5)
-                    response = start_app([machine.pade_code], pkg_name=Config.PKG_NAME)
-                    results.append({
-                        'machine_id': machine.id,
-                        'machine_name': machine.message,
-                        'status': 'success',
-                        'message': 'Started successfully',
-                        'response': response
-                    })
-                    machine.is_running = True
-                    db.session.commit()
-
-                    socketio.emit('machine_info_update', {
-                        'machine_id': machine.id,
-                        'is_running': True,
-                        'phone_number': machine.phone_number
-                    })
-
-                except Exception as e:
-                    results.append({
-                        'machine_id': machine.id,
-                        'machine_name': machine.message,
-                        'status': 'error',
-                        'message': str(e)
-                    })
+        machines = [machine_info(machine) for machine in machines if machine.pade_code]
+        job_id = fleet_orchestrator.submit(machines, pkg_name=Config.PKG_NAME, user_id=session.get('user_id'))
 
         return jsonify({
-            'message': f'Batch start completed for {len(results)} machines',
-            'results': results
-        })
+            'message': f'Batch start submitted for {len(machines)} machines',
+            'job_id': job_id,
+            'total': len(machines)
+        }), 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/machines/batch-start/<string:job_id>', methods=['GET'])
+@login_required
+def get_batch_start_job(job_id):
+    """查询批量启动任务进度"""
+    job = fleet_orchestrator.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+
 @bp.route('/machines/batch-stop', methods=['POST'])
 @login_required
 def batch_stop_machines():
-    """批量停止机器"""
+    """批量停止机器（按批次调用VMOS）"""
     try:
-        from app.utils.vmos import stop_app
-
         data = request.json
         machine_ids = data.get('machine_ids', [])
 
@@ -423,40 +437,45 @@ def batch_stop_machines():
         else:
             machines = ConfigData.query.filter(ConfigData.id.in_(machine_ids)).all()
 
+        machines_by_code = {machine.pade_code: machine_info(machine) for machine in machines if machine.pade_code}
+        batch_size = get_batch_size()
+        release_connection()
+
         results = []
-        for machine in machines:
-            if machine.pade_code:
-                try:
-                    # 调用VMOS API停止机器
-                    response_script = stop_app([machine.pade_code], package_name=Config.PKG_NAME)
-                    response_tg = stop_app([machine.pade_code], package_name=Config.TG_PKG_NAME)
+        for chunk in iter_chunks(list(machines_by_code), batch_size):
+            # 调用VMOS API停止机器
+            script_results = call_chunk(chunk, lambda codes: stop_app(codes, package_name=Config.PKG_NAME))
+            tg_results = call_chunk(chunk, lambda codes: stop_app(codes, package_name=Config.TG_PKG_NAME))
+
+            stopped = []
+            for code in chunk:
+                machine = machines_by_code[code]
+                script_result, tg_result = script_results[code], tg_results[code]
+                if script_result['success'] and tg_result['success']:
+                    stopped.append(machine)
                     results.append({
-                        'machine_id': machine.id,
-                        'machine_name': machine.message,
+                        'machine_id': machine['id'],
+                        'machine_name': machine['name'],
                         'status': 'success',
                         'message': 'Stopped successfully',
-                        'response': f"停止脚本成功:{response_script}, 停止tg成功:{response_tg}"
-                    })
-                    machine.is_running = False
-                    db.session.commit()
-                    socketio.emit('machine_info_update', {
-                        'machine_id': machine.id,
-                        'is_running': False,
-                        'phone_number': machine.phone_number
+                        'response': f"停止脚本成功:{script_result['response']}, 停止tg成功:{tg_result['response']}"
                     })
-                except Exception as e:
+                else:
                     results.append({
-                        'machine_id': machine.id,
-                        'machine_name': machine.message,
+                        'machine_id': machine['id'],
+                        'machine_name': machine['name'],
                         'status': 'error',
-                        'message': str(e)
+                        'message': script_result['message'] if not script_result['success'] else tg_result['message']
                     })
 
+            commit_running_state(stopped, False)
+
         return jsonify({
             'message': f'Batch stop completed for {len(results)} machines',
             'results': results
         })
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
@@ -468,8 +487,11 @@ def sync_new_machines():
         # 获取请求数据
         data = request.get_json() or {}
         selected_pad_codes = data.get('pad_codes')  # 可选：指定要同步的机器代码列表
+        refresh = bool(data.get('refresh', False))
 
-        vmos_response = get_phone_list()
+        # admin_required 校验用户时已借出连接，获取VMOS列表前先归还
+        release_connection()
+        vmos_response = pad_list_cache.get(refresh=refresh)
         if not vmos_response or 'data' not in vmos_response:
             return jsonify({'error': 'Failed to fetch machines from VMOS API'}), 500
 
@@ -546,7 +568,9 @@ def sync_new_machines():
 @admin_required
 def get_vmos_machines_list():
     try:
-        vmos_response = get_phone_list()
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        release_connection()
+        vmos_response = pad_list_cache.get(refresh=refresh)
         if not vmos_response or 'data' not in vmos_response:
             return jsonify({'error': 'Failed to fetch machines from VMOS API'}), 500
 
@@ -561,7 +585,7 @@ def get_vmos_machines_list():
 
         for vmos_machine in vmos_machines:
             pade_code = vmos_machine.get('padCode')
-            machine_info = {
+            item = {
                 'padCode': pade_code,
                 'padName': vmos_machine.get('padName', ''),
                 'goodName': vmos_machine.get('goodName', ''),
@@ -571,9 +595,9 @@ def get_vmos_machines_list():
             }
 
             if pade_code in existing_codes:
-                existing_machines.append(machine_info)
+                existing_machines.append(item)
             else:
-                new_machines.append(machine_info)
+                new_machines.append(item)
 
         return jsonify({
             'total_vmos_machines': len(vmos_machines),
@@ -0,0 +1,53 @@
+from flask import jsonify
+
+from app.api import bp
+from app.auth.decorators import admin_required
+from app.services.config_cache import config_cache
+from app.services.deferred_actions import deferred_actions
+from app.services.dashboard_channel import dashboard_rooms
+from app.services.device_channel import device_push
+from app.services.fleet_orchestrator import fleet_orchestrator
+from app.services.pad_list_cache import pad_list_cache
+from app.services.url_events import url_events
+from app.services.write_behind import write_behind
+from app.utils.auth import vmos_breaker, vmos_retry_budget
+from app.utils.http_pool import vmos_http_client
+from app.utils.pool_monitor import pool_monitor
+from app.utils.rate_limiter import vmos_rate_limiter
+from app.utils.vmos_keys import vmos_key_pool
+
+
+@bp.route('/metrics', methods=['GET'])
+@admin_required
+def get_metrics():
+    """获取运行时性能指标"""
+    try:
+        return jsonify({
+            'vmos_http_pool': vmos_http_client.get_stats(),
+            'vmos_circuit_breaker': vmos_breaker.get_stats(),
+            'vmos_retry_budget': vmos_retry_budget.get_stats(),
+            'vmos_rate_limits': vmos_rate_limiter.get_stats(),
+            'vmos_keys': vmos_key_pool.get_stats(),
+            'fleet_orchestrator': fleet_orchestrator.get_stats(),
+            'deferred_actions': deferred_actions.get_stats(),
+            'vmos_pad_list_cache': pad_list_cache.get_stats(),
+            'write_behind': write_behind.get_stats(),
+            'device_config_cache': config_cache.get_stats(),
+            'device_push': device_push.get_stats(),
+            'url_events': url_events.get_stats(),
+            'dashboard_rooms': dashboard_rooms.get_stats(),
+            'db_pool': pool_monitor.get_stats(),
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/metrics/vmos-breaker/reset', methods=['POST'])
+@admin_required
+def reset_vmos_breaker():
+    """手动关闭VMOS熔断器"""
+    vmos_breaker.reset()
+    return jsonify({
+        'message': 'VMOS熔断器已重置',
+        'breaker': vmos_breaker.get_stats()
+    })
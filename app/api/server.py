@@ -3,10 +3,14 @@ import datetime
 from flask import jsonify, request
 from loguru import logger
 
-from app import db, socketio
+from app import db
 from app.api import bp
 from app.auth.decorators import token_required
 from app.models import UrlData, ConfigData
+from app.services.dashboard_channel import dashboard_rooms
+from app.services.execution_report import apply_report
+from app.services.url_events import EXECUTE_FIELDS, RUNNING_FIELDS, make_delta, url_delta, url_events
+from app.services.write_behind import write_behind
 from app.utils.dynamic_config import get_dynamic_config
 
 
@@ -53,40 +57,32 @@ def add_execute_num():
             return jsonify({'error': 'Missing url_id parameter'}), 400
 
         url_id = int(data['url_id'])
-        url = db.session.get(UrlData, url_id)
 
+        # 条件UPDATE在数据库端完成计数，并发请求不会丢失更新或超过上限
+        url = UrlData.execute_atomic(url_id)
         if not url:
-            return jsonify({'error': 'URL not found'}), 404
-
-        if not url.can_execute():
+            db.session.rollback()
+            counts = db.session.query(UrlData.current_count, UrlData.max_num).filter_by(id=url_id).first()
+            if not counts:
+                return jsonify({'error': 'URL not found'}), 404
             return jsonify({
                 'error': 'URL has reached maximum execution count',
-                'current_count': url.current_count,
-                'max_num': url.max_num
+                'current_count': counts.current_count,
+                'max_num': counts.max_num
             }), 400
 
-        if not url.is_running:
-            url.start_running()
-
-        if url.execute():
-            db.session.commit()
-            socketio.emit('url_executed', {
-                'url_id': url_id,
-                'config_id': url.config_id,
-                'url_data': url.to_dict()
-            })
-
-            return jsonify({
-                'message': f'Successfully executed {url.name}',
-                'url': url.url,
-                'current_count': url.current_count,
-                'remaining': url.max_num - url.current_count,
-                'last_time': url.last_time.isoformat() if url.last_time else None,
-                'is_running': url.is_running,
-                'running_duration': url.get_running_duration()
-            })
+        db.session.commit()
+        url_events.emit('url_executed', url_delta(url, *EXECUTE_FIELDS))
 
-        return jsonify({'error': 'Failed to execute'}), 500
+        return jsonify({
+            'message': f'Successfully executed {url.name}',
+            'url': url.url,
+            'current_count': url.current_count,
+            'remaining': url.max_num - url.current_count,
+            'last_time': url.last_time.isoformat() if url.last_time else None,
+            'is_running': url.is_running,
+            'running_duration': url.get_running_duration()
+        })
 
     except ValueError:
         return jsonify({'error': 'Invalid url_id format'}), 400
@@ -96,6 +92,44 @@ def add_execute_num():
 
 
 
+@bp.route("/report_batch", methods=["POST"])
+@token_required
+def report_batch():
+    """批量上报执行事件（execute/status/label/last_time/running_status），一个事务内完成"""
+    try:
+        data = request.json
+        if not data or not isinstance(data.get('events'), list):
+            return jsonify({'error': 'Missing events data'}), 400
+
+        summary = apply_report(data['events'])
+        return jsonify({
+            'message': f'Batch report completed: {summary["succeeded"]}/{summary["total_events"]} events applied',
+            **summary
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _buffer_url_update(url_id: int, field: str, value):
+    """写回模式：更新进入缓冲并立即推送，稍后批量写入数据库"""
+    exists, config_id = write_behind.find_config_id(url_id)
+    if not exists:
+        return jsonify({'error': 'URL not found'}), 404
+
+    write_behind.put(url_id, field, value)
+    dashboard_rooms.emit_config(f'{field}_updated', config_id, {
+        **make_delta(url_id, config_id, {field: value or ''}),
+        'buffered': True
+    })
+    return jsonify({
+        'message': f'URL {url_id} {field} update accepted',
+        'url_id': url_id,
+        'buffered': True
+    }), 200
+
+
 @bp.route("/add_label", methods=["POST"])
 @token_required
 def add_label():
@@ -108,6 +142,9 @@ def add_label():
         url_id = int(data['url_id'])
         label = data['label']
 
+        if write_behind.enabled:
+            return _buffer_url_update(url_id, 'label', label)
+
         url = db.session.get(UrlData, url_id)
         if not url:
             return jsonify({'error': 'URL not found'}), 404
@@ -117,12 +154,7 @@ def add_label():
         db.session.commit()
 
         # 添加这部分 - 实时推送标签更新
-        socketio.emit('label_updated', {
-            'url_id': url_id,
-            'config_id': url.config_id,
-            'label': label,
-            'url_data': url.to_dict()
-        })
+        dashboard_rooms.emit_config('label_updated', url.config_id, url_delta(url, 'label'))
 
         return jsonify({
             'message': f'URL "{url.name}" label updated successfully',
@@ -147,6 +179,9 @@ def update_status():
         url_id = int(data['url_id'])
         status = data['status']
 
+        if write_behind.enabled:
+            return _buffer_url_update(url_id, 'status', status)
+
         url = db.session.get(UrlData, url_id)
         if not url:
             return jsonify({'error': 'URL not found'}), 404
@@ -156,12 +191,7 @@ def update_status():
         db.session.commit()
 
         # 添加这部分 - 实时推送状态更新
-        socketio.emit('status_updated', {
-            'url_id': url_id,
-            'config_id': url.config_id,
-            'status': status,
-            'url_data': url.to_dict()
-        })
+        dashboard_rooms.emit_config('status_updated', url.config_id, url_delta(url, 'status'))
 
         return jsonify({
             'message': f'URL "{url.name}" status updated successfully',
@@ -235,7 +265,7 @@ def update_phone_number():
     if config:
         config.phone_number = phone_number
         db.session.commit()
-        socketio.emit('machine_info_update', {
+        dashboard_rooms.emit_fleet('machine_info_update', {
             'machine_id': config.id,
             'is_running': config.is_running,
             'phone_number': phone_number
@@ -268,9 +298,17 @@ def batch_update_labels():
 
         updates = data['updates']
 
-        updated_count = 0
-        results = []
+        labels = {}
+        for update in updates:
+            if 'url_id' in update and 'label' in update:
+                # 同一URL出现多次时以最后一次为准
+                labels[int(update['url_id'])] = update['label']
+
+        write_behind.discard(labels, ['label'])
+        updated = UrlData.bulk_update_field('label', labels)
+        db.session.commit()
 
+        results = []
         for update in updates:
             if 'url_id' not in update or 'label' not in update:
                 results.append({
@@ -281,37 +319,40 @@ def batch_update_labels():
                 continue
 
             url_id = int(update['url_id'])
-            label = update['label']
-
-            url = db.session.get(UrlData, url_id)
-            if not url:
+            row = updated.get(url_id)
+            if not row:
                 results.append({
                     'url_id': url_id,
                     'status': 'error',
                     'message': 'URL not found'
                 })
                 continue
-
-            url.label = label
-            url.updated_at = datetime.datetime.now()
-            updated_count += 1
-
             results.append({
                 'url_id': url_id,
                 'status': 'success',
-                'message': f'Label updated to "{label}"',
-                'url_name': url.name
+                'message': f'Label updated to "{update["label"]}"',
+                'url_name': row['name']
             })
 
-        db.session.commit()
+        if updated:
+            # 一次推送整批标签变更，前端按机器刷新一次
+            config_ids = sorted({row['config_id'] for row in updated.values() if row['config_id']})
+            dashboard_rooms.emit_configs('labels_updated', config_ids, {
+                'config_ids': config_ids,
+                'items': [make_delta(url_id, row['config_id'], {'label': labels[url_id] or ''})
+                          for url_id, row in updated.items()]
+            })
 
         return jsonify({
-            'message': f'Batch update completed: {updated_count} URLs updated',
-            'updated_count': updated_count,
+            'message': f'Batch update completed: {len(updated)} URLs updated',
+            'updated_count': len(updated),
             'total_requests': len(updates),
             'results': results
         })
 
+    except ValueError:
+        db.session.rollback()
+        return jsonify({'error': 'Invalid url_id format'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -330,21 +371,11 @@ def update_running_status():
     if running_status:
         if url.start_running():
             db.session.commit()
-            socketio.emit('url_started', {
-                'url_id': url_id,
-                'config_id': url.config_id,
-                'url_data': url.to_dict(),
-                'timestamp': datetime.datetime.now().isoformat()
-            })
+            url_events.emit('url_started', url_delta(url, *RUNNING_FIELDS))
     else:
         if url.stop_running():
             db.session.commit()
-            socketio.emit('url_stopped', {
-                'url_id': url_id,
-                'config_id': url.config_id,
-                'url_data': url.to_dict(),
-                'timestamp': datetime.datetime.now().isoformat()
-            })
+            url_events.emit('url_stopped', url_delta(url, *RUNNING_FIELDS))
     return jsonify({
         'message': f'Successfully update {url_id} running status, turn to {running_status}',
         'url_id': url_id
@@ -1,5 +1,6 @@
 import os
 import datetime
+import json
 import shutil
 from flask import jsonify, request
 from loguru import logger
@@ -8,6 +9,7 @@ from app import db
 from app.api import bp
 from app.auth.decorators import admin_required
 from app.models.system_config import SystemConfig
+from app.utils.rate_limiter import validate_rate_limits
 
 
 @bp.route('/system-configs', methods=['GET'])
@@ -231,6 +233,175 @@ def delete_system_config(config_id):
         return jsonify({'error': str(e)}), 500
 
 
+def _load_credential_pool() -> list:
+    from app.utils.vmos_keys import CREDENTIAL_POOL_KEY, parse_pool
+    return parse_pool(SystemConfig.get_config(CREDENTIAL_POOL_KEY))
+
+
+def _save_credential_pool(entries: list):
+    """保存VMOS凭证池并立即生效"""
+    from app.utils.vmos_keys import CREDENTIAL_POOL_KEY
+    value = json.dumps(entries, ensure_ascii=False)
+    SystemConfig.set_config(
+        key=CREDENTIAL_POOL_KEY,
+        value=value,
+        description='VMOS多账号凭证池，按机器归属路由请求',
+        category='vmos',
+        is_sensitive=True
+    )
+    db.session.commit()
+
+    from app.utils.dynamic_config import dynamic_config
+    dynamic_config.set_config(CREDENTIAL_POOL_KEY, value)
+
+
+def _parse_pad_codes(value) -> list:
+    """校验机器编号列表并去重，必须是字符串列表"""
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(code, str) for code in value):
+        raise ValueError('pad_codes must be a list of strings')
+    return list(dict.fromkeys(code.strip() for code in value if code.strip()))
+
+
+def _assign_pads(entries: list, target: dict, pad_codes: list):
+    """把机器分配给目标账号，并从其他账号名下移除，同一台机器只归属一个账号"""
+    assigned = set(pad_codes)
+    for entry in entries:
+        if entry is not target:
+            entry['pad_codes'] = [code for code in entry.get('pad_codes', []) if code not in assigned]
+    target['pad_codes'] = pad_codes
+
+
+@bp.route('/system-configs/vmos-keys', methods=['GET'])
+@admin_required
+def get_vmos_keys():
+    """获取VMOS凭证池（不返回密钥）及各账号使用情况"""
+    try:
+        from app.utils.vmos_keys import vmos_key_pool
+        usage = vmos_key_pool.get_stats()
+        keys = []
+        for entry in _load_credential_pool():
+            keys.append({
+                'name': entry['name'],
+                'access_key': f"{entry.get('access_key', '')[:4]}***",
+                'pad_codes': entry.get('pad_codes', []),
+                'rate_limits': entry.get('rate_limits'),
+                'usage': usage.get(entry['name'], {}).get('usage'),
+            })
+        return jsonify({
+            'keys': keys,
+            'default_usage': usage.get('default', {}).get('usage'),
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/system-configs/vmos-keys', methods=['POST'])
+@admin_required
+def save_vmos_key():
+    """新增或更新一个VMOS账号"""
+    try:
+        data = request.json
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        name = str(data.get('name', '')).strip()
+        if not name:
+            return jsonify({'error': 'Missing required field: name'}), 400
+        if name == 'default':
+            return jsonify({'error': 'default 账号请通过 ACCESS_KEY/SECRET_ACCESS 配置'}), 400
+
+        pad_codes = None
+        if 'pad_codes' in data:
+            try:
+                pad_codes = _parse_pad_codes(data['pad_codes'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+        entries = _load_credential_pool()
+        existing = next((entry for entry in entries if entry['name'] == name), None)
+        if existing is None:
+            for field in ['access_key', 'secret_access']:
+                if not str(data.get(field, '')).strip():
+                    return jsonify({'error': f'Missing required field: {field}'}), 400
+            existing = {'name': name, 'pad_codes': []}
+            entries.append(existing)
+
+        for field in ['access_key', 'secret_access']:
+            value = str(data.get(field, '')).strip()
+            if value:
+                existing[field] = value
+        if pad_codes is not None:
+            _assign_pads(entries, existing, pad_codes)
+        if 'rate_limits' in data:
+            if data['rate_limits']:
+                try:
+                    validate_rate_limits(data['rate_limits'])
+                except ValueError as e:
+                    return jsonify({'error': f'Invalid rate_limits: {e}'}), 400
+            existing['rate_limits'] = data['rate_limits'] or None
+
+        _save_credential_pool(entries)
+        return jsonify({
+            'message': f'VMOS账号 {name} 已保存并立即生效',
+            'pad_count': len(existing['pad_codes'])
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/system-configs/vmos-keys/<name>', methods=['DELETE'])
+@admin_required
+def delete_vmos_key(name):
+    """删除VMOS账号，其名下机器改由默认账号调用"""
+    try:
+        entries = _load_credential_pool()
+        remaining = [entry for entry in entries if entry['name'] != name]
+        if len(remaining) == len(entries):
+            return jsonify({'error': 'VMOS key not found'}), 404
+
+        _save_credential_pool(remaining)
+        return jsonify({'message': f'VMOS账号 {name} 已删除'})
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/system-configs/vmos-keys/<name>/pads', methods=['PUT'])
+@admin_required
+def assign_vmos_key_pads(name):
+    """设置VMOS账号名下的机器，同一台机器只归属一个账号"""
+    try:
+        data = request.json
+        if not data or 'pad_codes' not in data:
+            return jsonify({'error': 'Missing pad_codes parameter'}), 400
+
+        entries = _load_credential_pool()
+        target = next((entry for entry in entries if entry['name'] == name), None)
+        if target is None:
+            return jsonify({'error': 'VMOS key not found'}), 404
+
+        try:
+            pad_codes = _parse_pad_codes(data['pad_codes'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        _assign_pads(entries, target, pad_codes)
+
+        _save_credential_pool(entries)
+        return jsonify({
+            'message': f'VMOS账号 {name} 已分配 {len(pad_codes)} 台机器',
+            'pad_count': len(pad_codes)
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/system-configs/export-env', methods=['GET'])
 @admin_required
 def export_env_file():
@@ -398,8 +569,8 @@ def test_config(config_key):
                 from app.utils.dynamic_config import dynamic_config
                 dynamic_config.set_config(config_key, config.value)
 
-                from app.utils.vmos import get_phone_list
-                result = get_phone_list()
+                from app.services.pad_list_cache import pad_list_cache
+                result = pad_list_cache.get(refresh=True)
                 if result and 'data' in result:
                     test_result = {'success': True, 'message': f'VMOS API连接成功，获取到 {len(result["data"])} 台设备'}
                 else:
@@ -2,11 +2,12 @@ import datetime
 
 from flask import jsonify, request
 
-from app import db, socketio
+from app import db
 from app.api import bp
 from app.auth.decorators import login_required
 from app.models.config_data import ConfigData
 from app.models.url_data import UrlData
+from app.services.url_events import RUNNING_FIELDS, next_version, url_delta, url_events
 
 
 @bp.route('/url', methods=['POST'])
@@ -180,6 +181,7 @@ def reset_url_count(url_id):
 def get_urls_by_label(label):
     """根据标签查询URL列表"""
     try:
+        version = next_version()
         config_id = request.args.get('config_id', type=int)
         include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
 
@@ -199,6 +201,7 @@ def get_urls_by_label(label):
         return jsonify({
             'label': label,
             'config_id': config_id,
+            'version': version,
             'urls': [url.to_dict() for url in urls],
             'total': len(urls),
             'active': len([url for url in urls if url.is_active]),
@@ -239,7 +242,7 @@ def get_all_labels():
             total = count_query.count()
             active = count_query.filter(UrlData.is_active == True).count()
             running = count_query.filter(UrlData.is_running == True).count()
-            completed = count_query.filter(UrlData.current_count >= UrlData.max_num).count()
+            completed = count_query.filter(UrlData.is_exhausted == True).count()
 
             label_stats.append({
                 'label': label,
@@ -359,12 +362,7 @@ def start_url(url_id):
             db.session.commit()
 
             # 添加 WebSocket 推送
-            socketio.emit('url_started', {
-                'url_id': url_id,
-                'config_id': url.config_id,
-                'url_data': url.to_dict(),
-                'timestamp': datetime.datetime.now().isoformat()
-            })
+            url_events.emit('url_started', url_delta(url, *RUNNING_FIELDS))
 
             return jsonify({
                 'message': f'URL "{url.name}" started successfully',
@@ -400,12 +398,7 @@ def stop_url(url_id):
             db.session.commit()
 
             # WebSocket 推送
-            socketio.emit('url_stopped', {
-                'url_id': url_id,
-                'config_id': url.config_id,
-                'url_data': url.to_dict(),
-                'timestamp': datetime.datetime.now().isoformat()
-            })
+            url_events.emit('url_stopped', url_delta(url, *RUNNING_FIELDS))
 
             return jsonify({
                 'message': f'URL "{url.name}" stopped successfully',
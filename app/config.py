@@ -12,6 +12,13 @@ class Config:
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS_str = os.getenv('SQLALCHEMY_TRACK_MODIFICATIONS')
     SQLALCHEMY_TRACK_MODIFICATIONS = SQLALCHEMY_TRACK_MODIFICATIONS_str.lower() == 'true' if SQLALCHEMY_TRACK_MODIFICATIONS_str else False
+    # 协程数据库模式：psycopg2 等待数据库时让出 eventlet hub，连接池按协程并发配置
+    DB_GREEN_MODE_str = os.getenv('DB_GREEN_MODE')
+    DB_GREEN_MODE = DB_GREEN_MODE_str.lower() == 'true' if DB_GREEN_MODE_str else True
+    DB_POOL_SIZE = os.getenv('DB_POOL_SIZE', 20)
+    DB_MAX_OVERFLOW = os.getenv('DB_MAX_OVERFLOW', 30)
+    DB_POOL_TIMEOUT = os.getenv('DB_POOL_TIMEOUT', 10)
+    DB_POOL_RECYCLE = os.getenv('DB_POOL_RECYCLE', 1800)
     PKG_NAME = os.environ.get('PKG_NAME')
     TG_PKG_NAME = os.environ.get('TG_PKG_NAME')
     API_SECRET_TOKEN = os.getenv("API_SECRET_TOKEN")
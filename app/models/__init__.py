@@ -2,6 +2,7 @@ from app.models.cleanup_task import CleanupTask
 from app.models.config_data import ConfigData
 from app.models.system_config import SystemConfig
 from app.models.url_data import UrlData
+from app.models.url_tombstone import UrlTombstone
 from app.models.user import User
 
-__all__ = ['User', 'ConfigData', 'UrlData', 'CleanupTask', "SystemConfig"]
+__all__ = ['User', 'ConfigData', 'UrlData', 'UrlTombstone', 'CleanupTask', "SystemConfig"]
@@ -9,6 +9,10 @@ from app.models.url_data import UrlData
 
 class ConfigData(db.Model):
     __tablename__ = 'config_data'
+    __table_args__ = (
+        # 设备接口按 pade_code 查找机器，一台设备只对应一台机器
+        db.Index('ux_config_data_pade_code', 'pade_code', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     success_time_min = db.Column(db.Integer, nullable=False, default=5)
     success_time_max = db.Column(db.Integer, nullable=False, default=10)
@@ -107,6 +107,69 @@ class SystemConfig(db.Model):
                 'category': 'app',
                 'is_sensitive': False
             },
+            {
+                'key': 'WRITE_BEHIND_ENABLED',
+                'value': os.getenv('WRITE_BEHIND_ENABLED', 'false'),
+                'description': '是否缓冲设备上报的URL状态/标签并批量写入数据库',
+                'category': 'app',
+                'is_sensitive': False
+            },
+            {
+                'key': 'WRITE_BEHIND_FLUSH_MS',
+                'value': os.getenv('WRITE_BEHIND_FLUSH_MS', '500'),
+                'description': '写回缓冲刷新间隔（毫秒）',
+                'category': 'app',
+                'is_sensitive': False
+            },
+            {
+                'key': 'WRITE_BEHIND_MAX_ENTRIES',
+                'value': os.getenv('WRITE_BEHIND_MAX_ENTRIES', '1000'),
+                'description': '写回缓冲条目达到该数量时立即刷新',
+                'category': 'app',
+                'is_sensitive': False
+            },
+            {
+                'key': 'WRITE_BEHIND_MAX_STALENESS_MS',
+                'value': os.getenv('WRITE_BEHIND_MAX_STALENESS_MS', '5000'),
+                'description': '缓冲数据的最大陈旧时间（毫秒），超过后写入时同步刷新',
+                'category': 'app',
+                'is_sensitive': False
+            },
+            {
+                'key': 'WRITE_BEHIND_FLUSH_ON_SHUTDOWN',
+                'value': os.getenv('WRITE_BEHIND_FLUSH_ON_SHUTDOWN', 'true'),
+                'description': '停止服务时是否写入缓冲中的数据',
+                'category': 'app',
+                'is_sensitive': False
+            },
+            {
+                'key': 'DELTA_MAX_CHANGES',
+                'value': os.getenv('DELTA_MAX_CHANGES', '500'),
+                'description': '设备增量同步单次最多返回的变更数，超过时返回完整配置',
+                'category': 'app',
+                'is_sensitive': False
+            },
+            {
+                'key': 'DELTA_TOMBSTONE_RETENTION_HOURS',
+                'value': os.getenv('DELTA_TOMBSTONE_RETENTION_HOURS', '168'),
+                'description': 'URL删除记录保留时长（小时），更早的游标返回完整配置',
+                'category': 'app',
+                'is_sensitive': False
+            },
+            {
+                'key': 'DELTA_OVERLAP_SECONDS',
+                'value': os.getenv('DELTA_OVERLAP_SECONDS', '30'),
+                'description': '增量同步游标回退秒数，覆盖未提交的事务',
+                'category': 'app',
+                'is_sensitive': False
+            },
+            {
+                'key': 'URL_EVENT_TICK_MS',
+                'value': os.getenv('URL_EVENT_TICK_MS', '50'),
+                'description': 'URL实时事件汇总推送间隔（毫秒）',
+                'category': 'app',
+                'is_sensitive': False
+            },
             {
                 'key': 'DEBUG',
                 'value': os.getenv('DEBUG', 'false'),
@@ -129,6 +192,71 @@ class SystemConfig(db.Model):
                 'description': 'VMOS API密钥',
                 'category': 'vmos',
                 'is_sensitive': True
+            },
+            {
+                'key': 'VMOS_BASE_URL',
+                'value': os.getenv('VMOS_BASE_URL', 'https://api.vmoscloud.com'),
+                'description': 'VMOS API基础地址（压测时可指向本地模拟器）',
+                'category': 'vmos',
+                'is_sensitive': False
+            },
+
+            # VMOS连接池配置
+            {
+                'key': 'VMOS_POOL_CONNECTIONS',
+                'value': os.getenv('VMOS_POOL_CONNECTIONS', '10'),
+                'description': 'VMOS连接池缓存的主机连接池数量',
+                'category': 'vmos',
+                'is_sensitive': False
+            },
+            {
+                'key': 'VMOS_POOL_MAXSIZE',
+                'value': os.getenv('VMOS_POOL_MAXSIZE', '50'),
+                'description': 'VMOS单个主机的最大连接数',
+                'category': 'vmos',
+                'is_sensitive': False
+            },
+            {
+                'key': 'VMOS_POOL_BLOCK',
+                'value': os.getenv('VMOS_POOL_BLOCK', 'false'),
+                'description': 'VMOS连接耗尽时是否阻塞等待空闲连接',
+                'category': 'vmos',
+                'is_sensitive': False
+            },
+            {
+                'key': 'VMOS_KEEP_ALIVE',
+                'value': os.getenv('VMOS_KEEP_ALIVE', 'true'),
+                'description': '是否复用VMOS长连接',
+                'category': 'vmos',
+                'is_sensitive': False
+            },
+            {
+                'key': 'VMOS_CONNECT_TIMEOUT',
+                'value': os.getenv('VMOS_CONNECT_TIMEOUT', '5'),
+                'description': 'VMOS请求连接超时（秒）',
+                'category': 'vmos',
+                'is_sensitive': False
+            },
+            {
+                'key': 'VMOS_READ_TIMEOUT',
+                'value': os.getenv('VMOS_READ_TIMEOUT', '30'),
+                'description': 'VMOS请求读取超时（秒）',
+                'category': 'vmos',
+                'is_sensitive': False
+            },
+            {
+                'key': 'VMOS_RATE_LIMITS',
+                'value': os.getenv('VMOS_RATE_LIMITS', '{"default": [20, 40]}'),
+                'description': 'VMOS出站限速，按接口路径配置 [每秒请求数, 突发容量]',
+                'category': 'vmos',
+                'is_sensitive': False
+            },
+            {
+                'key': 'VMOS_CREDENTIAL_POOL',
+                'value': os.getenv('VMOS_CREDENTIAL_POOL', '[]'),
+                'description': 'VMOS多账号凭证池，按机器归属路由请求',
+                'category': 'vmos',
+                'is_sensitive': True
             }
         ]
 
@@ -1,12 +1,25 @@
 import datetime
 
-from sqlalchemy import TEXT
+from sqlalchemy import TEXT, Integer, and_, case, column, func, not_, text, values
 
 from app import db
 
 
 class UrlData(db.Model):
     __tablename__ = 'url_data'
+    __table_args__ = (
+        # 设备增量同步按机器查询 updated_at 之后的变更
+        db.Index('idx_url_data_config_updated_at', 'config_id', 'updated_at'),
+        # 机器相关接口按 config_id 过滤 is_active / is_running
+        db.Index('idx_url_data_config_active_running', 'config_id', 'is_active', 'is_running'),
+        # 标签接口按 label 过滤，可选 config_id
+        db.Index('idx_url_data_label_config', 'label', 'config_id'),
+        # 启用/可执行/运行中三个子集的部分索引，计数可以只扫描索引
+        db.Index('idx_url_data_active_by_config', 'config_id', postgresql_where=text('is_active')),
+        db.Index('idx_url_data_available_by_config', 'config_id',
+                 postgresql_where=text('is_active AND NOT is_exhausted')),
+        db.Index('idx_url_data_running_by_config', 'config_id', postgresql_where=text('is_running')),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     config_id = db.Column(db.Integer, db.ForeignKey('config_data.id', ondelete='CASCADE'))
@@ -16,6 +29,9 @@ class UrlData(db.Model):
     last_time = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now())
     max_num = db.Column(db.Integer, nullable=False, default=3)
     current_count = db.Column(db.Integer, default=0)
+    # 数据库生成列：执行次数是否已达上限，等价于 NOT can_execute()
+    is_exhausted = db.Column(db.Boolean, db.Computed('COALESCE(current_count, 0) >= max_num', persisted=True),
+                             nullable=False)
     is_active = db.Column(db.Boolean, default=True)
 
     is_running = db.Column(db.Boolean, default=False)
@@ -23,7 +39,7 @@ class UrlData(db.Model):
     stopped_at = db.Column(db.DateTime, nullable=True)
 
     created_at = db.Column(db.DateTime, default=datetime.datetime.now())
-    updated_at = db.Column(db.DateTime, default=datetime.datetime.now())
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now)
     status = db.Column(TEXT, nullable=True, default='')
     label = db.Column(TEXT, nullable=True, default='')
 
@@ -48,6 +64,18 @@ class UrlData(db.Model):
             'status': self.status or '',
         }
 
+    def to_delta(self, *fields):
+        """只序列化指定列，键名和取值格式与 to_dict 一致，用于实时增量推送"""
+        changes = {}
+        for field in fields:
+            value = getattr(self, field)
+            if isinstance(value, datetime.datetime):
+                value = value.isoformat()
+            elif field in ('label', 'status'):
+                value = value or ''
+            changes['Last_time' if field == 'last_time' else field] = value
+        return changes
+
     def can_execute(self):
         return self.current_count < self.max_num
 
@@ -65,6 +93,87 @@ class UrlData(db.Model):
             return True
         return False
 
+    @classmethod
+    def execute_atomic(cls, url_id: int):
+        """在数据库端原子地增加执行次数，返回更新后的行（未持久化到会话的对象）
+
+        等价于 start_running() + execute()：未运行时开始运行，达到最大次数时自动停止。
+        已达上限或不存在时返回 None，不会出现并发下计数超过 max_num 的情况。
+        """
+        table = cls.__table__
+        now = datetime.datetime.now()
+        reached_max = table.c.current_count + 1 >= table.c.max_num
+        statement = (
+            table.update()
+            .where(table.c.id == url_id, table.c.current_count < table.c.max_num)
+            .values(
+                current_count=table.c.current_count + 1,
+                updated_at=now,
+                is_running=case(
+                    (reached_max, False),
+                    (table.c.is_active.is_(True), True),
+                    else_=table.c.is_running,
+                ),
+                started_at=case(
+                    (and_(not_(table.c.is_running.is_(True)), table.c.is_active.is_(True),
+                          table.c.stopped_at.is_(None)), now),
+                    else_=table.c.started_at,
+                ),
+                stopped_at=case((reached_max, now), else_=table.c.stopped_at),
+            )
+            .returning(*table.c)
+            .execution_options(config_cache_tracked=True)
+        )
+        row = db.session.execute(statement).mappings().first()
+        if not row:
+            return None
+
+        from app.services.config_cache import config_cache
+        config_cache.mark_changed(db.session, [row['config_id']])
+        return cls(**row)
+
+    @classmethod
+    def bulk_update_field(cls, field: str, updates: dict, chunk_size: int = 1000) -> dict:
+        """用 UPDATE ... FROM (VALUES ...) 批量更新 status/label，返回 {url_id: {'name', 'config_id'}}，不存在的ID不在结果中"""
+        if field not in ('status', 'label'):
+            raise ValueError(f'Unsupported bulk update field: {field}')
+        table = cls.__table__
+        now = datetime.datetime.now()
+        items = list(updates.items())
+        updated = {}
+        for start in range(0, len(items), chunk_size):
+            rows = values(column('id', Integer), column('value', TEXT), name='new_values').data(
+                items[start:start + chunk_size]
+            )
+            statement = (
+                table.update()
+                .where(table.c.id == rows.c.id)
+                .values({field: rows.c.value, 'updated_at': now})
+                .returning(table.c.id, table.c.name, table.c.config_id)
+                .execution_options(config_cache_tracked=True)
+            )
+            for row in db.session.execute(statement).mappings():
+                updated[row['id']] = {'name': row['name'], 'config_id': row['config_id']}
+
+        from app.services.config_cache import config_cache
+        config_cache.mark_changed(db.session, {row['config_id'] for row in updated.values()})
+        return updated
+
+    @classmethod
+    def summarize(cls, config_id: int) -> dict:
+        """一条聚合查询统计机器下URL的数量和执行次数，执行次数只统计启用的URL"""
+        active = cls.is_active == True
+        row = db.session.query(
+            func.count(cls.id).label('total'),
+            func.count(cls.id).filter(active).label('active'),
+            func.count(cls.id).filter(active, cls.is_exhausted == False).label('available'),
+            func.count(cls.id).filter(active, cls.is_exhausted == True).label('completed'),
+            func.count(cls.id).filter(active, cls.is_running == True).label('running'),
+            func.coalesce(func.sum(cls.current_count).filter(active), 0).label('total_executions'),
+            func.coalesce(func.sum(cls.max_num).filter(active), 0).label('max_possible_executions'),
+        ).filter(cls.config_id == config_id).one()
+        return dict(row._mapping)
+
     def start_running(self):
         """开始运行状态"""
         if self.can_execute() and self.is_active:
@@ -0,0 +1,35 @@
+import datetime
+
+from sqlalchemy import event
+
+from app import db
+from app.models.url_data import UrlData
+
+
+class UrlTombstone(db.Model):
+    """已删除URL的墓碑记录，供设备增量同步时移除本地数据"""
+    __tablename__ = 'url_tombstones'
+    __table_args__ = (
+        db.Index('idx_url_tombstones_config_deleted_at', 'config_id', 'deleted_at'),
+        db.Index('idx_url_tombstones_deleted_at', 'deleted_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    url_id = db.Column(db.Integer, nullable=False)
+    config_id = db.Column(db.Integer, nullable=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now)
+
+    @classmethod
+    def purge_before(cls, cutoff: datetime.datetime) -> int:
+        """删除早于 cutoff 的墓碑，返回删除条数"""
+        return cls.query.filter(cls.deleted_at < cutoff).delete(synchronize_session=False)
+
+
+@event.listens_for(UrlData, 'after_delete')
+def _record_tombstone(mapper, connection, target):
+    """ORM 删除URL（包括随机器级联删除）时写入墓碑"""
+    connection.execute(UrlTombstone.__table__.insert().values(
+        url_id=target.id,
+        config_id=target.config_id,
+        deleted_at=datetime.datetime.now()
+    ))
@@ -1,4 +1,12 @@
 from .cleanup_scheduler import cleanup_scheduler
+from .config_cache import config_cache
+from .dashboard_channel import dashboard_rooms
+from .deferred_actions import deferred_actions
+from .device_channel import device_push
+from .fleet_orchestrator import fleet_orchestrator
+from .url_events import url_events
+from .write_behind import write_behind
 
 
-__all__ = ['cleanup_scheduler']
\ No newline at end of file
+__all__ = ['cleanup_scheduler', 'config_cache', 'dashboard_rooms', 'deferred_actions', 'device_push', 'fleet_orchestrator',
+           'url_events', 'write_behind']
@@ -8,6 +8,7 @@ from loguru import logger
 from app import db
 from app.models import ConfigData
 from app.models.cleanup_task import CleanupTask
+from app.services.config_delta import purge_tombstones
 
 
 def _execute_task(task: CleanupTask):
@@ -118,6 +119,15 @@ class CleanupScheduler:
                 except Exception as e:
                     logger.error(f"执行清理任务 {task.name} 失败: {e}")
 
+            try:
+                purged = purge_tombstones()
+                db.session.commit()
+                if purged:
+                    logger.info(f"已清理 {purged} 条过期的URL墓碑记录")
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"清理URL墓碑记录失败: {e}")
+
 
 # 创建全局实例
 cleanup_scheduler = CleanupScheduler()
\ No newline at end of file
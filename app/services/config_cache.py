@@ -0,0 +1,196 @@
+import itertools
+import json
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+from sqlalchemy import event, inspect
+
+_PENDING_KEY = 'config_cache_pending'
+ALL = '*'
+_TRACKED_TABLES = {'config_data', 'url_data'}
+
+
+class _Entry:
+    __slots__ = ('config_id', 'version', 'etag', 'payload', 'body')
+
+    def __init__(self, config_id: int, version: int, etag: str, payload: Dict[str, Any], body: bytes):
+        self.config_id = config_id
+        self.version = version
+        self.etag = etag
+        self.payload = payload
+        self.body = body
+
+
+class ConfigCache:
+    """设备配置缓存 - 按机器维护版本号，ConfigData/UrlData 提交后版本递增并作废缓存
+
+    ORM 提交通过会话事件自动追踪；直接执行的 UPDATE 语句需要调用 mark_changed，
+    并带上执行选项 config_cache_tracked=True，否则保守地作废全部缓存。
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self._lock = threading.Lock()
+        self._boot_id = uuid.uuid4().hex[:8]
+        self._counter = itertools.count(1)
+        self._latest_version = 0
+        self._base_version = 0
+        self._versions: Dict[int, int] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self._listeners: List[Callable[[Set[Any]], None]] = []
+        self._listening = False
+
+        self._hits = 0
+        self._misses = 0
+        self._not_modified = 0
+        self._invalidations = 0
+        self._full_invalidations = 0
+
+    def init_app(self, app):
+        """初始化应用并注册会话事件"""
+        self.app = app
+        if self._listening:
+            return
+        from app import db
+        event.listen(db.session, 'after_flush', self._after_flush)
+        event.listen(db.session, 'do_orm_execute', self._on_execute)
+        event.listen(db.session, 'after_commit', self._after_commit)
+        event.listen(db.session, 'after_rollback', self._after_rollback)
+        self._listening = True
+
+    # ---- 变更追踪 ----
+
+    @staticmethod
+    def mark_changed(session, config_ids: Iterable[Optional[int]]):
+        """记录本事务修改过的机器，提交后生效"""
+        pending = session.info.setdefault(_PENDING_KEY, set())
+        pending.update(config_id for config_id in config_ids if config_id is not None)
+
+    def _after_flush(self, session, flush_context):
+        from app.models import ConfigData, UrlData
+        changed = set()
+        for obj in itertools.chain(session.new, session.dirty, session.deleted):
+            if isinstance(obj, ConfigData):
+                changed.add(obj.id)
+            elif isinstance(obj, UrlData):
+                changed.add(obj.config_id)
+                # 迁移到其他机器时旧机器也需要作废
+                changed.update(inspect(obj).attrs.config_id.history.deleted or ())
+        self.mark_changed(session, changed)
+
+    def _on_execute(self, orm_execute_state):
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        if orm_execute_state.execution_options.get('config_cache_tracked'):
+            return
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if getattr(table, 'name', None) in _TRACKED_TABLES:
+            orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(ALL)
+
+    def _after_commit(self, session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            self.invalidate(pending)
+
+    @staticmethod
+    def _after_rollback(session):
+        session.info.pop(_PENDING_KEY, None)
+
+    def add_listener(self, callback: Callable[[Set[Any]], None]):
+        """注册变更监听器，参数为变更的机器ID集合（包含 ALL 表示全部）"""
+        self._listeners.append(callback)
+
+    def invalidate(self, config_ids: Iterable[Any]):
+        """递增机器版本号，ALL 表示作废全部"""
+        config_ids = set(config_ids)
+        with self._lock:
+            if ALL in config_ids:
+                self._base_version = self._latest_version = next(self._counter)
+                self._versions.clear()
+                self._entries.clear()
+                self._full_invalidations += 1
+            else:
+                for config_id in config_ids:
+                    self._versions[config_id] = self._latest_version = next(self._counter)
+                self._invalidations += len(config_ids)
+
+        for callback in self._listeners:
+            try:
+                callback(config_ids)
+            except Exception as e:
+                logger.error(f"配置变更监听器执行失败: {e}")
+
+    # ---- 读取 ----
+
+    def snapshot(self) -> int:
+        """当前最新版本号，查询数据库之前获取，作为新缓存项的版本"""
+        with self._lock:
+            return self._latest_version
+
+    def _version_of(self, config_id: int) -> int:
+        return max(self._versions.get(config_id, 0), self._base_version)
+
+    def make_etag(self, config_id: int, version: int) -> str:
+        return f'{self._boot_id}-{config_id}-{version}'
+
+    def get(self, pade_code: str) -> Optional[_Entry]:
+        """返回仍然有效的缓存项"""
+        with self._lock:
+            entry = self._entries.get(pade_code)
+            if entry and self._version_of(entry.config_id) <= entry.version:
+                self._hits += 1
+                return entry
+            self._misses += 1
+            return None
+
+    def put(self, pade_code: str, config_id: int, version: int, payload: Dict[str, Any]) -> _Entry:
+        """缓存响应体；version 取自查询前的 snapshot()，查询期间发生的变更会使该项立即失效"""
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode()
+        entry = _Entry(config_id, version, self.make_etag(config_id, version), payload, body)
+        with self._lock:
+            self._entries[pade_code] = entry
+        return entry
+
+    def load(self, pade_code: str) -> Optional[_Entry]:
+        """获取设备配置，缓存失效时从数据库重建；机器不存在时返回 None"""
+        entry = self.get(pade_code)
+        if entry is not None:
+            return entry
+
+        from app.models import ConfigData, UrlData
+        # 先取版本号再查库，查询期间的变更会让这份缓存立即失效
+        version = self.snapshot()
+        config = ConfigData.query.filter_by(pade_code=pade_code).first()
+        if not config:
+            return None
+
+        urls = UrlData.query.filter_by(config_id=config.id, is_active=True).order_by(UrlData.id).all()
+        return self.put(pade_code, config.id, version, {
+            'success_time': [config.success_time_min, config.success_time_max],
+            'reset_time': config.reset_time,
+            'message': config.message,
+            'urldata': [url.to_dict() for url in urls]
+        })
+
+    def record_not_modified(self):
+        with self._lock:
+            self._not_modified += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'not_modified': self._not_modified,
+                'invalidations': self._invalidations,
+                'full_invalidations': self._full_invalidations,
+            }
+
+
+# 创建全局实例
+config_cache = ConfigCache()
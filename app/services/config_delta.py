@@ -0,0 +1,90 @@
+import datetime
+from typing import Any, Dict, Optional
+
+from app.models import ConfigData, UrlData, UrlTombstone
+from app.utils.dynamic_config import get_setting
+
+# 增量同步默认配置（SystemConfig 中没有对应项时使用）
+DEFAULT_DELTA_SETTINGS = {
+    'DELTA_MAX_CHANGES': 500,
+    'DELTA_TOMBSTONE_RETENTION_HOURS': 168,
+    'DELTA_OVERLAP_SECONDS': 30,
+}
+
+
+def _get_setting(key: str) -> float:
+    """动态获取增量同步配置"""
+    return get_setting(key, DEFAULT_DELTA_SETTINGS[key], float)
+
+
+def parse_since(value: Optional[str]) -> Optional[datetime.datetime]:
+    """解析设备上次同步的游标，支持ISO时间或毫秒时间戳；无法解析时返回 None（完整同步）
+
+    数据库中的时间都是不带时区的本地时间，带时区的游标先转换为本地时间再去掉时区。
+    """
+    if not value:
+        return None
+    try:
+        if value.isdigit():
+            return datetime.datetime.fromtimestamp(int(value) / 1000)
+        since = datetime.datetime.fromisoformat(value)
+        if since.tzinfo is not None:
+            since = since.astimezone().replace(tzinfo=None)
+        return since
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def config_header(config: ConfigData) -> Dict[str, Any]:
+    return {
+        'success_time': [config.success_time_min, config.success_time_max],
+        'reset_time': config.reset_time,
+        'message': config.message,
+    }
+
+
+def build_sync(config: ConfigData, since: Optional[datetime.datetime]) -> Dict[str, Any]:
+    """返回 since 之后新增/修改/停用/删除的URL；差距过大或变更过多时返回完整快照
+
+    游标比查询开始时间提前 DELTA_OVERLAP_SECONDS，覆盖查询时尚未提交的事务，
+    设备按 id 覆盖即可，重复下发不影响结果。
+    """
+    now = datetime.datetime.now()
+    cursor = now - datetime.timedelta(seconds=_get_setting('DELTA_OVERLAP_SECONDS'))
+    retention = datetime.timedelta(hours=_get_setting('DELTA_TOMBSTONE_RETENTION_HOURS'))
+    max_changes = int(_get_setting('DELTA_MAX_CHANGES'))
+    payload = config_header(config)
+    payload['cursor'] = cursor.isoformat()
+
+    if since is not None and since >= now - retention:
+        changed = UrlData.query.filter(
+            UrlData.config_id == config.id,
+            UrlData.updated_at > since
+        ).order_by(UrlData.id).limit(max_changes + 1).all()
+
+        if len(changed) <= max_changes:
+            tombstones = UrlTombstone.query.with_entities(UrlTombstone.url_id).filter(
+                UrlTombstone.config_id == config.id,
+                UrlTombstone.deleted_at > since
+            ).all()
+            payload.update({
+                'mode': 'delta',
+                'since': since.isoformat(),
+                'changed': [url.to_dict() for url in changed if url.is_active],
+                'removed': sorted({url.id for url in changed if not url.is_active} |
+                                  {row.url_id for row in tombstones}),
+            })
+            return payload
+
+    urls = UrlData.query.filter_by(config_id=config.id, is_active=True).order_by(UrlData.id).all()
+    payload.update({
+        'mode': 'full',
+        'urldata': [url.to_dict() for url in urls],
+    })
+    return payload
+
+
+def purge_tombstones() -> int:
+    """清理超过保留期的墓碑，超过保留期的设备会收到完整快照"""
+    retention = datetime.timedelta(hours=_get_setting('DELTA_TOMBSTONE_RETENTION_HOURS'))
+    return UrlTombstone.purge_before(datetime.datetime.now() - retention)
@@ -0,0 +1,203 @@
+import threading
+from typing import Any, Dict, Iterable, Optional, Set
+
+from flask import request, session
+from flask_socketio import Namespace, join_room, leave_room
+from loguru import logger
+
+DASHBOARD_NAMESPACE = '/'
+
+# 所有仪表盘都加入的房间：机器列表状态、批量启动进度等全局事件
+FLEET_ROOM = 'fleet'
+
+# 单个连接最多同时关注的机器数
+MAX_WATCHED_CONFIGS = 50
+
+
+def config_room(config_id: int) -> str:
+    return f'config:{config_id}'
+
+
+def user_room(user_id: int) -> str:
+    return f'user:{user_id}'
+
+
+class DashboardRooms:
+    """仪表盘推送房间 - 仪表盘按当前打开的机器加入 config:<id> 房间，URL 级事件只推送给关注该机器的连接
+
+    机器级事件（machine_info_update）推送到 fleet 房间；只和发起人有关的事件（fleet_start_progress）
+    推送到发起人的 user:<id> 房间。
+    同时统计实际送达次数和广播模式下的送达次数，用于观察推送量的减少。
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self._lock = threading.Lock()
+        # sid -> {config_id}
+        self._sessions: Dict[str, Set[int]] = {}
+        # config_id -> {sid}
+        self._rooms: Dict[int, Set[str]] = {}
+        # user_id -> {sid}
+        self._users: Dict[int, Set[str]] = {}
+        # sid -> user_id
+        self._session_users: Dict[str, int] = {}
+
+        self._connects = 0
+        self._rejected = 0
+        self._frames = 0
+        self._deliveries = 0
+        self._broadcast_deliveries = 0
+
+    def init_app(self, app):
+        """初始化应用，注册仪表盘命名空间"""
+        self.app = app
+        from app import socketio
+        socketio.on_namespace(DashboardNamespace(DASHBOARD_NAMESPACE))
+
+    # ---- 连接管理 ----
+
+    def register(self, sid: str, user_id: Optional[int] = None):
+        with self._lock:
+            self._sessions[sid] = set()
+            if user_id is not None:
+                self._session_users[sid] = user_id
+                self._users.setdefault(user_id, set()).add(sid)
+            self._connects += 1
+
+    def unregister(self, sid: str):
+        with self._lock:
+            config_ids = self._sessions.pop(sid, None) or set()
+            for config_id in config_ids:
+                self._discard(config_id, sid)
+            user_id = self._session_users.pop(sid, None)
+            sids = self._users.get(user_id)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self._users[user_id]
+
+    def record_rejected(self):
+        with self._lock:
+            self._rejected += 1
+
+    def watch(self, sid: str, config_ids: Set[int]):
+        """更新连接关注的机器，返回 (需要加入的机器, 需要离开的机器)"""
+        with self._lock:
+            current = self._sessions.get(sid)
+            if current is None:
+                return set(), set()
+            joined, left = config_ids - current, current - config_ids
+            for config_id in joined:
+                self._rooms.setdefault(config_id, set()).add(sid)
+            for config_id in left:
+                self._discard(config_id, sid)
+            self._sessions[sid] = set(config_ids)
+            return joined, left
+
+    def _discard(self, config_id: int, sid: str):
+        sids = self._rooms.get(config_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._rooms[config_id]
+
+    # ---- 推送 ----
+
+    def emit_config(self, event: str, config_id: Optional[int], data: Dict[str, Any]):
+        """推送给正在查看该机器的仪表盘"""
+        if config_id is None:
+            return
+        self.emit_configs(event, [config_id], data)
+
+    def emit_configs(self, event: str, config_ids: Iterable[int], data: Dict[str, Any]):
+        """推送给查看其中任一机器的仪表盘，同时关注多台的连接只收到一次"""
+        config_ids = [config_id for config_id in config_ids if config_id is not None]
+        if not config_ids:
+            return
+        with self._lock:
+            recipients = set()
+            for config_id in config_ids:
+                recipients |= self._rooms.get(config_id, set())
+            self._record(len(recipients))
+        if not recipients:
+            return
+
+        from app import socketio
+        socketio.emit(event, data, to=[config_room(config_id) for config_id in config_ids],
+                      namespace=DASHBOARD_NAMESPACE)
+
+    def emit_user(self, event: str, user_id: Optional[int], data: Dict[str, Any]):
+        """推送给该用户打开的所有仪表盘"""
+        if user_id is None:
+            return
+        with self._lock:
+            recipients = len(self._users.get(user_id, ()))
+            self._record(recipients)
+        if not recipients:
+            return
+        from app import socketio
+        socketio.emit(event, data, to=user_room(user_id), namespace=DASHBOARD_NAMESPACE)
+
+    def emit_fleet(self, event: str, data: Dict[str, Any]):
+        """推送给所有已登录的仪表盘"""
+        with self._lock:
+            self._record(len(self._sessions))
+        from app import socketio
+        socketio.emit(event, data, to=FLEET_ROOM, namespace=DASHBOARD_NAMESPACE)
+
+    def _record(self, recipients: int):
+        self._frames += 1
+        self._deliveries += recipients
+        self._broadcast_deliveries += len(self._sessions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            saved = self._broadcast_deliveries - self._deliveries
+            return {
+                'connections': len(self._sessions),
+                'watched_configs': len(self._rooms),
+                'connects': self._connects,
+                'rejected': self._rejected,
+                'frames': self._frames,
+                'deliveries': self._deliveries,
+                'broadcast_deliveries': self._broadcast_deliveries,
+                'saved_pct': round(saved / self._broadcast_deliveries * 100, 1) if self._broadcast_deliveries else 0.0,
+            }
+
+
+class DashboardNamespace(Namespace):
+    """仪表盘连接：需要已登录的会话，连接后通过 watch_configs 声明当前打开的机器"""
+
+    def on_connect(self, auth=None):
+        if 'user_id' not in session:
+            dashboard_rooms.record_rejected()
+            raise ConnectionRefusedError('Authentication required')
+
+        join_room(FLEET_ROOM)
+        join_room(user_room(session['user_id']))
+        dashboard_rooms.register(request.sid, session['user_id'])
+
+    def on_disconnect(self, *args):
+        dashboard_rooms.unregister(request.sid)
+
+    def on_watch_configs(self, data=None):
+        """{"config_ids": [...]}，替换当前关注的机器"""
+        raw = data.get('config_ids') if isinstance(data, dict) else None
+        try:
+            config_ids = {int(config_id) for config_id in raw or []}
+        except (TypeError, ValueError):
+            return {'error': 'Invalid config_ids'}
+        if len(config_ids) > MAX_WATCHED_CONFIGS:
+            return {'error': f'At most {MAX_WATCHED_CONFIGS} configs can be watched'}
+
+        joined, left = dashboard_rooms.watch(request.sid, config_ids)
+        for config_id in left:
+            leave_room(config_room(config_id))
+        for config_id in joined:
+            join_room(config_room(config_id))
+        logger.debug(f"仪表盘 {request.sid} 关注机器 {sorted(config_ids)}")
+        return {'config_ids': sorted(config_ids)}
+
+
+# 创建全局实例
+dashboard_rooms = DashboardRooms()
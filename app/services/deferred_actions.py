@@ -0,0 +1,169 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+class _Timer:
+    __slots__ = ('timer_id', 'name', 'due', 'rounds', 'callback', 'args', 'kwargs', 'cancelled')
+
+    def __init__(self, timer_id: int, name: str, due: float, rounds: int,
+                 callback: Callable, args: tuple, kwargs: dict):
+        self.timer_id = timer_id
+        self.name = name
+        self.due = due
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+
+
+class DeferredActionService:
+    """延迟动作服务 - 基于时间轮的进程内定时器，替代请求处理中的阻塞 sleep
+
+    时间轮每 tick 前进一格，超过一圈的定时器用 rounds 记录剩余圈数；
+    到期的回调交给工作线程池在应用上下文中执行，不阻塞时间轮。
+    """
+
+    def __init__(self, app=None, tick: float = 0.1, slots: int = 512, workers: int = 8):
+        self.app = app
+        self._tick = tick
+        self._slots: List[List[_Timer]] = [[] for _ in range(slots)]
+        self._workers = workers
+        self._timers: Dict[int, _Timer] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._current_tick = 0
+        self._started_at = 0.0
+        self._running = False
+        self._thread = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self._fired = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._lateness_total = 0.0
+        self._lateness_max = 0.0
+
+    def init_app(self, app):
+        """初始化应用"""
+        self.app = app
+
+    def start(self):
+        """启动时间轮"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._started_at = time.monotonic()
+            self._current_tick = 0
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='deferred')
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        logger.info("延迟动作服务已启动")
+
+    def stop(self):
+        """停止时间轮，已到期的回调会执行完毕"""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        logger.info("延迟动作服务已停止")
+
+    def schedule(self, delay: float, callback: Callable, *args, name: str = '', **kwargs) -> int:
+        """在 delay 秒后执行回调，返回定时器ID"""
+        if not self._running:
+            self.start()
+
+        with self._lock:
+            ticks = max(int(-(-delay // self._tick)), 1)
+            target_tick = self._current_tick + ticks
+            timer = _Timer(
+                timer_id=next(self._ids),
+                name=name or getattr(callback, '__name__', 'action'),
+                due=time.monotonic() + delay,
+                rounds=(ticks - 1) // len(self._slots),
+                callback=callback,
+                args=args,
+                kwargs=kwargs,
+            )
+            self._slots[target_tick % len(self._slots)].append(timer)
+            self._timers[timer.timer_id] = timer
+        return timer.timer_id
+
+    def cancel(self, timer_id: int) -> bool:
+        """取消尚未到期的定时器"""
+        with self._lock:
+            timer = self._timers.pop(timer_id, None)
+            if timer is None:
+                return False
+            timer.cancelled = True
+            self._cancelled += 1
+            return True
+
+    def _run(self):
+        """时间轮主循环：按绝对时间推进，落后时连续补齐 tick"""
+        while self._running:
+            next_deadline = self._started_at + (self._current_tick + 1) * self._tick
+            wait = next_deadline - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            with self._lock:
+                self._current_tick += 1
+                slot = self._slots[self._current_tick % len(self._slots)]
+                due, pending = [], []
+                for timer in slot:
+                    if timer.cancelled:
+                        continue
+                    if timer.rounds > 0:
+                        timer.rounds -= 1
+                        pending.append(timer)
+                    else:
+                        due.append(timer)
+                        self._timers.pop(timer.timer_id, None)
+                slot[:] = pending
+
+            for timer in due:
+                self._executor.submit(self._fire, timer)
+
+    def _fire(self, timer: _Timer):
+        lateness = max(time.monotonic() - timer.due, 0.0)
+        with self._lock:
+            self._fired += 1
+            self._lateness_total += lateness
+            self._lateness_max = max(self._lateness_max, lateness)
+
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    timer.callback(*timer.args, **timer.kwargs)
+            else:
+                timer.callback(*timer.args, **timer.kwargs)
+        except Exception as e:
+            with self._lock:
+                self._failed += 1
+            logger.error(f"延迟动作 {timer.name} 执行失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列深度与延迟统计"""
+        with self._lock:
+            return {
+                'running': self._running,
+                'queue_depth': len(self._timers),
+                'fired': self._fired,
+                'failed': self._failed,
+                'cancelled': self._cancelled,
+                'lateness_avg_ms': round(self._lateness_total / self._fired * 1000, 2) if self._fired else 0.0,
+                'lateness_max_ms': round(self._lateness_max * 1000, 2),
+                'tick_ms': self._tick * 1000,
+            }
+
+
+# 创建全局实例
+deferred_actions = DeferredActionService()
@@ -0,0 +1,194 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from flask import request
+from flask_socketio import Namespace, emit, join_room
+from loguru import logger
+
+from app.services.config_cache import ALL, config_cache
+from app.utils.dynamic_config import get_setting
+
+DEVICE_NAMESPACE = '/device'
+
+# 推送间隔：同一机器在间隔内的多次变更合并为一次推送
+DEFAULT_PUSH_INTERVAL = 0.2
+
+
+def _room(config_id: int) -> str:
+    return f'config:{config_id}'
+
+
+class DevicePushService:
+    """设备配置推送 - 设备按 pade_code 加入房间，配置提交后把最新配置推送到对应房间
+
+    变更来自 config_cache 的失效通知，推送线程按固定间隔合并同一机器的多次变更。
+    """
+
+    def __init__(self, app=None, interval: float = DEFAULT_PUSH_INTERVAL):
+        self.app = app
+        self._interval = interval
+        self._lock = threading.Lock()
+        # sid -> (config_id, pade_code)
+        self._sessions: Dict[str, Tuple[int, str]] = {}
+        # config_id -> {sid}
+        self._rooms: Dict[int, Set[str]] = {}
+        # config_id -> 首次标记变更的时间
+        self._pending: Dict[int, float] = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._connects = 0
+        self._disconnects = 0
+        self._rejected = 0
+        self._pushes = 0
+        self._push_failures = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def init_app(self, app):
+        """初始化应用，注册设备命名空间并订阅配置变更"""
+        self.app = app
+        from app import socketio
+        socketio.on_namespace(DeviceNamespace(DEVICE_NAMESPACE))
+        config_cache.add_listener(self.on_configs_changed)
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        logger.info("设备配置推送已启动")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        logger.info("设备配置推送已停止")
+
+    # ---- 连接管理 ----
+
+    def register(self, sid: str, config_id: int, pade_code: str):
+        with self._lock:
+            self._sessions[sid] = (config_id, pade_code)
+            self._rooms.setdefault(config_id, set()).add(sid)
+            self._connects += 1
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+
+    def unregister(self, sid: str):
+        with self._lock:
+            session = self._sessions.pop(sid, None)
+            if session is None:
+                return
+            self._disconnects += 1
+            sids = self._rooms.get(session[0])
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self._rooms[session[0]]
+
+    def record_rejected(self):
+        with self._lock:
+            self._rejected += 1
+
+    # ---- 推送 ----
+
+    def on_configs_changed(self, config_ids: Set[Any]):
+        """配置提交后的回调，只记录有设备在线的机器"""
+        now = time.monotonic()
+        with self._lock:
+            targets = self._rooms.keys() if ALL in config_ids else config_ids & self._rooms.keys()
+            for config_id in targets:
+                self._pending.setdefault(config_id, now)
+
+    def _pade_code_of(self, config_id: int) -> Optional[str]:
+        with self._lock:
+            for sid in self._rooms.get(config_id, ()):
+                return self._sessions[sid][1]
+        return None
+
+    def push_pending(self):
+        """推送所有待推送的机器配置"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        from app import socketio
+        with self.app.app_context():
+            for config_id, marked_at in pending.items():
+                pade_code = self._pade_code_of(config_id)
+                if pade_code is None:
+                    continue
+                try:
+                    entry = config_cache.load(pade_code)
+                    if entry is None:
+                        continue
+                    socketio.emit('config_update', {'etag': entry.etag, 'config': entry.payload},
+                                  to=_room(config_id), namespace=DEVICE_NAMESPACE)
+                except Exception as e:
+                    with self._lock:
+                        self._push_failures += 1
+                    logger.error(f"推送机器 {config_id} 配置失败: {e}")
+                    continue
+
+                latency = time.monotonic() - marked_at
+                with self._lock:
+                    self._pushes += 1
+                    self._latency_total += latency
+                    self._latency_max = max(self._latency_max, latency)
+
+    def _run(self):
+        while not self._stop_event.wait(self._interval):
+            try:
+                self.push_pending()
+            except Exception as e:
+                logger.error(f"设备配置推送异常: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'connections': len(self._sessions),
+                'rooms': len(self._rooms),
+                'connects': self._connects,
+                'disconnects': self._disconnects,
+                'rejected': self._rejected,
+                'pending': len(self._pending),
+                'pushes': self._pushes,
+                'push_failures': self._push_failures,
+                'push_latency_avg_ms': round(self._latency_total / self._pushes * 1000, 2) if self._pushes else 0.0,
+                'push_latency_max_ms': round(self._latency_max * 1000, 2),
+            }
+
+
+class DeviceNamespace(Namespace):
+    """设备长连接：connect 时携带 {"token", "pade_code"}，也支持查询参数"""
+
+    def on_connect(self, auth=None):
+        auth = auth if isinstance(auth, dict) else {}
+        token = auth.get('token') or request.args.get('token')
+        pade_code = auth.get('pade_code') or request.args.get('pade_code')
+
+        if not token or token != get_setting('API_SECRET_TOKEN'):
+            device_push.record_rejected()
+            raise ConnectionRefusedError('Invalid token')
+
+        entry = config_cache.load(pade_code) if pade_code else None
+        if entry is None:
+            device_push.record_rejected()
+            raise ConnectionRefusedError('Config not found')
+
+        join_room(_room(entry.config_id))
+        device_push.register(request.sid, entry.config_id, pade_code)
+        # 连接后立即下发一次当前配置
+        emit('config_update', {'etag': entry.etag, 'config': entry.payload})
+
+    def on_disconnect(self, *args):
+        device_push.unregister(request.sid)
+
+
+# 创建全局实例
+device_push = DevicePushService()
@@ -0,0 +1,157 @@
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select
+
+from app import db
+from app.models import UrlData
+from app.services.config_cache import config_cache
+from app.services.dashboard_channel import dashboard_rooms
+from app.services.url_events import url_delta
+from app.services.write_behind import BUFFERED_FIELDS, write_behind
+
+EVENT_TYPES = {'execute', 'status', 'label', 'last_time', 'running_status'}
+
+# 批量上报可能修改的列
+_MUTABLE_COLUMNS = ['current_count', 'is_running', 'started_at', 'stopped_at', 'status', 'label', 'last_time',
+                    'updated_at']
+
+# 推送给仪表盘的增量字段（updated_at 前端不使用）
+_DELTA_COLUMNS = [column for column in _MUTABLE_COLUMNS if column != 'updated_at']
+
+
+def _parse_event(event: Any) -> Tuple[Optional[int], Optional[str]]:
+    """校验单条事件，返回 (url_id, 错误信息)"""
+    if not isinstance(event, dict):
+        return None, 'Invalid event'
+    try:
+        url_id = int(event.get('url_id'))
+    except (TypeError, ValueError):
+        return None, 'Invalid url_id format'
+    event_type = event.get('type')
+    if event_type not in EVENT_TYPES:
+        return url_id, f'Unknown event type: {event_type}'
+    if event_type in ('status', 'label', 'last_time', 'running_status') and 'value' not in event:
+        return url_id, 'Missing value'
+    return url_id, None
+
+
+def _parse_datetime(value: Any) -> datetime.datetime:
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(str(value))
+
+
+def _apply(url: UrlData, event: Dict[str, Any]) -> Tuple[bool, bool, str, Dict[str, Any]]:
+    """在内存中的 UrlData 上应用一条事件，规则与单条接口一致
+
+    返回 (是否成功, 是否修改了行, 消息, 附加字段)。
+    """
+    event_type = event['type']
+    value = event.get('value')
+
+    if event_type == 'execute':
+        if not url.can_execute():
+            return False, False, 'URL has reached maximum execution count', {
+                'current_count': url.current_count, 'max_num': url.max_num
+            }
+        if not url.is_running:
+            url.start_running()
+        url.execute()
+        return True, True, 'executed', {
+            'current_count': url.current_count, 'remaining': url.max_num - url.current_count
+        }
+
+    if event_type == 'status':
+        url.status = value
+    elif event_type == 'label':
+        url.label = value
+    elif event_type == 'last_time':
+        url.last_time = _parse_datetime(value)
+    elif event_type == 'running_status':
+        changed = url.start_running() if bool(value) else url.stop_running()
+        return True, changed, 'running status changed' if changed else 'running status unchanged', {
+            'is_running': url.is_running
+        }
+    url.updated_at = datetime.datetime.now()
+    return True, True, f'{event_type} updated', {}
+
+
+def apply_report(events: List[Any]) -> Dict[str, Any]:
+    """在一个事务中应用一批设备上报事件
+
+    一次 SELECT ... FOR UPDATE 锁定涉及的全部行，按上报顺序在内存中应用事件，
+    再用一条 executemany UPDATE 写回有变化的行，最后推送一次汇总通知。
+    """
+    parsed = [_parse_event(event) for event in events]
+    url_ids = sorted({url_id for url_id, error in parsed if error is None})
+
+    # 本批次直接写入的状态/标签取代写回缓冲中更旧的值
+    for (url_id, error), event in zip(parsed, events):
+        if error is None and event['type'] in BUFFERED_FIELDS:
+            write_behind.discard([url_id], [event['type']])
+
+    table = UrlData.__table__
+    rows = {}
+    if url_ids:
+        # 按主键顺序加锁，避免并发批次之间死锁
+        statement = select(table).where(table.c.id.in_(url_ids)).order_by(table.c.id).with_for_update()
+        rows = {row['id']: UrlData(**row) for row in db.session.execute(statement).mappings()}
+
+    results = []
+    changed: Dict[int, UrlData] = {}
+    # 有标签变更的机器，只让这些机器的仪表盘重新加载标签统计
+    label_configs = set()
+    for event, (url_id, error) in zip(events, parsed):
+        if error is None and url_id not in rows:
+            error = 'URL not found'
+        if error is not None:
+            results.append({'url_id': url_id, 'status': 'error', 'message': error})
+            continue
+
+        url = rows[url_id]
+        try:
+            success, modified, message, extra = _apply(url, event)
+        except (TypeError, ValueError) as e:
+            success, modified, message, extra = False, False, f'Invalid value: {e}', {}
+        if modified:
+            changed[url_id] = url
+            if event['type'] == 'label':
+                label_configs.add(url.config_id)
+        results.append({
+            'url_id': url_id,
+            'type': event['type'],
+            'status': 'success' if success else 'error',
+            'message': message,
+            **extra
+        })
+
+    if changed:
+        statement = table.update().where(table.c.id == bindparam('b_id')).values(
+            {column: bindparam(f'b_{column}') for column in _MUTABLE_COLUMNS}
+        ).execution_options(config_cache_tracked=True)
+        db.session.execute(statement, [
+            {'b_id': url.id, **{f'b_{column}': getattr(url, column) for column in _MUTABLE_COLUMNS}}
+            for url in changed.values()
+        ])
+        config_cache.mark_changed(db.session, {url.config_id for url in changed.values()})
+    db.session.commit()
+
+    # 按机器拆分推送，只发给正在查看该机器的仪表盘
+    by_config: Dict[int, List[Dict[str, Any]]] = {}
+    for url in changed.values():
+        by_config.setdefault(url.config_id, []).append(url_delta(url, *_DELTA_COLUMNS))
+    for config_id, items in by_config.items():
+        dashboard_rooms.emit_config('urls_reported', config_id, {
+            'items': items,
+            'label_changed': config_id in label_configs,
+        })
+
+    succeeded = sum(1 for result in results if result['status'] == 'success')
+    return {
+        'total_events': len(events),
+        'succeeded': succeeded,
+        'failed': len(events) - succeeded,
+        'updated_urls': len(changed),
+        'results': results,
+    }
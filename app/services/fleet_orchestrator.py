@@ -0,0 +1,179 @@
+import datetime
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from app import db
+from app.services.dashboard_channel import dashboard_rooms
+from app.services.vmos_dispatcher import call_chunk, commit_running_state, get_batch_size, iter_chunks
+from app.utils.dynamic_config import get_setting
+from app.utils.vmos import open_root, start_app
+
+# 编排默认配置（SystemConfig 中没有对应项时使用）
+DEFAULT_FLEET_SETTINGS = {
+    'VMOS_FLEET_CONCURRENCY': 4,   # 同时在途的批次数量
+    'VMOS_FLEET_STAGGER': 0.5,     # 相邻批次的启动间隔（秒）
+    'VMOS_ROOT_WAIT': 5,           # 开启root后等待多久再启动应用（秒）
+}
+
+_MAX_KEPT_JOBS = 50
+
+
+def _get_fleet_setting(key: str) -> float:
+    """动态获取编排配置"""
+    return max(get_setting(key, DEFAULT_FLEET_SETTINGS[key], float), 0)
+
+
+class FleetStartOrchestrator:
+    """批量启动编排器 - 后台并发执行 root → 等待 → 启动 流程"""
+
+    def __init__(self, app=None):
+        self.app = app
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """初始化应用"""
+        self.app = app
+
+    def submit(self, machines: List[Dict[str, Any]], pkg_name: str, user_id: Optional[int] = None) -> str:
+        """提交批量启动任务，立即返回任务ID；进度只推送给发起任务的用户
+
+        machines: [{'id', 'name', 'pade_code', 'phone_number'}]
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'user_id': user_id,
+            'status': 'pending',
+            'total': len(machines),
+            'succeeded': 0,
+            'failed': 0,
+            'results': [],
+            'error': None,
+            'created_at': datetime.datetime.now().isoformat(),
+            'finished_at': None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune_jobs()
+
+        thread = threading.Thread(target=self._run_job, args=(job_id, machines, pkg_name), daemon=True)
+        thread.start()
+        logger.info(f"批量启动任务 {job_id} 已提交, 共 {len(machines)} 台机器")
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job, results=list(job['results'])) if job else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            'jobs': len(jobs),
+            'running_jobs': len([job for job in jobs if job['status'] == 'running']),
+            'settings': {key: _get_fleet_setting(key) for key in DEFAULT_FLEET_SETTINGS},
+        }
+
+    def _prune_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('completed', 'failed')]
+        for job_id in finished[:max(len(self._jobs) - _MAX_KEPT_JOBS, 0)]:
+            del self._jobs[job_id]
+
+    def _run_job(self, job_id: str, machines: List[Dict[str, Any]], pkg_name: str):
+        """后台执行任务：按批次并发，批次之间错开启动；任何异常都以 failed 结束任务"""
+        started = time.monotonic()
+        status, error = 'failed', None
+        try:
+            with self.app.app_context():
+                concurrency = max(int(_get_fleet_setting('VMOS_FLEET_CONCURRENCY')), 1)
+                stagger = _get_fleet_setting('VMOS_FLEET_STAGGER')
+                root_wait = _get_fleet_setting('VMOS_ROOT_WAIT')
+                batch_size = get_batch_size()
+
+            self._update_job(job_id, status='running')
+            machines_by_code = {machine['pade_code']: machine for machine in machines}
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = []
+                for index, chunk in enumerate(iter_chunks(list(machines_by_code), batch_size)):
+                    if index and stagger:
+                        time.sleep(stagger)
+                    futures.append(
+                        executor.submit(self._run_chunk, job_id, chunk, machines_by_code, pkg_name, root_wait)
+                    )
+                for future in futures:
+                    future.result()
+            status = 'completed'
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            logger.error(f"批量启动任务 {job_id} 执行失败: {e}")
+        finally:
+            self._update_job(job_id, status=status, error=error, finished_at=datetime.datetime.now().isoformat())
+            job = self.get_job(job_id)
+            logger.log(
+                'SUCCESS' if status == 'completed' else 'ERROR',
+                f"批量启动任务 {job_id} 结束({status}): 成功 {job['succeeded']}, 失败 {job['failed']}, "
+                f"耗时 {time.monotonic() - started:.1f}s"
+            )
+            self._emit_progress(job_id)
+
+    def _run_chunk(self, job_id: str, chunk: List[str], machines_by_code: Dict[str, Dict[str, Any]],
+                   pkg_name: str, root_wait: float):
+        with self.app.app_context():
+            try:
+                results = call_chunk(chunk, lambda codes: open_root(pad_code_list=codes, pkg_name=pkg_name))
+                rooted = [code for code in chunk if results[code]['success']]
+                if rooted:
+                    time.sleep(root_wait)
+                    results.update(call_chunk(rooted, lambda codes: start_app(codes, pkg_name=pkg_name)))
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"批量启动任务 {job_id} 批次执行失败: {e}")
+                results = {code: {'success': False, 'message': str(e), 'response': None} for code in chunk}
+
+            # 只有VMOS启动成功的机器写入运行状态；写入失败时这些机器单独标记为失败
+            started = [code for code in chunk if results[code]['success']]
+            try:
+                commit_running_state([machines_by_code[code] for code in started], True)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"批量启动任务 {job_id} 保存运行状态失败: {e}")
+                for code in started:
+                    results[code] = {'success': False, 'message': f'VMOS已启动，保存运行状态失败: {e}',
+                                     'response': results[code]['response']}
+
+        chunk_results = [{
+            'machine_id': machines_by_code[code]['id'],
+            'machine_name': machines_by_code[code]['name'],
+            'status': 'success' if results[code]['success'] else 'error',
+            'message': 'Started successfully' if results[code]['success'] else results[code]['message'],
+        } for code in chunk]
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job['results'].extend(chunk_results)
+            job['succeeded'] += len([r for r in chunk_results if r['status'] == 'success'])
+            job['failed'] += len([r for r in chunk_results if r['status'] == 'error'])
+        self._emit_progress(job_id)
+
+    def _update_job(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _emit_progress(self, job_id: str):
+        with self._lock:
+            job = self._jobs[job_id]
+            progress = {key: job[key] for key in ('job_id', 'status', 'total', 'succeeded', 'failed', 'error')}
+            user_id = job['user_id']
+        dashboard_rooms.emit_user('fleet_start_progress', user_id, progress)
+
+
+# 创建全局实例
+fleet_orchestrator = FleetStartOrchestrator()
@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from app.utils.vmos import get_phone_list
+from app.utils.dynamic_config import get_setting
+
+# 机器列表缓存时间（SystemConfig 中没有对应项时使用）
+DEFAULT_PAD_LIST_TTL = 30
+
+
+def _get_ttl() -> float:
+    """动态获取机器列表缓存时间（秒）"""
+    return max(get_setting('VMOS_PAD_LIST_TTL', DEFAULT_PAD_LIST_TTL, float), 0)
+
+
+class _Flight:
+    """一次进行中的VMOS请求，并发调用方共享其结果"""
+
+    def __init__(self, generation: int, seq: int):
+        # 发起时的缓存代数，invalidate() 之后发起的请求代数更大
+        self.generation = generation
+        self.seq = seq
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class PadListCache:
+    """VMOS机器列表缓存 - TTL过期 + 并发请求合并
+
+    凭证变更时 invalidate() 增加代数，此前发起的请求结果不再写入缓存，也不再被新的调用方共享。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+        self._flight: Optional[_Flight] = None
+        self._generation = 0
+        self._seq = 0
+        # 已写入缓存的请求序号，较早发起但较晚返回的请求不覆盖较新的结果
+        self._stored_seq = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+        self._errors = 0
+
+    def get(self, refresh: bool = False) -> Dict[str, Any]:
+        """获取机器列表，refresh=True 时忽略缓存强制拉取"""
+        ttl = _get_ttl()
+        with self._lock:
+            if not refresh and self._value is not None and self._age() < ttl:
+                self._hits += 1
+                return self._value
+
+            flight = self._flight
+            # 强制刷新不共享调用前已发起的请求；凭证变更前发起的请求也不再共享
+            if flight is not None and not refresh and flight.generation == self._generation:
+                self._shared += 1
+                leader = False
+            else:
+                self._seq += 1
+                flight = self._flight = _Flight(self._generation, self._seq)
+                self._misses += 1
+                leader = True
+
+        if leader:
+            self._fetch(flight)
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _fetch(self, flight: _Flight):
+        try:
+            result = get_phone_list()
+            flight.result = result
+            if result and 'data' in result:
+                with self._lock:
+                    if flight.generation == self._generation and flight.seq > self._stored_seq:
+                        self._value = result
+                        self._fetched_at = time.monotonic()
+                        self._stored_seq = flight.seq
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._errors += 1
+            logger.error(f"获取VMOS机器列表失败: {e}")
+        finally:
+            with self._lock:
+                if self._flight is flight:
+                    self._flight = None
+            flight.done.set()
+
+    def invalidate(self):
+        """清空缓存，进行中的请求结果作废"""
+        with self._lock:
+            self._generation += 1
+            self._value = None
+            self._fetched_at = 0.0
+
+    def _age(self) -> float:
+        return time.monotonic() - self._fetched_at
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'shared_in_flight': self._shared,
+                'errors': self._errors,
+                'cached': self._value is not None,
+                'age_seconds': round(self._age(), 1) if self._value is not None else None,
+                'ttl_seconds': _get_ttl(),
+            }
+
+
+# 创建全局实例
+pad_list_cache = PadListCache()
+
+
+def on_credentials_change(key: str, old_value: Any, new_value: Any):
+    """VMOS凭证变更回调 - 旧凭证下的机器列表作废"""
+    pad_list_cache.invalidate()
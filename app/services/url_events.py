@@ -0,0 +1,182 @@
+import datetime
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from app.utils.dynamic_config import get_setting
+
+# 汇总间隔（毫秒），SystemConfig 中没有对应项时使用
+DEFAULT_TICK_MS = 50
+
+EVENT_TYPES = {'url_started', 'url_stopped', 'url_executed'}
+
+# 各类事件会改变的列
+RUNNING_FIELDS = ('is_running', 'started_at', 'stopped_at')
+EXECUTE_FIELDS = ('current_count',) + RUNNING_FIELDS
+
+_version_lock = threading.Lock()
+_last_version = 0
+
+
+def next_version() -> int:
+    """单调递增的变更版本号，以微秒时间戳为下限，服务重启后仍然递增"""
+    global _last_version
+    with _version_lock:
+        _last_version = max(_last_version + 1, time.time_ns() // 1000)
+        return _last_version
+
+
+def make_delta(url_id: int, config_id: Optional[int], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """增量事件：只包含变化的字段，前端按 version 丢弃过期的增量"""
+    return {'url_id': url_id, 'config_id': config_id, 'version': next_version(), 'changes': changes}
+
+
+def url_delta(url, *fields) -> Dict[str, Any]:
+    """根据 URL 对象生成指定列的增量事件"""
+    return make_delta(url.id, url.config_id, url.to_delta(*fields))
+
+
+def _get_tick_seconds() -> float:
+    """动态获取汇总间隔"""
+    return max(get_setting('URL_EVENT_TICK_MS', DEFAULT_TICK_MS, float), 1) / 1000
+
+
+def _finalize(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """合并后所有字段版本相同时去掉 versions，前端直接使用 version"""
+    versions = entry.get('versions')
+    if versions is not None and len(set(versions.values())) <= 1:
+        del entry['versions']
+    return entry
+
+
+class UrlEventEmitter:
+    """URL实时事件汇总推送 - 每个间隔内按机器合并为一条 urls_batch
+
+    事件内容是字段级增量（见 make_delta），同一间隔内同一URL的多次增量合并为一条：
+    每个字段保留版本最新的值，version 取最大值，字段版本不一致时附带 versions；
+    事件类型按出现顺序保留在 types 中。
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self._lock = threading.Lock()
+        # config_id -> {url_id: 事件}
+        self._pending: Dict[Optional[int], Dict[int, Dict[str, Any]]] = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._tick = DEFAULT_TICK_MS / 1000
+
+        self._events_in = 0
+        self._coalesced = 0
+        self._frames_out = 0
+        self._flushes = 0
+        self._max_batch = 0
+
+    def init_app(self, app):
+        """初始化应用"""
+        self.app = app
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        logger.info("URL事件汇总推送已启动")
+
+    def stop(self):
+        """停止汇总线程并推送剩余事件"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+        logger.info("URL事件汇总推送已停止")
+
+    def emit(self, event: str, delta: Dict[str, Any]):
+        """登记一条URL增量事件，下一个间隔统一推送"""
+        if event not in EVENT_TYPES:
+            raise ValueError(f'Unsupported url event: {event}')
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+
+        url_id = delta['url_id']
+        version = delta['version']
+        with self._lock:
+            events = self._pending.setdefault(delta['config_id'], {})
+            previous = events.get(url_id)
+            if previous is None:
+                events[url_id] = {
+                    'url_id': url_id,
+                    'types': [event],
+                    'version': version,
+                    'changes': dict(delta['changes']),
+                    'timestamp': datetime.datetime.now().isoformat(),
+                }
+            else:
+                # 逐字段保留版本较新的值，合并后各字段版本不同时附带 versions
+                self._coalesced += 1
+                previous['types'].append(event)
+                versions = previous.setdefault('versions', dict.fromkeys(previous['changes'], previous['version']))
+                for field, value in delta['changes'].items():
+                    if versions.get(field, 0) < version:
+                        previous['changes'][field] = value
+                        versions[field] = version
+                previous['version'] = max(previous['version'], version)
+                previous['timestamp'] = datetime.datetime.now().isoformat()
+            self._events_in += 1
+
+    def flush(self) -> int:
+        """推送所有待发送事件，返回发送的帧数"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        from app.services.dashboard_channel import dashboard_rooms
+        frames = 0
+        for config_id, events in pending.items():
+            try:
+                dashboard_rooms.emit_config('urls_batch', config_id, {
+                    'config_id': config_id,
+                    'events': [_finalize(entry) for entry in events.values()],
+                })
+                frames += 1
+            except Exception as e:
+                logger.error(f"推送机器 {config_id} 的URL事件失败: {e}")
+
+        with self._lock:
+            self._frames_out += frames
+            self._flushes += 1
+            self._max_batch = max(self._max_batch, max(len(events) for events in pending.values()))
+        return frames
+
+    def _run(self):
+        while True:
+            with self.app.app_context():
+                self._tick = _get_tick_seconds()
+            if self._stop_event.wait(self._tick):
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"URL事件汇总推送异常: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'tick_ms': round(self._tick * 1000, 1),
+                'pending': sum(len(events) for events in self._pending.values()),
+                'events_in': self._events_in,
+                'coalesced': self._coalesced,
+                'frames_out': self._frames_out,
+                'events_per_frame': round(self._events_in / self._frames_out, 2) if self._frames_out else 0.0,
+                'flushes': self._flushes,
+                'max_batch': self._max_batch,
+            }
+
+
+# 创建全局实例
+url_events = UrlEventEmitter()
@@ -0,0 +1,131 @@
+from typing import Any, Callable, Dict, Iterator, List
+
+from loguru import logger
+
+from app import db
+from app.models.config_data import ConfigData
+from app.services.dashboard_channel import dashboard_rooms
+from app.utils.dynamic_config import get_setting
+
+# VMOS单次请求允许的padCodes数量上限（SystemConfig 中没有对应项时使用）
+DEFAULT_BATCH_SIZE = 100
+
+
+def get_batch_size() -> int:
+    """动态获取每批次的机器数量"""
+    return max(get_setting('VMOS_BATCH_SIZE', DEFAULT_BATCH_SIZE, int), 1)
+
+
+def iter_chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    """按固定大小切分列表"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def pad_item_error(item: Dict[str, Any]) -> Any:
+    """单台机器返回项中的错误信息，没有错误时返回 None"""
+    if item.get('errorMsg'):
+        return item['errorMsg']
+    if item.get('code') not in (None, 200):
+        return item.get('msg') or f"VMOS返回错误码 {item.get('code')}"
+    if item.get('success') is False:
+        return item.get('msg') or 'VMOS返回失败'
+    # 任务状态为负数表示失败、部分失败、取消或超时
+    task_status = item.get('taskStatus')
+    if isinstance(task_status, int) and task_status < 0:
+        return f"任务状态 {task_status}"
+    return None
+
+
+def parse_pad_results(chunk: List[str], response: Any) -> Dict[str, Dict[str, Any]]:
+    """将一次多机器调用的返回映射到每台机器
+
+    只有在 data 中有对应且无错误的返回项才算成功；返回中缺少的机器结果未知，按失败处理，
+    调用方不会据此修改其运行状态。多账号调用（返回中带 pad_results）按机器所属账号各自的结果判断。
+    """
+    per_pad: Dict[str, Any] = {}
+    # 账号级错误：padCode -> 错误信息
+    account_errors: Dict[str, str] = {}
+
+    pad_results = response.get('pad_results') if isinstance(response, dict) else None
+    if isinstance(pad_results, dict):
+        for pad_code, result in pad_results.items():
+            if result.get('code') != 200:
+                account_errors[pad_code] = result.get('msg') or f"VMOS返回错误码 {result.get('code')}"
+            elif isinstance(result.get('data'), dict):
+                per_pad[pad_code] = result['data']
+    elif isinstance(response, dict) and response.get('code') not in (None, 200):
+        message = response.get('msg') or f"VMOS返回错误码 {response.get('code')}"
+        return {pad_code: {'success': False, 'message': message, 'response': None} for pad_code in chunk}
+    else:
+        data = response.get('data') if isinstance(response, dict) else None
+        if isinstance(data, list):
+            per_pad = {item.get('padCode'): item for item in data if isinstance(item, dict)}
+
+    results = {}
+    for pad_code in chunk:
+        item = per_pad.get(pad_code)
+        if pad_code in account_errors:
+            results[pad_code] = {'success': False, 'message': account_errors[pad_code], 'response': None}
+        elif item is None:
+            results[pad_code] = {'success': False, 'message': 'VMOS返回中没有该机器的结果', 'response': None}
+        else:
+            error = pad_item_error(item)
+            results[pad_code] = {'success': error is None, 'message': error or 'ok', 'response': item}
+    return results
+
+
+def call_chunk(chunk: List[str], action: Callable[[List[str]], Any]) -> Dict[str, Dict[str, Any]]:
+    """对一批机器发起一次VMOS调用"""
+    try:
+        response = action(chunk)
+    except Exception as e:
+        logger.error(f"VMOS批量调用失败 ({len(chunk)} 台): {e}")
+        return {pad_code: {'success': False, 'message': str(e), 'response': None} for pad_code in chunk}
+    return parse_pad_results(chunk, response)
+
+
+def dispatch_chunked(pad_codes: List[str], action: Callable[[List[str]], Any],
+                     batch_size: int = None) -> Dict[str, Dict[str, Any]]:
+    """按批次调用VMOS接口，返回每台机器的结果"""
+    results: Dict[str, Dict[str, Any]] = {}
+    for chunk in iter_chunks(pad_codes, batch_size or get_batch_size()):
+        results.update(call_chunk(chunk, action))
+    return results
+
+
+def machine_info(machine) -> Dict[str, Any]:
+    """提取后台批量操作需要的机器字段，避免跨线程/跨事务持有ORM对象"""
+    return {
+        'id': machine.id,
+        'name': machine.message,
+        'pade_code': machine.pade_code,
+        'phone_number': machine.phone_number,
+    }
+
+
+def release_connection():
+    """结束只读阶段：关闭会话，把连接还给连接池，再去等待VMOS
+
+    之后不要再使用之前加载的ORM对象，需要的字段应先用 machine_info 等方式取出。
+    """
+    db.session.close()
+
+
+def commit_running_state(machines: List[Dict[str, Any]], is_running: bool):
+    """在一个事务中更新一批机器的运行状态并推送"""
+    if not machines:
+        return
+
+    # 设备配置不包含机器的 is_running，不需要作废配置缓存
+    ConfigData.query.filter(
+        ConfigData.id.in_([machine['id'] for machine in machines])
+    ).execution_options(config_cache_tracked=True).update({'is_running': is_running}, synchronize_session=False)
+    db.session.commit()
+
+    for machine in machines:
+        dashboard_rooms.emit_fleet('machine_info_update', {
+            'machine_id': machine['id'],
+            'is_running': is_running,
+            'phone_number': machine['phone_number']
+        })
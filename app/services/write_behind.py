@@ -0,0 +1,263 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from loguru import logger
+from sqlalchemy import event, inspect
+
+from app.utils.dynamic_config import get_setting, parse_bool
+
+# 写回缓冲默认配置（SystemConfig 中没有对应项时使用）
+DEFAULT_WRITE_BEHIND_SETTINGS = {
+    'WRITE_BEHIND_ENABLED': False,
+    'WRITE_BEHIND_FLUSH_MS': 500,
+    'WRITE_BEHIND_MAX_ENTRIES': 1000,
+    'WRITE_BEHIND_MAX_STALENESS_MS': 5000,
+    'WRITE_BEHIND_FLUSH_ON_SHUTDOWN': True,
+}
+
+BUFFERED_FIELDS = ('status', 'label')
+
+# url_id -> config_id 缓存上限
+_CONFIG_ID_CACHE_SIZE = 10000
+
+
+def _get_setting(key: str) -> Any:
+    """动态获取写回缓冲配置"""
+    default = DEFAULT_WRITE_BEHIND_SETTINGS[key]
+    return get_setting(key, default, parse_bool if isinstance(default, bool) else type(default))
+
+
+class WriteBehindBuffer:
+    """URL状态/标签写回缓冲 - 每个 (url_id, 字段) 只保留最新值，定时或满额时批量写入数据库
+
+    最大陈旧时间用于兜底：刷新失败导致积压超过该时间时，新的写入会同步触发刷新。
+    其他路径直接写入同一字段时丢弃缓冲中的旧值：ORM 对象上的赋值通过属性事件自动处理，
+    直接执行的 UPDATE 语句需要先调用 discard。
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Tuple[int, str], Any] = {}
+        # 正在刷新的键，以及刷新期间被直接写入取代的键
+        self._inflight: Set[Tuple[int, str]] = set()
+        self._superseded: Set[Tuple[int, str]] = set()
+        self._listening = False
+        self._oldest_at: Optional[float] = None
+        self._config_ids: 'OrderedDict[int, int]' = OrderedDict()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._received = 0
+        self._coalesced = 0
+        self._discarded = 0
+        self._written = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._flush_total = 0.0
+        self._flush_max = 0.0
+
+    def init_app(self, app):
+        """初始化应用并注册字段赋值事件"""
+        self.app = app
+        if self._listening:
+            return
+        from app.models import UrlData
+        for field in BUFFERED_FIELDS:
+            event.listen(getattr(UrlData, field), 'set', self._on_attribute_set)
+        self._listening = True
+
+    @property
+    def enabled(self) -> bool:
+        return _get_setting('WRITE_BEHIND_ENABLED')
+
+    def start(self):
+        """启动后台刷新线程"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        logger.info("写回缓冲已启动")
+
+    def stop(self):
+        """停止刷新线程，按配置决定是否把缓冲中的数据写入数据库"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self.app.app_context():
+            flush_on_shutdown = _get_setting('WRITE_BEHIND_FLUSH_ON_SHUTDOWN')
+        if flush_on_shutdown:
+            self.flush()
+        else:
+            with self._lock:
+                dropped = len(self._pending)
+            if dropped:
+                logger.warning(f"写回缓冲停止，丢弃 {dropped} 条未写入的更新")
+        logger.info("写回缓冲已停止")
+
+    def find_config_id(self, url_id: int) -> Tuple[bool, Optional[int]]:
+        """查询URL是否存在及其所属机器，用于即时推送；结果缓存，避免每次都加载整行"""
+        with self._lock:
+            if url_id in self._config_ids:
+                self._config_ids.move_to_end(url_id)
+                return True, self._config_ids[url_id]
+
+        from app import db
+        from app.models import UrlData
+        row = db.session.query(UrlData.id, UrlData.config_id).filter_by(id=url_id).first()
+        if not row:
+            return False, None
+        with self._lock:
+            self._config_ids[url_id] = row.config_id
+            if len(self._config_ids) > _CONFIG_ID_CACHE_SIZE:
+                self._config_ids.popitem(last=False)
+        return True, row.config_id
+
+    def put(self, url_id: int, field: str, value: Any):
+        """缓冲一次字段更新，同一URL同一字段只保留最后的值"""
+        if field not in BUFFERED_FIELDS:
+            raise ValueError(f'Unsupported buffered field: {field}')
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+
+        now = time.monotonic()
+        with self._lock:
+            key = (url_id, field)
+            if key in self._pending:
+                self._coalesced += 1
+            self._pending[key] = value
+            self._received += 1
+            if self._oldest_at is None:
+                self._oldest_at = now
+            pending = len(self._pending)
+            stale_ms = (now - self._oldest_at) * 1000
+
+        if pending >= _get_setting('WRITE_BEHIND_MAX_ENTRIES') or stale_ms >= _get_setting(
+                'WRITE_BEHIND_MAX_STALENESS_MS'):
+            self.flush()
+
+    def discard(self, url_ids: Iterable[int], fields: Iterable[str] = BUFFERED_FIELDS):
+        """其他路径直接写入这些字段时调用，丢弃缓冲中更旧的值，必须在该写入的 UPDATE 执行之前调用
+
+        正在刷新的值在提交前会被撤销，直接写入总是覆盖缓冲中的值。
+        """
+        with self._lock:
+            if not self._pending and not self._inflight:
+                return
+            for url_id in url_ids:
+                for field in fields:
+                    key = (url_id, field)
+                    if key in self._pending:
+                        del self._pending[key]
+                        self._discarded += 1
+                    if key in self._inflight:
+                        self._superseded.add(key)
+            if not self._pending:
+                self._oldest_at = None
+
+    def _on_attribute_set(self, target, value, oldvalue, initiator):
+        # 只处理已持久化对象上的赋值；构造对象（如 UrlData(**row)）不是写入
+        if inspect(target).persistent:
+            self.discard([target.id], [initiator.key])
+
+    def flush(self) -> int:
+        """把缓冲中的更新批量写入数据库，返回写入的行数"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                oldest_at, self._oldest_at = self._oldest_at, None
+                self._inflight = set(pending)
+            if not pending:
+                return 0
+
+            from app import db
+            from app.models import UrlData
+            from app.services.dashboard_channel import dashboard_rooms
+
+            started = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    while pending:
+                        by_field: Dict[str, Dict[int, Any]] = {}
+                        for (url_id, field), value in pending.items():
+                            by_field.setdefault(field, {})[url_id] = value
+                        label_configs = set()
+                        for field, updates in by_field.items():
+                            updated = UrlData.bulk_update_field(field, updates)
+                            if field == 'label':
+                                label_configs.update(row['config_id'] for row in updated.values() if row['config_id'])
+                        with self._lock:
+                            superseded = self._superseded & pending.keys()
+                        if not superseded:
+                            break
+                        # 写入期间其他路径直接修改了这些字段，撤销后去掉它们重新写入
+                        db.session.rollback()
+                        for key in superseded:
+                            del pending[key]
+                    db.session.commit()
+            except Exception as e:
+                with self._lock:
+                    # 写入失败时放回缓冲，不覆盖期间到达的更新值，也不放回已被直接写入取代的值
+                    for key, value in pending.items():
+                        if key not in self._superseded:
+                            self._pending.setdefault(key, value)
+                    if oldest_at is not None and self._pending:
+                        self._oldest_at = min(self._oldest_at or oldest_at, oldest_at)
+                    self._failed_flushes += 1
+                logger.error(f"写回缓冲刷新失败，{len(pending)} 条更新等待重试: {e}")
+                return 0
+            finally:
+                with self._lock:
+                    self._inflight = set()
+                    self._superseded = set()
+
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._flushes += 1
+                self._written += len(pending)
+                self._flush_total += elapsed
+                self._flush_max = max(self._flush_max, elapsed)
+
+            # 即时推送时前端没有重新加载标签统计，写入后统一通知一次
+            if pending and label_configs:
+                dashboard_rooms.emit_configs('labels_updated', label_configs,
+                                             {'config_ids': sorted(label_configs), 'items': []})
+            return len(pending)
+
+    def _run(self):
+        while True:
+            with self.app.app_context():
+                interval = _get_setting('WRITE_BEHIND_FLUSH_MS') / 1000
+            if self._stop_event.wait(interval):
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"写回缓冲刷新异常: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            oldest_ms = (time.monotonic() - self._oldest_at) * 1000 if self._oldest_at is not None else 0.0
+            return {
+                'enabled': self.enabled,
+                'pending': len(self._pending),
+                'oldest_pending_ms': round(oldest_ms, 2),
+                'received': self._received,
+                'coalesced': self._coalesced,
+                'discarded': self._discarded,
+                'written': self._written,
+                'coalescing_ratio': round(self._received / self._written, 2) if self._written else 0.0,
+                'flushes': self._flushes,
+                'failed_flushes': self._failed_flushes,
+                'flush_avg_ms': round(self._flush_total / self._flushes * 1000, 2) if self._flushes else 0.0,
+                'flush_max_ms': round(self._flush_max * 1000, 2),
+            }
+
+
+# 创建全局实例
+write_behind = WriteBehindBuffer()
@@ -210,13 +210,41 @@ async function batchStartMachines() {
             body: JSON.stringify({})
         });
 
-        showInfo("返回值", result.message);
-        console.log('批量启动结果:', result.results);
+        showInfo("已提交", `${result.message}，任务ID: ${result.job_id}`);
+        await waitForBatchStartJob(result.job_id);
     } catch (error) {
         // 错误已在apiCall中处理
     }
 }
 
+// 轮询批量启动任务直到结束，最多轮询 BATCH_START_MAX_POLLS 次
+const BATCH_START_POLL_INTERVAL = 3000;
+const BATCH_START_MAX_POLLS = 200;
+
+async function waitForBatchStartJob(jobId) {
+    for (let attempt = 0; attempt < BATCH_START_MAX_POLLS; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, BATCH_START_POLL_INTERVAL));
+        let job;
+        try {
+            job = await apiCall(`/api/machines/batch-start/${jobId}`);
+        } catch (error) {
+            // 任务不存在（404）或请求失败，错误已在apiCall中提示
+            return;
+        }
+        if (job.status === 'pending' || job.status === 'running') continue;
+
+        if (job.status === 'completed') {
+            showInfo("批量启动完成", `成功 ${job.succeeded} 台，失败 ${job.failed} 台`);
+        } else {
+            showError("批量启动失败", job.error || `任务状态: ${job.status}`);
+        }
+        console.log('批量启动结果:', job.results);
+        await loadMachines();
+        return;
+    }
+    showError("批量启动", `任务 ${jobId} 长时间未结束，已停止查询进度`);
+}
+
 // 批量停止机器
 async function batchStopMachines() {
     if (!await showConfirm('确认停止', '确定要停止所有机器吗？', 'danger')) return;
@@ -2,6 +2,8 @@ let socket = null;
 let isWebSocketConnected = false;
 let durationUpdateInterval = null;
 let runningUrls = new Map();
+// 当前页面显示的URL数据，按 url_id 索引，实时增量合并到这里
+let urlModels = new Map();
 let isWebSocketInitialized = false;
 let currentPage = 1;
 let totalPages = 1;
@@ -80,6 +82,13 @@ function initWebSocket() {
     }, 100); // 延迟100ms，让页面先渲染
 }
 
+// 声明当前查看的机器，服务端只推送该机器的URL事件
+function watchCurrentConfig() {
+    if (socket && socket.connected) {
+        socket.emit('watch_configs', {config_ids: currentConfigId ? [currentConfigId] : []});
+    }
+}
+
 function startPollingMode() {
     console.log('启动轮询模式');
     setInterval(() => {
@@ -93,6 +102,8 @@ function startPollingMode() {
 function setupWebSocketEvents() {
     socket.on('connect', function () {
         isWebSocketConnected = true;
+        // 重连后服务端房间已清空，需要重新声明关注的机器
+        watchCurrentConfig();
         startDurationUpdates();
     });
 
@@ -103,49 +114,96 @@ function setupWebSocketEvents() {
         stopDurationUpdates();
     });
 
-    // 监听 URL 执行更新
-    socket.on('url_executed', function (data) {
-        if (data.config_id === currentConfigId) {
-            updateSingleUrlItem(data.url_data);
+    // 监听URL事件批量推送（服务端按机器每个间隔合并一次，包含执行、启动、停止）
+    socket.on('urls_batch', function (data) {
+        if (data.config_id !== currentConfigId) {
+            return;
+        }
+        let missing = false;
+        let executed = false;
+        data.events.forEach(event => {
+            if (event.types.includes('url_executed')) {
+                executed = true;
+            }
+            if (!applyUrlDelta(event)) {
+                missing = true;
+            }
+        });
+        // 页面上没有的URL整体刷新一次，统计只刷新一次
+        if (missing) {
+            loadDashboardData().then(() => {});
+        } else if (executed) {
+            updateStatsFromSocket().then(() => {});
+        }
+    });
+
+    // 监听设备批量上报（一次通知包含多条URL更新）
+    socket.on('urls_reported', function (data) {
+        const items = data.items.filter(item => item.config_id === currentConfigId);
+        if (items.length === 0) {
+            return;
+        }
+        if (data.label_changed) {
+            loadDashboardData().then(() => {});
+            loadLabelStats().then(() => {});
+            return;
+        }
+        const missing = items.filter(item => !applyUrlDelta(item)).length > 0;
+        if (missing) {
+            loadDashboardData().then(() => {});
+        } else {
             updateStatsFromSocket().then(() => {});
-            updateRunningUrlsCache(data.url_data);
         }
     });
 
     // 监听状态更新
     socket.on('status_updated', function (data) {
         if (data.config_id === currentConfigId) {
-            updateUrlStatus(data.url_id, data.status);
+            applyUrlDelta(data);
         }
     });
 
     // 监听标签更新
     socket.on('label_updated', function (data) {
         if (data.config_id === currentConfigId) {
+            // 写回模式下数据库稍后才更新，先直接修改页面，写入后会收到 labels_updated
+            if (data.buffered) {
+                applyUrlDelta(data);
+                return;
+            }
             loadDashboardData().then(() => {});
             loadLabelStats().then(() => {});
         }
     });
 
-    // 监听URL启动事件
-    socket.on('url_started', function (data) {
-        if (data.config_id === currentConfigId) {
-            updateRunningUrlsCache(data.url_data);
-            updateSingleUrlItem(data.url_data);
-        }
-    });
-
-    // 监听URL停止事件
-    socket.on('url_stopped', function (data) {
-        if (data.config_id === currentConfigId) {
-            removeFromRunningUrlsCache(data.url_id);
-            updateSingleUrlItem(data.url_data);
+    // 监听批量标签更新（整批只推送一次）
+    socket.on('labels_updated', function (data) {
+        if (data.config_ids.includes(currentConfigId)) {
+            loadDashboardData().then(() => {});
+            loadLabelStats().then(() => {});
         }
     });
 
     socket.on('machine_info_update', function (data) {
         updateMachineInfo(data.machine_id, data.is_running, data.phone_number);
     });
+
+    // 后台启动失败（/api/start 已返回“启动中”），恢复状态并提示
+    socket.on('machine_start_failed', function (data) {
+        updateMachineInfo(data.machine_id, data.is_running);
+        const machine = availableMachines.find(m => m.id === data.machine_id);
+        const name = machine ? (machine.name || machine.pade_code) : data.pade_code;
+        showError('启动失败', `机器 ${name} 启动失败: ${data.error}`);
+    });
+
+    // 监听本人发起的批量启动任务进度（只推送给发起人）
+    socket.on('fleet_start_progress', function (data) {
+        if (data.status === 'completed') {
+            showInfo('批量启动完成', `成功 ${data.succeeded} 台，失败 ${data.failed} 台`);
+        } else if (data.status === 'failed') {
+            showError('批量启动失败', data.error || '批量启动任务异常结束');
+        }
+    });
 }
 
 function updateMachineInfo(machineId, isRunning, phoneNumber) {
@@ -265,6 +323,39 @@ function formatDuration(seconds) {
     return result;
 }
 
+// 把一条URL增量（url_id、version、changes）合并到本地模型并刷新页面，页面上没有该URL时返回 false
+// 批量推送会晚于即时推送到达，因此按字段比较版本，只丢弃比本地更旧的字段
+function applyUrlDelta(delta) {
+    const model = urlModels.get(delta.url_id);
+    if (!model) {
+        return false;
+    }
+    const changes = {};
+    Object.entries(delta.changes).forEach(([field, value]) => {
+        const version = delta.versions?.[field] ?? delta.version;
+        if (Math.max(model.snapshotVersion, model.versions[field] || 0) < version) {
+            model[field] = value;
+            model.versions[field] = version;
+            changes[field] = value;
+        }
+    });
+    model.can_execute = model.current_count < model.max_num;
+
+    if ('current_count' in changes || 'is_running' in changes) {
+        updateSingleUrlItem(model);
+    }
+    if ('is_running' in changes || 'started_at' in changes) {
+        updateRunningUrlsCache(model);
+    }
+    if ('status' in changes) {
+        updateUrlStatus(model.id, model.status);
+    }
+    if ('label' in changes) {
+        updateUrlLabel(model.id, model.label);
+    }
+    return true;
+}
+
 // 初始化运行中URL缓存
 function initializeRunningUrlsCache(urls) {
     runningUrls.clear();
@@ -316,6 +407,33 @@ function updateSingleUrlItem(urlData) {
     }, 1000);
 }
 
+// 更新单个URL的标签显示
+function updateUrlLabel(urlId, label) {
+    const urlItem = document.querySelector(`[data-url-id="${urlId}"]`);
+    if (!urlItem) {
+        return;
+    }
+    let badge = urlItem.querySelector('.url-label-badge');
+    if (label && label.trim()) {
+        if (!badge) {
+            const nameElement = urlItem.querySelector('.url-name');
+            if (!nameElement) {
+                return;
+            }
+            badge = document.createElement('span');
+            badge.className = 'url-label-badge';
+            nameElement.insertBefore(badge, nameElement.firstElementChild);
+        }
+        badge.textContent = label;
+        urlItem.classList.add('url-item-labeled');
+    } else {
+        if (badge) {
+            badge.remove();
+        }
+        urlItem.classList.remove('url-item-labeled');
+    }
+}
+
 // 添加状态更新函数
 function updateUrlStatus(urlId, status) {
     const statusElement = document.getElementById(`status-${urlId}`);
@@ -393,7 +511,7 @@ async function loadDashboardData() {
             const filteredResponse = await apiCall(`/api/urls/by-label/${encodeURIComponent(currentFilter.value)}?config_id=${currentConfigId}`);
             urlsToDisplay = filteredResponse.urls;
         } else {
-            updateUrlList(urlsData.urls);
+            updateUrlList(urlsData.urls, urlsData.version);
             urlsToDisplay = urlsData.urls;
         }
 
@@ -515,10 +633,14 @@ async function loadPage(page) {
 }
 
 
-function updateUrlList(urls) {
+// version 为接口在查询前取得的版本号，快照已包含不比它新的增量；缺少时以本地时间（微秒）代替
+function updateUrlList(urls, version) {
     const urlList = document.getElementById('urlList');
     if (!urlList) return;
 
+    const snapshotVersion = version ?? Date.now() * 1000;
+    urlModels = new Map(urls.map(url => [url.id, {...url, snapshotVersion, versions: {}}]));
+
     if (urls.length === 0) {
         const emptyMessage = currentFilter.isActive
             ? `没有找到标签为 "${currentFilter.value}" 的群聊的配置信息`
@@ -841,6 +963,7 @@ async function loadMachineList() {
         // 设置默认选中
         if (!currentConfigId && machines.length > 0) {
             currentConfigId = machines[0].id;
+            watchCurrentConfig();
             select.value = currentConfigId;
             const firstMachine = machines[0];
             document.getElementById('selectedMachineText').textContent =
@@ -874,6 +997,7 @@ function switchMachine() {
 
     if (newConfigId && newConfigId !== currentConfigId) {
         currentConfigId = newConfigId;
+        watchCurrentConfig();
         // 重置分页状态
         currentPage = 1;
         totalPages = 1;
@@ -939,7 +1063,7 @@ async function applyCurrentFilter() {
 
     try {
         const response = await apiCall(`/api/urls/by-label/${encodeURIComponent(currentFilter.value)}?config_id=${currentConfigId}`);
-        updateUrlList(response.urls);
+        updateUrlList(response.urls, response.version);
     } catch (error) {
         console.error('应用筛选失败:', error);
         // 如果筛选失败，清除筛选状态
@@ -1062,7 +1186,7 @@ async function filterByLabel(label) {
         currentFilter.value = label;
         currentFilter.isActive = true;
 
-        updateUrlList(response.urls);
+        updateUrlList(response.urls, response.version);
 
         const filterInfo = document.getElementById('filterInfo');
         if (filterInfo) {
@@ -1306,9 +1430,8 @@ async function startCurrentMachine() {
             method: 'POST',
             body: JSON.stringify({pade_code: currentConfigData.pade_code})
         });
-        console.log('启动成功:', result);
-        await loadDashboardData();
-        showSuccess('成功', '当前机器启动成功');
+        console.log('启动指令已发送:', result);
+        showSuccess('已提交', '当前机器正在启动，完成后将自动刷新状态');
     } catch (error) {
         console.error('启动失败:', error);
         showError("启动失败", '当前机器启动失败');
@@ -1607,6 +1730,7 @@ async function deleteMachine(machineId, machineName) {
 
         if (currentConfigId === machineId) {
             currentConfigId = null;
+            watchCurrentConfig();
             currentConfigData = null;
         }
 
@@ -1694,6 +1818,7 @@ async function syncNewMachines() {
             // 如果当前没有选中机器，选择第一台新机器
             if (!currentConfigId && result.created_machines.length > 0) {
                 currentConfigId = result.created_machines[0].id;
+                watchCurrentConfig();
                 document.getElementById('machineSelect').value = currentConfigId;
                 updateCurrentMachineInfo();
                 await loadDashboardData();
@@ -1749,6 +1874,7 @@ async function syncNewMachinesFromModal() {
             // 如果当前没有选中机器，选择第一台新机器
             if (!currentConfigId && result.created_machines.length > 0) {
                 currentConfigId = result.created_machines[0].id;
+                watchCurrentConfig();
                 document.getElementById('machineSelect').value = currentConfigId;
                 updateCurrentMachineInfo();
                 await loadDashboardData();
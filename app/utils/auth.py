@@ -3,9 +3,52 @@ import datetime
 import hashlib
 import hmac
 import json
-from typing import Any
+import threading
+from typing import Any, Dict, Optional, Tuple
 
 import requests
+from loguru import logger
+
+from app.utils.dynamic_config import get_setting
+from app.utils.http_pool import vmos_http_client
+from app.utils.pool_monitor import pool_monitor
+from app.utils.rate_limiter import vmos_rate_limiter
+from app.utils.resilience import CircuitBreaker, RetryBudget, call_with_retry
+from app.utils.vmos_keys import DEFAULT_KEY_NAME, merge_responses, vmos_key_pool
+
+VMOS_HOST = "api.vmoscloud.com"
+DEFAULT_BASE_URL = f"https://{VMOS_HOST}"
+_SERVICE = "armcloud-paas"  # 服务名
+_ALGORITHM = "HMAC-SHA256"
+_CONTENT_TYPE = "application/json;charset=UTF-8"
+_SIGNED_HEADERS = "content-type;host;x-content-sha256;x-date"
+
+# 幂等接口：重复调用结果一致，失败后可以安全重试
+IDEMPOTENT_ENDPOINTS = {
+    '/vcpcloud/api/padApi/userPadList',
+    '/vcpcloud/api/padApi/padTaskDetail',
+    '/vcpcloud/api/padApi/listInstalledApp',
+    '/vcpcloud/api/padApi/stopApp',
+    '/vcpcloud/api/padApi/switchRoot',
+}
+
+# 各接口的 (连接超时, 读取超时)，未列出的使用连接池默认值
+ENDPOINT_TIMEOUTS = {
+    '/vcpcloud/api/padApi/userPadList': (5, 20),
+    '/vcpcloud/api/padApi/padTaskDetail': (5, 10),
+    '/vcpcloud/api/padApi/listInstalledApp': (5, 15),
+    '/vcpcloud/api/padApi/stopApp': (5, 15),
+    '/vcpcloud/api/padApi/startApp': (5, 15),
+    '/vcpcloud/api/padApi/switchRoot': (5, 15),
+    '/vcpcloud/api/padApi/uploadFileV3': (5, 60),
+}
+
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 0.5
+
+
+class VmosServerError(Exception):
+    """VMOS返回5xx或限流，可视为暂时性故障"""
 
 
 def _get_dynamic_credentials():
@@ -21,90 +64,199 @@ def _get_dynamic_credentials():
         return Config.ACCESS_KEY, Config.SECRET_ACCESS
 
 
-class VmosUtil(object):
-    def __init__(self, url, data=None):
-        if data is None:
-            data = {}
-        self._url = url
-        self._data = data
+def serialize_body(data: Any) -> bytes:
+    """将请求体序列化为字节（签名与发送共用同一份）"""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode()
 
-        # 动态获取配置
-        self._ak, self._sk = _get_dynamic_credentials()
 
-        self._x_date = datetime.datetime.now().strftime("%Y%m%dT%H%M%SZ")
-        self._content_type = "application/json;charset=UTF-8"
-        self._signed_headers = "content-type;host;x-content-sha256;x-date"
-        self._host = "api.vmoscloud.com"
+class VmosSigner:
+    """VMOS请求签名器 - 签名密钥只依赖密钥和日期，按 (secret, 日期) 缓存"""
 
-    def _get_signature(self):
-        json_string: Any = json.dumps(self._data, separators=(',', ':'), ensure_ascii=False)
-
-        # 计算SHA-256哈希值
-        hash_object = hashlib.sha256(json_string.encode())
-        x_content_sha256 = hash_object.hexdigest()
-
-        # 使用f-string构建canonicalStringBuilder
-        canonical_string_builder: Any = (
-            f"host:{self._host}\n"
-            f"x-date:{self._x_date}\n"
-            f"content-type:{self._content_type}\n"
-            f"signedHeaders:{self._signed_headers}\n"
-            f"x-content-sha256:{x_content_sha256}"
-        )
-        # 假设这些变量已经被赋值
-        # short_x_date = datetime.datetime.now().strftime("%Y%m%d")  # 短请求时间，例如："20240101"
-        short_x_date: Any = self._x_date[:8]  # 短请求时间，例如："20240101"
-        service = "armcloud-paas"  # 服务名
+    _MAX_CACHED_KEYS = 4
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: Dict[Tuple[str, str], bytes] = {}
+        self._hits = 0
+        self._misses = 0
 
-        # 构建credentialScope
-        credential_scope = "{}/{}/request".format(short_x_date, service)
+    @staticmethod
+    def derive_signing_key(secret: str, short_x_date: str) -> bytes:
+        """三次hmacSHA256派生签名密钥"""
+        first_hmac_result = hmac.new(secret.encode(), short_x_date.encode(), hashlib.sha256).digest()
+        second_hmac_result = hmac.new(first_hmac_result, _SERVICE.encode(), hashlib.sha256).digest()
+        return hmac.new(second_hmac_result, b'request', hashlib.sha256).digest()
 
-        # 假设这些变量已经被赋值
-        algorithm = "HMAC-SHA256"
+    def get_signing_key(self, secret: str, short_x_date: str) -> bytes:
+        cache_key = (secret, short_x_date)
+        with self._lock:
+            signing_key = self._keys.get(cache_key)
+            if signing_key is not None:
+                self._hits += 1
+                return signing_key
+
+            self._misses += 1
+            # 日期变化后旧密钥不再使用，避免无限增长
+            if len(self._keys) >= self._MAX_CACHED_KEYS:
+                self._keys.clear()
+            signing_key = self.derive_signing_key(secret, short_x_date)
+            self._keys[cache_key] = signing_key
+            return signing_key
+
+    def sign(self, secret: str, body: bytes, x_date: str, host: str = VMOS_HOST) -> str:
+        """计算请求签名"""
+        x_content_sha256 = hashlib.sha256(body).hexdigest()
+
+        canonical_string_builder = (
+            f"host:{host}\n"
+            f"x-date:{x_date}\n"
+            f"content-type:{_CONTENT_TYPE}\n"
+            f"signedHeaders:{_SIGNED_HEADERS}\n"
+            f"x-content-sha256:{x_content_sha256}"
+        )
+        short_x_date = x_date[:8]  # 短请求时间，例如："20240101"
+        credential_scope = f"{short_x_date}/{_SERVICE}/request"
 
-        # 计算canonicalStringBuilder的SHA-256哈希值
-        hash_sha256 = hashlib.sha256(canonical_string_builder.encode()).hexdigest()
         # 构建StringToSign
         string_to_sign = (
-                algorithm + '\n' +
-                self._x_date + '\n' +
+                _ALGORITHM + '\n' +
+                x_date + '\n' +
                 credential_scope + '\n' +
-                hash_sha256
+                hashlib.sha256(canonical_string_builder.encode()).hexdigest()
         )
 
-        # 假设这些变量已经被赋值
-        service: Any = "armcloud-paas"  # 服务名
+        signing_key = self.get_signing_key(secret, short_x_date)
+        signature_bytes = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).digest()
+        return binascii.hexlify(signature_bytes).decode()
 
-        # 第一次hmacSHA256
-        first_hmac = hmac.new(self._sk.encode(), digestmod=hashlib.sha256)
-        first_hmac.update(short_x_date.encode())
-        first_hmac_result = first_hmac.digest()
+    def invalidate(self):
+        """清空缓存的签名密钥"""
+        with self._lock:
+            self._keys.clear()
 
-        # 第二次hmacSHA256
-        second_hmac = hmac.new(first_hmac_result, digestmod=hashlib.sha256)
-        second_hmac.update(service.encode())
-        second_hmac_result = second_hmac.digest()
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'cached_keys': len(self._keys),
+                'key_hits': self._hits,
+                'key_misses': self._misses,
+            }
 
-        # 第三次hmacSHA256
-        signing_key = hmac.new(second_hmac_result, b'request', digestmod=hashlib.sha256).digest()
 
-        # 使用signing_key和string_to_sign计算HMAC-SHA256
-        signature_bytes: Any = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).digest()
+# 全局实例
+vmos_signer = VmosSigner()
+vmos_breaker = CircuitBreaker('VMOS API', failure_threshold=5, recovery_timeout=30)
+vmos_retry_budget = RetryBudget(ratio=0.2, max_tokens=10)
 
-        # 将HMAC-SHA256的结果转换为十六进制编码的字符串
-        signature = binascii.hexlify(signature_bytes).decode()
 
-        return signature
+def get_endpoint_timeout(path: str) -> Optional[Tuple[float, float]]:
+    """获取接口超时，VMOS_ENDPOINT_TIMEOUTS 可按路径覆盖，格式 {"路径": [连接, 读取]}"""
+    overrides = get_setting('VMOS_ENDPOINT_TIMEOUTS', {})
+    if isinstance(overrides, str):
+        try:
+            overrides = json.loads(overrides)
+        except ValueError:
+            overrides = {}
+    if not isinstance(overrides, dict):
+        overrides = {}
+    timeout = overrides.get(path) or ENDPOINT_TIMEOUTS.get(path)
+    return (float(timeout[0]), float(timeout[1])) if timeout else None
+
+
+def on_secret_access_change(key: str, old_value: Any, new_value: Any):
+    """SECRET_ACCESS变更回调 - 丢弃旧密钥派生的签名密钥"""
+    vmos_signer.invalidate()
+
+
+class VmosUtil(object):
+    def __init__(self, url, data=None, credential=None):
+        if data is None:
+            data = {}
+        self._url = url
+        self._data = data
+        self._body = serialize_body(data)
+
+        # 未指定账号时由凭证池按机器归属路由，只有默认账号时等同于直接使用 ACCESS_KEY/SECRET_ACCESS
+        self._credential = credential
+        if credential is not None:
+            self._ak, self._sk = credential.access_key, credential.secret_access
+            self._account = credential.name
+            self._rate_limits = credential.rate_limits
+        else:
+            self._ak, self._sk = _get_dynamic_credentials()
+            self._account = DEFAULT_KEY_NAME
+            self._rate_limits = None
+
+        self._x_date = datetime.datetime.now().strftime("%Y%m%dT%H%M%SZ")
+        self._content_type = _CONTENT_TYPE
+        self._signed_headers = _SIGNED_HEADERS
+        self._host = VMOS_HOST
+
+    def _get_signature(self):
+        return vmos_signer.sign(self._sk, self._body, self._x_date, self._host)
+
+    def _post(self, url: str, headers: dict, timeout):
+        # 出站限速：超过接口配额时排队等待
+        vmos_rate_limiter.acquire(self._url, account=self._account, overrides=self._rate_limits)
+
+        kwargs = {'headers': headers, 'data': self._body}
+        if timeout:
+            kwargs['timeout'] = timeout
+        response = vmos_http_client.post(url, account=self._account, **kwargs)
+        if response.status_code >= 500 or response.status_code == 429:
+            raise VmosServerError(f"VMOS返回 HTTP {response.status_code}: {self._url}")
+        return response.json()
 
     def send(self):
+        if self._credential is None:
+            routes = vmos_key_pool.route(self._url, self._data)
+            if routes is not None:
+                if len(routes) == 1:
+                    credential, body = routes[0]
+                    return VmosUtil(self._url, body, credential=credential).send()
+                # 多个账号分别调用，一个账号失败不影响其他账号名下机器的结果
+                results = []
+                for credential, body in routes:
+                    try:
+                        results.append((body, VmosUtil(self._url, body, credential=credential).send()))
+                    except Exception as e:
+                        logger.error(f"VMOS账号 {credential.name} 调用 {self._url} 失败: {e}")
+                        results.append((body, e))
+                if all(isinstance(response, Exception) for _, response in results):
+                    raise results[0][1]
+                return merge_responses(results)
+
+        pads = len(self._data.get('padCodes') or ([self._data['padCode']] if self._data.get('padCode') else []))
+        try:
+            result = self._send_signed()
+        except Exception:
+            vmos_key_pool.record(self._account, pads, success=False)
+            raise
+        vmos_key_pool.record(self._account, pads, success=isinstance(result, dict) and result.get('code') == 200)
+        return result
+
+    def _send_signed(self):
         signature = self._get_signature()
-        url = f"https://api.vmoscloud.com{self._url}"
-        payload = json.dumps(self._data, ensure_ascii=False)
+        # 基础地址可指向本地模拟器，签名中的 host 始终为 VMOS_HOST
+        base_url = str(get_setting('VMOS_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+        url = f"{base_url}{self._url}"
         headers = {
-            'content-type': "application/json;charset=UTF-8",
+            'content-type': self._content_type,
             'x-date': self._x_date,
-            'x-host': "api.vmoscloud.com",
-            'authorization': f"HMAC-SHA256 Credential={self._ak}, SignedHeaders=content-type;host;x-content-sha256;x-date, Signature={signature}"
+            'x-host': self._host,
+            'authorization': f"{_ALGORITHM} Credential={self._ak}, SignedHeaders={self._signed_headers}, Signature={signature}"
         }
-        response = requests.request("POST", url, headers=headers, data=payload)
-        return response.json()
+        timeout = get_endpoint_timeout(self._url)
+        max_retries = 0
+        if self._url in IDEMPOTENT_ENDPOINTS:
+            max_retries = get_setting('VMOS_MAX_RETRIES', DEFAULT_MAX_RETRIES, int)
+
+        pool_monitor.note_external_call(self._url)
+        return call_with_retry(
+            lambda: self._post(url, headers, timeout),
+            breaker=vmos_breaker,
+            budget=vmos_retry_budget,
+            retryable=(requests.ConnectionError, requests.Timeout, VmosServerError),
+            max_retries=max_retries,
+            backoff_base=get_setting('VMOS_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF, float),
+        )
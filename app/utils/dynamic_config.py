@@ -1,8 +1,9 @@
 import threading
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Optional, Set
 
 from flask import current_app
 from loguru import logger
+from sqlalchemy import select
 
 
 def _apply_to_flask_config(key: str, value: Any):
@@ -59,6 +60,8 @@ class DynamicConfigManager:
     def __init__(self):
         if not hasattr(self, '_initialized'):
             self._config_cache: Dict[str, Any] = {}
+            # 数据库和Flask配置中都不存在的键，避免每次读取都查询数据库
+            self._missing_keys: Set[str] = set()
             self._watchers: Dict[str, list] = {}  # 配置变更监听器
             self._lock = threading.RLock()
             self._initialized = True
@@ -70,11 +73,17 @@ class DynamicConfigManager:
             # 首先检查缓存
             if key in self._config_cache:
                 return self._config_cache[key]
+            if key in self._missing_keys:
+                return default
 
-            # 从数据库获取
+            # 从数据库获取：使用独立的短连接，不占用请求会话的连接（会话连接会一直持有到事务结束）
             try:
+                from app import db
                 from app.models.system_config import SystemConfig
-                config = SystemConfig.query.filter_by(key=key).first()
+                with db.engine.connect() as connection:
+                    config = connection.execute(
+                        select(SystemConfig.value).where(SystemConfig.key == key)
+                    ).first()
                 if config:
                     value = _convert_value(config.value)
                     self._config_cache[key] = value
@@ -85,6 +94,7 @@ class DynamicConfigManager:
                         value = current_app.config[key]
                         self._config_cache[key] = value
                         return value
+                    self._missing_keys.add(key)
                     return default
             except Exception as e:
                 logger.error(f"获取配置 {key} 失败: {e}")
@@ -98,6 +108,7 @@ class DynamicConfigManager:
             # 转换并存储到缓存
             converted_value = _convert_value(value)
             self._config_cache[key] = converted_value
+            self._missing_keys.discard(key)
 
             # 应用到Flask配置（如果适用）
             _apply_to_flask_config(key, converted_value)
@@ -117,12 +128,14 @@ class DynamicConfigManager:
         with self._lock:
             if key in self._config_cache:
                 del self._config_cache[key]
+            self._missing_keys.discard(key)
             return self.get_config(key)
 
     def reload_all_configs(self):
         """重新加载所有配置"""
         with self._lock:
             self._config_cache.clear()
+            self._missing_keys.clear()
             logger.info("所有配置缓存已清除，将重新加载")
 
     def add_watcher(self, key: str, callback):
@@ -156,6 +169,27 @@ def set_dynamic_config(key: str, value: Any):
     dynamic_config.set_config(key, value)
 
 
+def parse_bool(value: Any) -> bool:
+    """把配置值解释为布尔值"""
+    return str(value).lower() in ('true', '1', 'yes', 'on')
+
+
+def get_setting(key: str, default: Any = None, cast: Optional[Callable[[Any], Any]] = None) -> Any:
+    """读取可在运行时调整的设置，未配置（None 或空字符串）时返回 default
+
+    指定 cast 时按其转换类型，转换失败同样返回 default。
+    """
+    value = get_dynamic_config(key, default)
+    if value is None or value == '':
+        return default
+    if cast is None:
+        return value
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return default
+
+
 # 配置变更回调示例
 def on_debug_change(old_value: Any, new_value: Any):
     """调试模式变更回调"""
@@ -179,4 +213,19 @@ def register_default_watchers():
     dynamic_config.add_watcher('DATABASE_URL', on_database_change)
     dynamic_config.add_watcher('API_SECRET_TOKEN', on_api_key_change)
     dynamic_config.add_watcher('ACCESS_KEY', on_api_key_change)
-    dynamic_config.add_watcher('SECRET_ACCESS', on_api_key_change)
\ No newline at end of file
+    dynamic_config.add_watcher('SECRET_ACCESS', on_api_key_change)
+
+    from app.utils.auth import on_secret_access_change
+    dynamic_config.add_watcher('SECRET_ACCESS', on_secret_access_change)
+
+    from app.services.pad_list_cache import on_credentials_change
+    dynamic_config.add_watcher('ACCESS_KEY', on_credentials_change)
+    dynamic_config.add_watcher('SECRET_ACCESS', on_credentials_change)
+
+    from app.utils.http_pool import DEFAULT_POOL_SETTINGS, on_pool_config_change
+    for key in DEFAULT_POOL_SETTINGS:
+        dynamic_config.add_watcher(key, on_pool_config_change)
+
+    from app.utils.vmos_keys import CREDENTIAL_POOL_KEY, on_credential_pool_change
+    dynamic_config.add_watcher(CREDENTIAL_POOL_KEY, on_credential_pool_change)
+    dynamic_config.add_watcher(CREDENTIAL_POOL_KEY, on_credentials_change)
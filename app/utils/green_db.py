@@ -0,0 +1,121 @@
+import threading
+from typing import Any, Dict
+
+from loguru import logger
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.util.queue import Queue
+
+# 数据库连接池默认配置（环境变量中没有对应项时使用）
+DEFAULT_DB_POOL_SETTINGS = {
+    'DB_POOL_SIZE': 20,        # 常驻连接数
+    'DB_MAX_OVERFLOW': 30,     # 高峰期额外连接数
+    'DB_POOL_TIMEOUT': 10,     # 等待空闲连接的超时（秒）
+    'DB_POOL_RECYCLE': 1800,   # 连接最长复用时间（秒）
+}
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def eventlet_wait_callback(conn, timeout=None):
+    """psycopg2 等待回调：查询等待期间让出 eventlet hub，而不是阻塞整个进程"""
+    import psycopg2
+    from psycopg2 import extensions
+    from eventlet.hubs import trampoline
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise psycopg2.OperationalError(f'Bad result from poll: {state}')
+
+
+def is_green_runtime() -> bool:
+    """当前进程是否已由 eventlet monkey_patch 替换了线程模块"""
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched('thread')
+
+
+def install() -> bool:
+    """安装 psycopg2 协作式等待回调，重复调用无副作用
+
+    缺少 psycopg2 或 eventlet、或者进程没有执行 eventlet.monkey_patch() 时返回 False，
+    此时继续使用普通线程锁的连接池（未打补丁的线程无法等待协程锁）。
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return True
+        try:
+            from psycopg2 import extensions
+        except ImportError as e:
+            logger.warning(f"无法启用协程数据库模式: {e}")
+            return False
+        if not is_green_runtime():
+            logger.warning("进程未执行 eventlet.monkey_patch()，不启用协程数据库模式")
+            return False
+        extensions.set_wait_callback(eventlet_wait_callback)
+        _installed = True
+    logger.info("已安装 psycopg2 eventlet 等待回调")
+    return True
+
+
+def is_installed() -> bool:
+    return _installed
+
+
+class GreenQueue(Queue):
+    """连接队列的锁和条件变量换成 eventlet 版本，等待空闲连接时只挂起当前协程"""
+
+    def __init__(self, maxsize: int = 0, use_lifo: bool = False):
+        super().__init__(maxsize, use_lifo)
+        from eventlet.green import threading as green_threading
+        self.mutex = green_threading.RLock()
+        self.not_empty = green_threading.Condition(self.mutex)
+        self.not_full = green_threading.Condition(self.mutex)
+
+
+class GreenQueuePool(QueuePool):
+    """协程模式下的连接池
+
+    持有连接的协程在查询时会让出 hub，其他协程取连接时如果阻塞在普通线程锁上，
+    持有者就再也无法归还连接，因此等待队列必须是协程感知的。
+    """
+
+    _queue_class = GreenQueue
+
+
+def _get_setting(config, key: str) -> int:
+    default = DEFAULT_DB_POOL_SETTINGS[key]
+    try:
+        return int(getattr(config, key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def engine_options(config) -> Dict[str, Any]:
+    """根据配置生成 SQLALCHEMY_ENGINE_OPTIONS；非 PostgreSQL 数据库沿用默认连接池，需在 install() 之后调用
+
+    只有等待回调已安装且线程模块已被 eventlet 替换时才使用 GreenQueuePool，否则使用默认的 QueuePool。
+    """
+    if not str(config.SQLALCHEMY_DATABASE_URI).startswith('postgresql'):
+        return {}
+
+    options = {
+        'pool_size': _get_setting(config, 'DB_POOL_SIZE'),
+        'max_overflow': _get_setting(config, 'DB_MAX_OVERFLOW'),
+        'pool_timeout': _get_setting(config, 'DB_POOL_TIMEOUT'),
+        'pool_recycle': _get_setting(config, 'DB_POOL_RECYCLE'),
+        'pool_pre_ping': True,
+    }
+    if _installed and is_green_runtime():
+        options['poolclass'] = GreenQueuePool
+    return options
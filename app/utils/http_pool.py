@@ -0,0 +1,163 @@
+import threading
+from typing import Any, Dict
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from app.utils.dynamic_config import get_setting
+
+# 连接池默认配置（SystemConfig 中没有对应项时使用）
+DEFAULT_POOL_SETTINGS = {
+    'VMOS_POOL_CONNECTIONS': 10,   # 缓存的主机连接池数量
+    'VMOS_POOL_MAXSIZE': 50,       # 单个主机的最大连接数
+    'VMOS_POOL_BLOCK': False,      # 连接耗尽时是否阻塞等待
+    'VMOS_KEEP_ALIVE': True,       # 是否复用长连接
+    'VMOS_CONNECT_TIMEOUT': 5,     # 连接超时（秒）
+    'VMOS_READ_TIMEOUT': 30,       # 读取超时（秒）
+}
+
+
+class _PoolCounter:
+    """连接池命中统计（新建连接记为未命中）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.errors = 0
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'errors': self.errors,
+            }
+
+
+_counter = _PoolCounter()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _counter.incr('new_connections')
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _counter.incr('new_connections')
+        return super()._new_conn()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """记录新建连接次数的适配器"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+
+class VmosHttpClient:
+    """进程级共享的VMOS HTTP客户端 - 复用长连接"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized'):
+            self._sessions: Dict[str, requests.Session] = {}
+            self._session_lock = threading.Lock()
+            self._settings: Dict[str, Any] = {}
+            self._initialized = True
+
+    def _build_session(self) -> requests.Session:
+        settings = {key: get_setting(key, default) for key, default in DEFAULT_POOL_SETTINGS.items()}
+        adapter = _CountingAdapter(
+            pool_connections=int(settings['VMOS_POOL_CONNECTIONS']),
+            pool_maxsize=int(settings['VMOS_POOL_MAXSIZE']),
+            pool_block=bool(settings['VMOS_POOL_BLOCK']),
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not settings['VMOS_KEEP_ALIVE']:
+            session.headers['Connection'] = 'close'
+
+        self._settings = settings
+        logger.info(
+            f"VMOS连接池已创建: pools={settings['VMOS_POOL_CONNECTIONS']}, "
+            f"maxsize={settings['VMOS_POOL_MAXSIZE']}, keep_alive={settings['VMOS_KEEP_ALIVE']}"
+        )
+        return session
+
+    def _get_session(self, account: str) -> requests.Session:
+        """每个VMOS账号使用独立的连接池"""
+        session = self._sessions.get(account)
+        if session is None:
+            with self._session_lock:
+                session = self._sessions.get(account)
+                if session is None:
+                    session = self._sessions[account] = self._build_session()
+        return session
+
+    def request(self, method: str, url: str, account: str = 'default', **kwargs) -> requests.Response:
+        """发送请求，未指定超时时使用配置的连接/读取超时"""
+        session = self._get_session(account)
+        kwargs.setdefault('timeout', (
+            float(self._settings['VMOS_CONNECT_TIMEOUT']),
+            float(self._settings['VMOS_READ_TIMEOUT']),
+        ))
+        _counter.incr('requests')
+        try:
+            return session.request(method, url, **kwargs)
+        except requests.RequestException:
+            _counter.incr('errors')
+            raise
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def reset(self):
+        """关闭现有连接池，下次请求时按最新配置重建"""
+        with self._session_lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+        if sessions:
+            logger.info("VMOS连接池已重置")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池命中统计"""
+        stats: Dict[str, Any] = _counter.snapshot()
+        stats['pool_hits'] = max(stats['requests'] - stats['new_connections'], 0)
+        stats['pool_misses'] = stats['new_connections']
+        stats['hit_rate'] = round(stats['pool_hits'] / stats['requests'], 4) if stats['requests'] else 0.0
+        stats['settings'] = dict(self._settings)
+        stats['accounts'] = sorted(self._sessions)
+        return stats
+
+
+# 全局实例
+vmos_http_client = VmosHttpClient()
+
+
+def on_pool_config_change(key: str, old_value: Any, new_value: Any):
+    """连接池配置变更回调"""
+    logger.info(f"VMOS连接池配置 {key} 已变更: {old_value} -> {new_value}")
+    vmos_http_client.reset()
@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from sqlalchemy import event
+
+try:
+    from greenlet import getcurrent
+except ImportError:
+    getcurrent = None
+
+# 连接持有时间分桶（毫秒）
+HOLD_BUCKETS_MS = (5, 20, 100, 500, 2000)
+
+# 持有连接期间发起外部调用的来源最多记录数量
+_MAX_SOURCES = 50
+
+
+def _ident() -> int:
+    """当前协程/线程标识；eventlet 未打补丁时同一线程中的协程也需要区分"""
+    return id(getcurrent()) if getcurrent else threading.get_ident()
+
+
+def _current_source() -> str:
+    """当前调用来源：请求中为接口名，否则为线程名"""
+    try:
+        from flask import has_request_context, request
+        if has_request_context() and request.endpoint:
+            return request.endpoint
+    except ImportError:
+        pass
+    return threading.current_thread().name
+
+
+class PoolMonitor:
+    """数据库连接池借出统计 - 记录每次借出的持有时间，以及持有连接期间发起的外部调用
+
+    借出和归还通过连接池事件记录；外部调用（VMOS 请求）发出前调用 note_external_call，
+    如果当前协程/线程仍持有连接，计入 external_calls_while_held 并记录来源接口。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines = set()
+        # 协程/线程标识 -> 持有的连接数
+        self._held: Dict[int, int] = {}
+
+        self._checkouts = 0
+        self._hold_total = 0.0
+        self._hold_max = 0.0
+        self._hold_max_source: Optional[str] = None
+        self._buckets = [0] * (len(HOLD_BUCKETS_MS) + 1)
+        self._external_calls = 0
+        self._external_calls_held = 0
+        self._held_sources: Dict[str, int] = {}
+
+    def attach(self, engine):
+        """注册连接池事件，同一引擎只注册一次"""
+        with self._lock:
+            if id(engine) in self._engines:
+                return
+            self._engines.add(id(engine))
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        ident = _ident()
+        connection_record.info['pool_monitor'] = (time.perf_counter(), ident, _current_source())
+        with self._lock:
+            self._held[ident] = self._held.get(ident, 0) + 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        checkout = connection_record.info.pop('pool_monitor', None)
+        if checkout is None:
+            return
+        started, ident, source = checkout
+        held = time.perf_counter() - started
+        held_ms = held * 1000
+        with self._lock:
+            remaining = self._held.get(ident, 0) - 1
+            if remaining > 0:
+                self._held[ident] = remaining
+            else:
+                self._held.pop(ident, None)
+            self._checkouts += 1
+            self._hold_total += held
+            if held > self._hold_max:
+                self._hold_max = held
+                self._hold_max_source = source
+            index = next((i for i, bound in enumerate(HOLD_BUCKETS_MS) if held_ms <= bound), len(HOLD_BUCKETS_MS))
+            self._buckets[index] += 1
+
+    def note_external_call(self, name: str):
+        """外部网络调用发出前调用，检查当前协程/线程是否仍持有数据库连接"""
+        ident = _ident()
+        with self._lock:
+            self._external_calls += 1
+            if not self._held.get(ident):
+                return
+            self._external_calls_held += 1
+            source = _current_source()
+            if source in self._held_sources or len(self._held_sources) < _MAX_SOURCES:
+                self._held_sources[source] = self._held_sources.get(source, 0) + 1
+        logger.debug(f"{source} 持有数据库连接时调用了 {name}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f'<={bound}ms' for bound in HOLD_BUCKETS_MS] + [f'>{HOLD_BUCKETS_MS[-1]}ms']
+            return {
+                'checked_out': sum(self._held.values()),
+                'checkouts': self._checkouts,
+                'hold_avg_ms': round(self._hold_total / self._checkouts * 1000, 2) if self._checkouts else 0.0,
+                'hold_max_ms': round(self._hold_max * 1000, 2),
+                'hold_max_source': self._hold_max_source,
+                'hold_histogram': dict(zip(labels, self._buckets)),
+                'external_calls': self._external_calls,
+                'external_calls_while_held': self._external_calls_held,
+                'external_calls_while_held_by_source': dict(self._held_sources),
+            }
+
+
+# 创建全局实例
+pool_monitor = PoolMonitor()
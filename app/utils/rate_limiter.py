@@ -0,0 +1,163 @@
+import bisect
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.utils.dynamic_config import get_setting
+
+# 默认限速：每秒请求数, 突发容量；可通过 VMOS_RATE_LIMITS 按接口路径覆盖
+# 例如 {"default": [20, 40], "/vcpcloud/api/padApi/stopApp": [10, 20]}
+DEFAULT_RATE_LIMITS = {'default': [20, 40]}
+
+# 等待时间直方图的桶上界（毫秒）
+WAIT_BUCKETS_MS = [0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+def parse_limit(value: Any) -> Tuple[float, float]:
+    """解析单条限速配置 [每秒请求数, 突发容量]，格式不正确时抛出 ValueError"""
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError(f'限速配置应为 [每秒请求数, 突发容量]: {value!r}')
+    try:
+        rate, burst = float(value[0]), float(value[1])
+    except (TypeError, ValueError):
+        raise ValueError(f'限速配置应为数字: {value!r}')
+    if rate <= 0 or burst <= 0:
+        raise ValueError(f'限速配置必须大于0: {value!r}')
+    return rate, burst
+
+
+def validate_rate_limits(raw: Any) -> Dict[str, Tuple[float, float]]:
+    """校验整份限速配置 {"路径或default": [每秒请求数, 突发容量]}，格式不正确时抛出 ValueError"""
+    if not isinstance(raw, dict):
+        raise ValueError('限速配置应为对象，例如 {"default": [20, 40]}')
+    return {str(path): parse_limit(value) for path, value in raw.items()}
+
+
+class TokenBucket:
+    """令牌桶 - 按到达顺序预约令牌，令牌不足时排队等待而不是失败"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = max(float(rate), 0.001)
+        self.burst = max(float(burst), 1.0)
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._acquired = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数（先到先得）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._updated_at) * self.rate, self.burst)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+            wait_ms = wait * 1000
+            self._histogram[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self._acquired += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            return wait
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f'<={bound}ms' for bound in WAIT_BUCKETS_MS] + [f'>{WAIT_BUCKETS_MS[-1]}ms']
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'acquired': self._acquired,
+                'wait_avg_ms': round(self._wait_total / self._acquired * 1000, 2) if self._acquired else 0.0,
+                'wait_max_ms': round(self._wait_max * 1000, 2),
+                'wait_histogram': dict(zip(labels, self._histogram)),
+            }
+
+
+class RateLimiter:
+    """按账号和接口路径划分的出站限速器，配置变化时自动重建令牌桶"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._raw_setting: Optional[str] = None
+        self._limits: Dict[str, Tuple[float, float]] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def _parse_entries(overrides: Any, source: str) -> Dict[str, Tuple[float, float]]:
+        """逐条解析限速配置，无效的条目跳过并记录警告"""
+        if not isinstance(overrides, dict):
+            logger.warning(f"{source} 配置无效，使用默认限速: {overrides!r}")
+            return {}
+        limits = {}
+        for path, value in overrides.items():
+            try:
+                limits[str(path)] = parse_limit(value)
+            except ValueError as e:
+                logger.warning(f"{source} 中 {path} 的配置无效，已忽略: {e}")
+        return limits
+
+    def _parse(self, raw: Any) -> Dict[str, Tuple[float, float]]:
+        limits = {path: parse_limit(value) for path, value in DEFAULT_RATE_LIMITS.items()}
+        if raw:
+            try:
+                overrides = json.loads(raw) if isinstance(raw, str) else raw
+            except (TypeError, ValueError) as e:
+                logger.warning(f"VMOS_RATE_LIMITS 配置无效，使用默认限速: {e}")
+                overrides = {}
+            limits.update(self._parse_entries(overrides, 'VMOS_RATE_LIMITS'))
+        return limits
+
+    def _bucket_for(self, path: str, account: str, overrides: Optional[Dict[str, Any]]) -> TokenBucket:
+        raw = get_setting('VMOS_RATE_LIMITS')
+        raw_key = raw if isinstance(raw, str) else json.dumps(raw, sort_keys=True)
+        with self._lock:
+            if raw_key != self._raw_setting:
+                self._limits = self._parse(raw)
+                self._buckets = {}
+                self._raw_setting = raw_key
+
+            limits = self._limits
+            if overrides:
+                limits = {**limits, **self._parse_entries(overrides, f'VMOS账号 {account} 的 rate_limits')}
+
+            # 未单独配置的接口共享 default 令牌桶；每个VMOS账号各自独立计量
+            limit_key = path if path in limits else 'default'
+            bucket_key = f'{account}:{limit_key}'
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                bucket = self._buckets[bucket_key] = TokenBucket(*limits[limit_key])
+            return bucket
+
+    def acquire(self, path: str, account: str = 'default', overrides: Optional[Dict[str, Any]] = None) -> float:
+        """获取指定账号、指定接口的发送许可，必要时排队等待，返回等待秒数
+
+        overrides: 该账号专属的限速配置，格式同 VMOS_RATE_LIMITS
+        """
+        return self._bucket_for(path, account, overrides).acquire()
+
+    def reset(self):
+        """丢弃全部令牌桶，下次请求时按最新配置重建"""
+        with self._lock:
+            self._raw_setting = None
+            self._buckets = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buckets: List[Tuple[str, TokenBucket]] = list(self._buckets.items())
+        return {key: bucket.get_stats() for key, bucket in buckets}
+
+
+# 全局实例
+vmos_rate_limiter = RateLimiter()
@@ -0,0 +1,165 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple, Type
+
+from loguru import logger
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开时快速失败"""
+
+
+class CircuitBreaker:
+    """熔断器 - 连续失败达到阈值后打开，冷却后放行一次试探请求"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+        self._total_failures = 0
+        self._rejected = 0
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_call(self):
+        """请求前检查，熔断中则抛出 CircuitOpenError"""
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} 熔断中，请稍后重试")
+                self._state = self.HALF_OPEN
+                logger.info(f"熔断器 {self.name} 进入半开状态")
+
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} 正在试探恢复，请稍后重试")
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"熔断器 {self.name} 已恢复")
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._total_failures += 1
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                    logger.warning(f"熔断器 {self.name} 已打开，连续失败 {self._consecutive_failures} 次")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """只释放半开状态的试探名额，不改变熔断状态和连续失败计数"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = 0.0
+            if self._state == self.OPEN:
+                retry_in = max(self.recovery_timeout - (time.monotonic() - self._opened_at), 0.0)
+            return {
+                'state': self._state,
+                'consecutive_failures': self._consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'recovery_timeout': self.recovery_timeout,
+                'retry_in_seconds': round(retry_in, 1),
+                'total_failures': self._total_failures,
+                'rejected': self._rejected,
+                'times_opened': self._times_opened,
+            }
+
+
+class RetryBudget:
+    """重试预算 - 每次请求存入 ratio 个令牌，每次重试消耗一个，防止重试放大故障"""
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._exhausted = 0
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._retries += 1
+                return True
+            self._exhausted += 1
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'tokens': round(self._tokens, 2),
+                'retries': self._retries,
+                'budget_exhausted': self._exhausted,
+            }
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 10) -> float:
+    """指数退避 + 全抖动"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def call_with_retry(func: Callable[[], Any], breaker: CircuitBreaker, budget: RetryBudget,
+                    retryable: Tuple[Type[BaseException], ...], max_retries: int = 0,
+                    backoff_base: float = 0.5) -> Any:
+    """经过熔断器调用 func，可重试的异常在预算内按退避重试"""
+    budget.deposit()
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = func()
+        except retryable as e:
+            breaker.record_failure()
+            if attempt >= max_retries or not budget.try_spend():
+                raise
+            delay = backoff_delay(attempt, backoff_base)
+            attempt += 1
+            logger.warning(f"{breaker.name} 请求失败，{delay:.2f}s 后第 {attempt} 次重试: {e}")
+            time.sleep(delay)
+            continue
+        except Exception:
+            # 非可重试异常（如业务错误、响应解析失败）既不算失败也不算成功，只释放试探名额
+            breaker.release_trial()
+            raise
+        breaker.record_success()
+        return result
@@ -0,0 +1,192 @@
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.utils.dynamic_config import get_setting
+
+DEFAULT_KEY_NAME = 'default'
+CREDENTIAL_POOL_KEY = 'VMOS_CREDENTIAL_POOL'
+
+# 没有padCodes、需要汇总所有账号结果的接口
+FAN_OUT_ENDPOINTS = {'/vcpcloud/api/padApi/userPadList'}
+
+
+class VmosCredential:
+    """一组VMOS访问凭证及其名下的机器"""
+
+    def __init__(self, name: str, access_key: str, secret_access: str,
+                 pad_codes: Optional[List[str]] = None, rate_limits: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.access_key = access_key
+        self.secret_access = secret_access
+        self.pad_codes = set(pad_codes or [])
+        self.rate_limits = rate_limits or None
+
+    def to_dict(self, include_pads: bool = False) -> Dict[str, Any]:
+        data = {
+            'name': self.name,
+            'access_key': f'{self.access_key[:4]}***' if self.access_key else '',
+            'pad_count': len(self.pad_codes),
+            'rate_limits': self.rate_limits,
+        }
+        if include_pads:
+            data['pad_codes'] = sorted(self.pad_codes)
+        return data
+
+
+def parse_pool(raw: Any) -> List[Dict[str, Any]]:
+    """解析凭证池配置，格式为 [{"name", "access_key", "secret_access", "pad_codes", "rate_limits"}]"""
+    if not raw:
+        return []
+    try:
+        entries = json.loads(raw) if isinstance(raw, str) else raw
+    except ValueError as e:
+        logger.error(f"{CREDENTIAL_POOL_KEY} 配置无效: {e}")
+        return []
+    return [entry for entry in entries if isinstance(entry, dict) and entry.get('name')]
+
+
+class VmosKeyPool:
+    """多账号VMOS凭证池 - 按机器归属把请求路由到对应账号"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._raw_setting: Optional[str] = None
+        self._extra: Dict[str, VmosCredential] = {}
+        self._owner: Dict[str, str] = {}
+        self._usage: Dict[str, Dict[str, int]] = {}
+
+    def _load(self):
+        raw = get_setting(CREDENTIAL_POOL_KEY)
+        raw_key = raw if isinstance(raw, str) else json.dumps(raw, sort_keys=True)
+        with self._lock:
+            if raw_key == self._raw_setting:
+                return
+            extra, owner = {}, {}
+            for entry in parse_pool(raw):
+                if entry['name'] == DEFAULT_KEY_NAME:
+                    continue
+                credential = VmosCredential(
+                    name=entry['name'],
+                    access_key=entry.get('access_key', ''),
+                    secret_access=entry.get('secret_access', ''),
+                    pad_codes=entry.get('pad_codes'),
+                    rate_limits=entry.get('rate_limits'),
+                )
+                extra[credential.name] = credential
+                for pad_code in credential.pad_codes:
+                    owner[pad_code] = credential.name
+            self._extra, self._owner = extra, owner
+            self._raw_setting = raw_key
+
+    def default_credential(self) -> VmosCredential:
+        """默认账号即 ACCESS_KEY/SECRET_ACCESS"""
+        from app.utils.auth import _get_dynamic_credentials
+        access_key, secret_access = _get_dynamic_credentials()
+        return VmosCredential(DEFAULT_KEY_NAME, access_key, secret_access)
+
+    def credentials(self) -> List[VmosCredential]:
+        self._load()
+        with self._lock:
+            extra = list(self._extra.values())
+        return [self.default_credential()] + extra
+
+    def route(self, path: str, data: Dict[str, Any]) -> Optional[List[Tuple[VmosCredential, Dict[str, Any]]]]:
+        """把请求按账号拆分，返回 [(凭证, 请求体)]；只有默认账号时返回 None 走原有路径"""
+        self._load()
+        with self._lock:
+            if not self._extra:
+                return None
+            extra, owner = dict(self._extra), dict(self._owner)
+
+        default = self.default_credential()
+        if 'padCodes' in data:
+            groups: Dict[str, List[str]] = {}
+            for pad_code in data['padCodes']:
+                groups.setdefault(owner.get(pad_code, DEFAULT_KEY_NAME), []).append(pad_code)
+            return [
+                (extra.get(name, default), dict(data, padCodes=pad_codes))
+                for name, pad_codes in groups.items()
+            ]
+        if 'padCode' in data:
+            return [(extra.get(owner.get(data['padCode'], DEFAULT_KEY_NAME), default), data)]
+        if path in FAN_OUT_ENDPOINTS:
+            return [(default, data)] + [(credential, data) for credential in extra.values()]
+        return [(default, data)]
+
+    def record(self, name: str, pads: int, success: bool):
+        """记录单个账号的使用情况"""
+        with self._lock:
+            usage = self._usage.setdefault(name, {'requests': 0, 'errors': 0, 'pads': 0})
+            usage['requests'] += 1
+            usage['pads'] += pads
+            if not success:
+                usage['errors'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        credentials = self.credentials()
+        with self._lock:
+            usage = {name: dict(values) for name, values in self._usage.items()}
+        return {
+            credential.name: credential.to_dict() | {
+                'usage': usage.get(credential.name, {'requests': 0, 'errors': 0, 'pads': 0})
+            } for credential in credentials
+        }
+
+    def invalidate(self):
+        with self._lock:
+            self._raw_setting = None
+
+
+def _body_pad_codes(body: Dict[str, Any]) -> List[str]:
+    return list(body.get('padCodes') or ([body['padCode']] if body.get('padCode') else []))
+
+
+def merge_responses(results: List[Tuple[Dict[str, Any], Any]]) -> Dict[str, Any]:
+    """合并按账号拆分后的多个VMOS返回，results 为 [(请求体, 返回或异常)]
+
+    各账号的结果按机器保留在 pad_results 中（{padCode: {"code", "msg", "data"}}），
+    一个账号失败不会影响其他账号名下机器的结果；顶层 code 只在所有账号都成功时为 200。
+    """
+    merged: Dict[str, Any] = {'code': 200, 'msg': 'success', 'data': [], 'pad_results': {}}
+    for body, response in results:
+        if isinstance(response, Exception):
+            code, msg, items = None, str(response), []
+        elif isinstance(response, dict):
+            code, msg = response.get('code'), response.get('msg')
+            data = response.get('data')
+            items = data if isinstance(data, list) else ([] if data is None else [data])
+        else:
+            code, msg, items = None, f'无效的VMOS返回: {response!r}', []
+
+        failed = isinstance(response, Exception) or not isinstance(response, dict) or code not in (None, 200)
+        if failed:
+            if merged['code'] == 200:
+                merged['code'] = code or 500
+                merged['msg'] = msg
+        else:
+            merged['data'].extend(items)
+
+        by_pad = {item.get('padCode'): item for item in items if isinstance(item, dict)}
+        for pad_code in _body_pad_codes(body):
+            merged['pad_results'][pad_code] = {
+                'code': (code or 500) if failed else 200,
+                'msg': msg if failed else 'success',
+                'data': None if failed else by_pad.get(pad_code),
+            }
+    return merged
+
+
+# 全局实例
+vmos_key_pool = VmosKeyPool()
+
+
+def on_credential_pool_change(key: str, old_value: Any, new_value: Any):
+    """凭证池变更回调 - 重新加载账号并按新配额重建限速器和连接池"""
+    from app.utils.http_pool import vmos_http_client
+    from app.utils.rate_limiter import vmos_rate_limiter
+    vmos_key_pool.invalidate()
+    vmos_rate_limiter.reset()
+    vmos_http_client.reset()
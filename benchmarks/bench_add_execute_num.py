@@ -0,0 +1,115 @@
+"""/api/add_execute_num 并发基准：对比旧的 ORM 读-改-写 与新的条件 UPDATE ... RETURNING
+
+在 DATABASE_URL 指向的库中创建一条临时 UrlData，多线程同时执行计数，检查:
+  - 最终 current_count 不超过 max_num
+  - 成功次数与实际增加的计数一致（旧实现在并发下会丢失更新）
+并输出两种实现的每秒请求数。结束后删除临时数据。
+旧实现只作对照；新实现不满足任一条件时以非零状态退出。
+
+用法: python -m benchmarks.bench_add_execute_num [--threads 16] [--requests 4000] [--max-num 2000]
+"""
+import argparse
+import sys
+import threading
+import time
+
+from app import create_app, db
+from app.models import UrlData
+
+
+def legacy_execute(url_id: int) -> bool:
+    """旧实现：加载整行，Python 中判断并自增后提交"""
+    url = db.session.get(UrlData, url_id)
+    if not url or not url.can_execute():
+        db.session.rollback()
+        return False
+    if not url.is_running:
+        url.start_running()
+    url.execute()
+    db.session.commit()
+    url.to_dict()
+    return True
+
+
+def atomic_execute(url_id: int) -> bool:
+    """新实现：数据库端条件自增"""
+    url = UrlData.execute_atomic(url_id)
+    if not url:
+        db.session.rollback()
+        return False
+    db.session.commit()
+    url.to_dict()
+    return True
+
+
+def run(app, func, url_id: int, threads: int, total: int) -> dict:
+    per_thread = total // threads
+    successes = [0] * threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        with app.app_context():
+            barrier.wait()
+            for _ in range(per_thread):
+                if func(url_id):
+                    successes[index] += 1
+            db.session.remove()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        url = db.session.get(UrlData, url_id)
+        return {
+            'requests': per_thread * threads,
+            'elapsed': elapsed,
+            'req_per_sec': per_thread * threads / elapsed,
+            'successes': sum(successes),
+            'current_count': url.current_count,
+            'max_num': url.max_num,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='add_execute_num 并发基准')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--max-num', type=int, default=2000)
+    args = parser.parse_args()
+
+    app = create_app()
+    failures = []
+    for name, func in [('legacy', legacy_execute), ('atomic', atomic_execute)]:
+        with app.app_context():
+            url = UrlData(url='https://t.me/bench', name=f'bench-{name}', max_num=args.max_num, current_count=0)
+            db.session.add(url)
+            db.session.commit()
+            url_id = url.id
+
+        try:
+            result = run(app, func, url_id, args.threads, args.requests)
+        finally:
+            with app.app_context():
+                UrlData.query.filter_by(id=url_id).delete()
+                db.session.commit()
+
+        lost = result['successes'] - result['current_count']
+        ok = result['current_count'] <= result['max_num'] and lost == 0
+        print(f"{name:7s} {result['req_per_sec']:9.1f} req/s  "
+              f"successes={result['successes']} current_count={result['current_count']} "
+              f"max_num={result['max_num']} lost_updates={lost}  {'OK' if ok else 'INCONSISTENT'}")
+        if name == 'atomic' and not ok:
+            failures.append(name)
+
+    if failures:
+        sys.exit(f"{', '.join(failures)} 计数不一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""并发基准：批量启停执行期间，N 个仪表盘和 M 个设备轮询的请求延迟
+
+分别以 EVENTLET_MONKEY_PATCH=false / true 启动服务子进程（与 run.py 的生产启动方式一致），
+VMOS 接口指向本地模拟器。N 个仪表盘循环请求 /api/machines，M 个设备循环请求 /api/config，
+预热后管理员依次提交 batch-start、执行 batch-stop 并逐台调用 /api/start（同步等待 VMOS），
+统计批量操作期间与空闲时的请求延迟，以及 /api/metrics 中的连接池持有统计。在 DATABASE_URL 指向的库中创建临时机器和用户，结束后删除。
+
+用法: python -m benchmarks.bench_concurrency [--dashboards 10] [--devices 50] [--interval 0.5] [--machines 40]
+      [--vmos-latency-ms 300]
+"""
+import os
+import sys
+
+# 服务子进程与 run.py 一致：必须在导入其他模块之前决定是否打补丁
+if '--serve' in sys.argv and os.getenv('EVENTLET_MONKEY_PATCH', 'true').lower() == 'true':
+    import eventlet
+
+    eventlet.monkey_patch()
+
+import argparse
+import json
+import subprocess
+import threading
+import time
+
+TOKEN = 'bench-concurrency'
+ACCESS_KEY = 'bench-access-key'
+SECRET = 'bench-secret'
+PASSWORD = 'bench-password'
+
+
+def serve(args):
+    """服务子进程：VMOS 指向模拟器后启动 Socket.IO 服务"""
+    from app import create_app, socketio
+    from app.utils.dynamic_config import set_dynamic_config
+
+    app = create_app()
+    with app.app_context():
+        set_dynamic_config('VMOS_BASE_URL', f'http://127.0.0.1:{args.emulator_port}')
+        set_dynamic_config('ACCESS_KEY', ACCESS_KEY)
+        set_dynamic_config('SECRET_ACCESS', SECRET)
+    socketio.run(app, host='127.0.0.1', port=args.port, log_output=False)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def wait_ready(base_url: str, timeout: float = 30):
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'{base_url}/auth/login', timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f'服务未能在 {timeout}s 内启动: {base_url}')
+
+
+def run_load(args, base_url: str, machines, username: str):
+    """施加负载，返回 {客户端类型: [(开始, 结束)]} 和批量操作时间窗口"""
+    import requests
+
+    samples = {'dashboard': [], 'device': []}
+    samples_lock = threading.Lock()
+    stop = threading.Event()
+
+    def login():
+        http = requests.Session()
+        http.post(f'{base_url}/auth/login', data={'username': username, 'password': PASSWORD}, timeout=60)
+        return http
+
+    def loop(kind, http, url, **kwargs):
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                http.get(url, timeout=60, **kwargs).raise_for_status()
+            except requests.RequestException:
+                continue
+            with samples_lock:
+                samples[kind].append((started, time.perf_counter()))
+            time.sleep(args.interval)
+
+    threads = []
+    for _ in range(args.dashboards):
+        threads.append(threading.Thread(target=loop, args=('dashboard', login(), f'{base_url}/api/machines')))
+    for index in range(args.devices):
+        pade_code = machines[index % len(machines)]['pade_code']
+        threads.append(threading.Thread(target=loop, args=(
+            'device', requests.Session(), f'{base_url}/api/config?pade_code={pade_code}'
+        ), kwargs={'headers': {'token': f'Bearer {TOKEN}'}}))
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    time.sleep(args.warmup)
+    admin = login()
+    machine_ids = [machine['id'] for machine in machines]
+    window = {'start': time.perf_counter()}
+    admin.post(f'{base_url}/api/machines/batch-start', json={'machine_ids': machine_ids}, timeout=120)
+    admin.post(f'{base_url}/api/machines/batch-stop', json={'machine_ids': machine_ids}, timeout=120)
+    for machine in machines[:args.single_starts]:
+        admin.post(f'{base_url}/api/start', json={'pade_code': machine['pade_code']}, timeout=120)
+    window['end'] = time.perf_counter()
+    time.sleep(args.warmup)
+
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=60)
+    db_pool = admin.get(f'{base_url}/api/metrics', timeout=60).json().get('db_pool', {})
+    return samples, window, db_pool
+
+
+def summarize(samples, window, db_pool):
+    result = {'db_pool': {key: db_pool.get(key) for key in (
+        'checkouts', 'hold_avg_ms', 'hold_max_ms', 'hold_max_source', 'external_calls', 'external_calls_while_held',
+        'external_calls_while_held_by_source')}}
+    for kind, values in samples.items():
+        during = [end - start for start, end in values if start <= window['end'] and end >= window['start']]
+        idle = [end - start for start, end in values if end < window['start'] or start > window['end']]
+        result[kind] = {
+            'idle_p50_ms': round(percentile(idle, 0.5) * 1000, 1),
+            'during_requests': len(during),
+            'during_p50_ms': round(percentile(during, 0.5) * 1000, 1),
+            'during_p99_ms': round(percentile(during, 0.99) * 1000, 1),
+            'during_max_ms': round(max(during, default=0) * 1000, 1),
+        }
+    result['batch_s'] = round(window['end'] - window['start'], 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量操作期间的并发请求延迟基准')
+    parser.add_argument('--dashboards', type=int, default=10)
+    parser.add_argument('--devices', type=int, default=50)
+    parser.add_argument('--machines', type=int, default=40)
+    parser.add_argument('--interval', type=float, default=0.5, help='每个客户端两次请求之间的间隔（秒）')
+    parser.add_argument('--single-starts', type=int, default=5, help='逐台调用 /api/start 的机器数')
+    parser.add_argument('--vmos-latency-ms', type=int, default=300)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--port', type=int, default=5071)
+    parser.add_argument('--emulator-port', type=int, default=8971)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    from app import create_app, db
+    from app.models import User
+    from app.models.config_data import ConfigData
+
+    app = create_app()
+    prefix = f'BENCH-CC-{os.getpid()}'
+    with app.app_context():
+        user = User(username=prefix.lower(), password_hash=User.hash_password(PASSWORD),
+                    email=f'{prefix.lower()}@example.com', is_admin=True)
+        db.session.add(user)
+        configs = [ConfigData(pade_code=f'{prefix}-{i}', name=f'bench {i}', message='bench', is_active=True)
+                   for i in range(args.machines)]
+        db.session.add_all(configs)
+        db.session.commit()
+        user_id = user.id
+        machines = [{'id': config.id, 'pade_code': config.pade_code} for config in configs]
+
+    emulator = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.vmos_emulator', '--port', str(args.emulator_port),
+         '--access-key', ACCESS_KEY, '--secret', SECRET, '--latency-ms', f'fixed:{args.vmos_latency_ms}'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{args.port}'
+    results = {}
+    try:
+        for patched in ('false', 'true'):
+            env = dict(os.environ, EVENTLET_MONKEY_PATCH=patched, API_SECRET_TOKEN=TOKEN)
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.bench_concurrency', '--serve', '--port', str(args.port),
+                 '--emulator-port', str(args.emulator_port)],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_ready(base_url)
+                results[patched] = summarize(*run_load(args, base_url, machines, prefix.lower()))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+    finally:
+        emulator.terminate()
+        emulator.wait(timeout=30)
+        with app.app_context():
+            ConfigData.query.filter(ConfigData.id.in_([machine['id'] for machine in machines])).delete(
+                synchronize_session=False)
+            db.session.delete(db.session.get(User, user_id))
+            db.session.commit()
+
+    print(f'仪表盘 {args.dashboards} 个, 设备 {args.devices} 个, 机器 {args.machines} 台, '
+          f'VMOS 延迟 {args.vmos_latency_ms} ms')
+    for patched, result in results.items():
+        print(f'\nEVENTLET_MONKEY_PATCH={patched}  批量操作耗时 {result["batch_s"]}s')
+        for kind in ('dashboard', 'device'):
+            stats = result[kind]
+            print(f'  {kind:<9} 空闲 p50 {stats["idle_p50_ms"]:>7} ms | 批量期间 {stats["during_requests"]:>5} 次  '
+                  f'p50 {stats["during_p50_ms"]:>7} ms  p99 {stats["during_p99_ms"]:>7} ms  '
+                  f'max {stats["during_max_ms"]:>7} ms')
+        pool = result['db_pool']
+        print(f'  db_pool   连接借出 {pool["checkouts"]} 次, 平均持有 {pool["hold_avg_ms"]} ms, '
+              f'最长 {pool["hold_max_ms"]} ms ({pool["hold_max_source"]}), '
+              f'VMOS 调用 {pool["external_calls"]} 次, 其中持有连接时 {pool["external_calls_while_held"]} 次 '
+              f'{pool["external_calls_while_held_by_source"] or ""}')
+    print(json.dumps(results, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
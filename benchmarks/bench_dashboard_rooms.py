@@ -0,0 +1,103 @@
+"""仪表盘房间基准：按机器房间推送与全量广播的出站 WebSocket 流量对比
+
+在进程内用 Socket.IO 测试客户端模拟 N 个已登录的仪表盘，每个关注 K 台机器（共 M 台）。
+对每台机器产生若干 URL 事件（经 url_events 汇总为 urls_batch）、一条 status_updated 和一条
+machine_info_update，统计各仪表盘实际收到的帧数和字节数，与广播模式（每个仪表盘收到全部帧）对比。
+不写数据库。
+
+用法: python -m benchmarks.bench_dashboard_rooms [--dashboards 50] [--watch 2] [--machines 200] [--urls 20]
+"""
+import argparse
+import json
+import random
+
+
+def payload_size(packets) -> int:
+    return sum(len(json.dumps(packet['args'], ensure_ascii=False)) for packet in packets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='仪表盘房间推送流量基准')
+    parser.add_argument('--dashboards', type=int, default=50)
+    parser.add_argument('--watch', type=int, default=2, help='每个仪表盘关注的机器数')
+    parser.add_argument('--machines', type=int, default=200)
+    parser.add_argument('--urls', type=int, default=20, help='每台机器产生 URL 事件的数量')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    from app import create_app, socketio
+    from app.services.dashboard_channel import dashboard_rooms
+    from app.services.url_events import make_delta, url_events
+
+    app = create_app()
+    rng = random.Random(args.seed)
+
+    # 未登录的连接应被拒绝
+    anonymous = socketio.test_client(app)
+    assert not anonymous.is_connected(), '未登录的连接没有被拒绝'
+
+    clients = []
+    for index in range(args.dashboards):
+        http = app.test_client()
+        with http.session_transaction() as session:
+            session['user_id'] = index + 1
+        client = socketio.test_client(app, flask_test_client=http)
+        assert client.is_connected()
+        watched = rng.sample(range(1, args.machines + 1), args.watch)
+        client.emit('watch_configs', {'config_ids': watched}, callback=True)
+        client.get_received()
+        clients.append(client)
+
+    # 记录每一帧的负载大小（包括无人关注而未发出的帧），用于计算广播模式下的流量
+    frame_sizes = []
+    emit_configs, emit_fleet = dashboard_rooms.emit_configs, dashboard_rooms.emit_fleet
+
+    def recording_emit_configs(event, config_ids, data):
+        frame_sizes.append(len(json.dumps([data], ensure_ascii=False)))
+        emit_configs(event, config_ids, data)
+
+    def recording_emit_fleet(event, data):
+        frame_sizes.append(len(json.dumps([data], ensure_ascii=False)))
+        emit_fleet(event, data)
+
+    dashboard_rooms.emit_configs, dashboard_rooms.emit_fleet = recording_emit_configs, recording_emit_fleet
+    try:
+        with app.app_context():
+            for config_id in range(1, args.machines + 1):
+                for url_index in range(args.urls):
+                    url_id = config_id * 1000 + url_index
+                    url_events.emit('url_started', make_delta(url_id, config_id, {
+                        'is_running': True, 'started_at': '2024-01-01T00:00:00', 'stopped_at': None,
+                    }))
+                url_id = config_id * 1000
+                dashboard_rooms.emit_config('status_updated', config_id, make_delta(url_id, config_id, {'status': 'ok'}))
+                dashboard_rooms.emit_fleet('machine_info_update', {
+                    'machine_id': config_id, 'is_running': True, 'phone_number': None
+                })
+            url_events.flush()
+            url_events.stop()
+    finally:
+        dashboard_rooms.emit_configs, dashboard_rooms.emit_fleet = emit_configs, emit_fleet
+
+    received = [client.get_received() for client in clients]
+    received_frames = sum(len(packets) for packets in received)
+    received_bytes = sum(payload_size(packets) for packets in received)
+    for client in clients:
+        client.disconnect()
+
+    # 广播模式下每个仪表盘都会收到每一帧
+    stats = dashboard_rooms.get_stats()
+    broadcast_frames = len(frame_sizes) * args.dashboards
+    broadcast_bytes = sum(frame_sizes) * args.dashboards
+
+    print(f'仪表盘 {args.dashboards} 个，每个关注 {args.watch} 台，共 {args.machines} 台机器，每台 {args.urls} 个URL事件')
+    print(f'  产生帧 {len(frame_sizes)}')
+    print(f'  广播模式  送达 {broadcast_frames:>8} 帧  {broadcast_bytes / 1024:>10.1f} KiB')
+    print(f'  房间模式  送达 {received_frames:>8} 帧  {received_bytes / 1024:>10.1f} KiB')
+    print(f'  减少      帧 {(1 - received_frames / broadcast_frames) * 100:.1f}%  '
+          f'字节 {(1 - received_bytes / broadcast_bytes) * 100:.1f}%')
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
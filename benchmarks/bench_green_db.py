@@ -0,0 +1,127 @@
+"""协程数据库模式基准：一条慢查询执行期间，其他并发请求的延迟
+
+分别以 DB_GREEN_MODE=false（psycopg2 阻塞 eventlet hub）和 DB_GREEN_MODE=true（等待回调让出 hub）
+启动子进程。子进程在 DATABASE_URL 指向的库中创建一台临时机器，N 个协程循环请求
+/api/config?since=...（每次都查库），期间另一个协程执行 pg_sleep 慢查询，统计慢查询期间的请求延迟。
+结束后删除临时数据。
+
+用法: python -m benchmarks.bench_green_db [--clients 20] [--slow 2.0] [--urls 50]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+TOKEN = 'bench-green-db'
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def run_child(args):
+    # 与 run.py 一致：先打补丁再导入应用，协程数据库模式只在打过补丁的进程中启用。
+    # 不让 eventlet 自带的 psycopg 补丁安装等待回调，是否让出 hub 只由 DB_GREEN_MODE 决定
+    import eventlet
+    eventlet.monkey_patch(psycopg=False)
+    from sqlalchemy import text
+
+    from app import create_app, db
+    from app.models import UrlData
+    from app.models.config_data import ConfigData
+    from app.utils import green_db
+
+    app = create_app()
+    pade_code = f'BENCH-GREEN-{os.getpid()}'
+    with app.app_context():
+        config = ConfigData(pade_code=pade_code, message='bench', name='bench')
+        db.session.add(config)
+        db.session.flush()
+        for i in range(args.urls):
+            db.session.add(UrlData(config_id=config.id, url=f'https://t.me/bench_{i}', name=f'bench {i}'))
+        db.session.commit()
+        config_id = config.id
+
+    latencies = []
+    window = {}
+    stop = []
+
+    def client():
+        http = app.test_client()
+        # 延迟从计划发出请求的时间算起，包含 hub 被阻塞时的排队时间
+        due = time.perf_counter()
+        while not stop:
+            response = http.get(f'/api/config?pade_code={pade_code}&since=0', headers={'token': f'Bearer {TOKEN}'})
+            finished = time.perf_counter()
+            assert response.status_code == 200, response.status_code
+            latencies.append((due, finished - due))
+            eventlet.sleep(0.01)
+            due = finished + 0.01
+
+    def slow_query():
+        with app.app_context():
+            window['start'] = time.perf_counter()
+            db.session.execute(text('SELECT pg_sleep(:seconds)'), {'seconds': args.slow})
+            db.session.rollback()
+            window['end'] = time.perf_counter()
+
+    try:
+        clients = [eventlet.spawn(client) for _ in range(args.clients)]
+        eventlet.sleep(0.3)
+        eventlet.spawn(slow_query).wait()
+        eventlet.sleep(0.3)
+        stop.append(True)
+        for greenlet in clients:
+            greenlet.wait()
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(ConfigData, config_id))
+            db.session.commit()
+
+    during = [latency for due, latency in latencies if window['start'] <= due + latency and due <= window['end']]
+    print(json.dumps({
+        'green': green_db.is_installed(),
+        'slow_query_s': round(window['end'] - window['start'], 3),
+        'requests_during_slow_query': len(during),
+        'p50_ms': round(percentile(during, 0.5) * 1000, 1),
+        'p99_ms': round(percentile(during, 0.99) * 1000, 1),
+        'max_ms': round(max(during, default=0) * 1000, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='协程数据库模式基准')
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--slow', type=float, default=2.0)
+    parser.add_argument('--urls', type=int, default=50)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    for green in ('false', 'true'):
+        env = dict(os.environ, DB_GREEN_MODE=green, API_SECRET_TOKEN=TOKEN)
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_green_db', '--child', '--clients', str(args.clients),
+             '--slow', str(args.slow), '--urls', str(args.urls)],
+            env=env, capture_output=True, text=True
+        )
+        lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+        if output.returncode != 0 or not lines:
+            print(output.stderr[-2000:])
+            sys.exit(f'DB_GREEN_MODE={green} 运行失败')
+        result = json.loads(lines[-1])
+        print(f"DB_GREEN_MODE={green:<5}  慢查询 {result['slow_query_s']}s 期间完成请求 "
+              f"{result['requests_during_slow_query']:>5}  p50 {result['p50_ms']:>7} ms  "
+              f"p99 {result['p99_ms']:>7} ms  max {result['max_ms']:>7} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""URL增量推送基准：完整 to_dict 快照与字段级增量的序列化耗时和负载大小对比
+
+在内存中构造 N 个运行中的 URL 对象（不写数据库），分别按旧格式（url_data 为完整 to_dict）和
+新格式（make_delta，只含变化字段）生成 url_executed / status_updated 事件负载，统计生成耗时和 JSON 大小。
+
+用法: python -m benchmarks.bench_url_deltas [--urls 5000] [--rounds 5]
+"""
+import argparse
+import datetime
+import json
+import time
+
+
+def measure(build, urls, rounds):
+    """返回 (每条负载平均耗时微秒, 每条负载平均字节数)"""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        payloads = [build(url) for url in urls]
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    size = sum(len(json.dumps(payload, ensure_ascii=False)) for payload in payloads)
+    return best / len(urls) * 1e6, size / len(urls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='URL增量推送基准')
+    parser.add_argument('--urls', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.models import UrlData
+    from app.services.url_events import EXECUTE_FIELDS, url_delta
+
+    app = create_app()
+    now = datetime.datetime.now()
+    with app.app_context():
+        urls = [UrlData(id=i, config_id=i % 50, url=f'https://t.me/bench_channel_{i}', name=f'bench url {i}',
+                        duration=30, last_time=now, max_num=10, current_count=3, is_active=True, is_running=True,
+                        started_at=now - datetime.timedelta(minutes=5), stopped_at=None, status='执行中',
+                        label='bench') for i in range(args.urls)]
+
+        cases = {
+            'url_executed': (
+                lambda url: {'config_id': url.config_id, 'url_data': url.to_dict()},
+                lambda url: url_delta(url, *EXECUTE_FIELDS),
+            ),
+            'status_updated': (
+                lambda url: {'url_id': url.id, 'config_id': url.config_id, 'status': url.status,
+                             'url_data': url.to_dict()},
+                lambda url: url_delta(url, 'status'),
+            ),
+        }
+        print(f'URL {args.urls} 个，取 {args.rounds} 轮最快值')
+        for event, (snapshot, delta) in cases.items():
+            snapshot_us, snapshot_bytes = measure(snapshot, urls, args.rounds)
+            delta_us, delta_bytes = measure(delta, urls, args.rounds)
+            print(f'  {event:<15} 完整快照 {snapshot_us:>6.2f} us {snapshot_bytes:>6.0f} B | '
+                  f'增量 {delta_us:>6.2f} us {delta_bytes:>6.0f} B | '
+                  f'耗时 -{(1 - delta_us / snapshot_us) * 100:.0f}%  大小 -{(1 - delta_bytes / snapshot_bytes) * 100:.0f}%')
+
+
+if __name__ == '__main__':
+    main()
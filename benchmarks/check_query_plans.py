@@ -0,0 +1,138 @@
+"""热点查询执行计划检查：在填充数据的临时 schema 中 EXPLAIN 各接口的查询，断言走索引
+
+在 DATABASE_URL 指向的库中创建临时 schema，建表并批量写入机器和URL数据后 VACUUM ANALYZE，
+对 /api/config、/start、/stop、机器URL列表和标签接口使用的查询执行 EXPLAIN，
+config_data / url_data 上出现顺序扫描即视为回归，以非零状态退出；
+启用/可执行/运行中的计数还要求只扫描索引（Index Only Scan）。结束后删除临时 schema。
+
+用法: python -m benchmarks.check_query_plans [--configs 2000] [--urls-per-config 100] [--labels 200]
+"""
+import argparse
+import json
+import os
+import sys
+
+from sqlalchemy import create_engine, func, select, text
+
+from app import create_app, db
+from app.models import UrlData
+from app.models.config_data import ConfigData
+
+SCHEMA = f'plan_check_{os.getpid()}'
+CHECKED_TABLES = {'config_data', 'url_data'}
+INDEX_SCANS = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+
+def seed(connection, configs: int, urls_per_config: int, labels: int):
+    connection.execute(text(
+        "INSERT INTO config_data (id, success_time_min, success_time_max, reset_time, is_active, is_running, "
+        "pade_code, name, message) "
+        "SELECT g, 5, 10, 0, true, g % 10 = 0, 'PAD' || lpad(g::text, 8, '0'), 'machine ' || g, 'msg' "
+        "FROM generate_series(1, :configs) g"
+    ), {'configs': configs})
+    connection.execute(text(
+        "INSERT INTO url_data (config_id, url, name, duration, last_time, max_num, current_count, is_active, "
+        "is_running, created_at, updated_at, status, label) "
+        "SELECT c, 'https://t.me/group_' || c || '_' || u, 'url ' || u, 30, now(), 3, u % 4, u % 10 <> 0, "
+        "u % 50 = 0, now(), now(), '', 'label_' || ((c * :per + u) % :labels) "
+        "FROM generate_series(1, :configs) c, generate_series(1, :per) u"
+    ), {'configs': configs, 'per': urls_per_config, 'labels': labels})
+
+
+def count_of(query):
+    """与 Query.count() 生成的语句一致"""
+    return select(func.count()).select_from(query.order_by(None).subquery())
+
+
+def hot_queries(configs: int):
+    """与接口中一致的查询，值为 (语句, 是否要求只扫描索引)"""
+    config_id = configs // 2
+    pade_code = f'PAD{config_id:08d}'
+    label = 'label_7'
+    return {
+        # /api/config、/start、/stop、update_phone_number
+        'config_by_pade_code': (ConfigData.query.filter_by(pade_code=pade_code), False),
+        # 设备配置、机器URL列表
+        'config_active_urls': (
+            UrlData.query.filter_by(config_id=config_id, is_active=True).order_by(UrlData.id), False),
+        # 停止机器、运行状态统计
+        'config_running_urls': (UrlData.query.filter_by(config_id=config_id, is_running=True), False),
+        # 启动机器、start-all、start-urls
+        'config_available_urls': (
+            UrlData.query.filter_by(config_id=config_id, is_active=True, is_exhausted=False), False),
+        # 机器URL列表中的 active / available / running 计数
+        'config_active_count': (count_of(UrlData.query.filter_by(config_id=config_id, is_active=True)), True),
+        'config_available_count': (count_of(
+            UrlData.query.filter_by(config_id=config_id, is_active=True, is_exhausted=False)), True),
+        'config_running_count': (count_of(UrlData.query.filter_by(config_id=config_id, is_running=True)), True),
+        # 标签接口
+        'label_urls': (UrlData.query.filter(UrlData.label == label), False),
+        'label_config_urls': (UrlData.query.filter(UrlData.label == label, UrlData.config_id == config_id), False),
+    }
+
+
+def scans(plan):
+    """遍历计划树，返回 (节点类型, 表名, 索引名)"""
+    node_type = plan.get('Node Type')
+    if 'Relation Name' in plan or 'Index Name' in plan:
+        yield node_type, plan.get('Relation Name'), plan.get('Index Name')
+    for child in plan.get('Plans', ()):
+        yield from scans(child)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查热点查询是否走索引')
+    parser.add_argument('--configs', type=int, default=2000)
+    parser.add_argument('--urls-per-config', type=int, default=100)
+    parser.add_argument('--labels', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        url = db.engine.url
+        if url.get_backend_name() != 'postgresql':
+            sys.exit('需要 PostgreSQL 数据库')
+
+        admin = create_engine(url, isolation_level='AUTOCOMMIT')
+        with admin.connect() as connection:
+            connection.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+
+        engine = create_engine(url, connect_args={'options': f'-csearch_path={SCHEMA}'})
+        failures = 0
+        try:
+            db.metadata.create_all(engine, tables=[ConfigData.__table__, UrlData.__table__])
+            with engine.begin() as connection:
+                seed(connection, args.configs, args.urls_per_config, args.labels)
+            # 只扫描索引依赖可见性映射，VACUUM 不能在事务中执行
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                connection.execute(text('VACUUM (ANALYZE) config_data'))
+                connection.execute(text('VACUUM (ANALYZE) url_data'))
+            print(f'已写入 {args.configs} 台机器、{args.configs * args.urls_per_config} 条URL')
+
+            with engine.connect() as connection:
+                for name, (query, index_only) in hot_queries(args.configs).items():
+                    statement = getattr(query, 'statement', query)
+                    sql = str(statement.compile(engine, compile_kwargs={'literal_binds': True}))
+                    plan = connection.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+                    plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+                    nodes = [node for node in scans(plan) if node[1] in CHECKED_TABLES or node[0] in INDEX_SCANS]
+                    seq_scans = [node for node in nodes if node[0] == 'Seq Scan']
+                    used = sorted({node[2] for node in nodes if node[0] in INDEX_SCANS})
+                    heap_scans = [node for node in nodes if node[0] != 'Index Only Scan']
+                    if seq_scans or not used or (index_only and heap_scans):
+                        failures += 1
+                        print(f'FAIL {name:<24} {[node[0] + " on " + str(node[1]) for node in nodes]}')
+                    else:
+                        print(f'OK   {name:<24} {", ".join(used)}')
+        finally:
+            engine.dispose()
+            with admin.connect() as connection:
+                connection.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+            admin.dispose()
+
+    if failures:
+        sys.exit(f'{failures} 个查询未使用索引')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""VMOS 客户端熔断与重试检查：对本地桩服务器按脚本返回故障，验证 VmosUtil.send 的行为
+
+桩服务器按顺序返回预设响应（HTTP 500、HTML 错误页、超时、正常），检查：
+- 幂等接口遇到 5xx 会按退避重试，非幂等接口不重试
+- 读取超时按 VMOS_ENDPOINT_TIMEOUTS 生效
+- 连续失败达到阈值后熔断器打开，打开期间不再发出请求
+- 半开试探遇到不可重试的异常（HTML 响应解析失败）时熔断器不会被关闭，失败计数不被清零
+- 半开试探成功后熔断器关闭
+
+任一检查失败以非零状态退出。需要 DATABASE_URL 可连接（读取动态配置），不写数据库。
+
+用法: python -m benchmarks.check_vmos_resilience [--port 8981]
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OK = (200, 'application/json', {'code': 200, 'msg': 'success', 'data': []})
+SERVER_ERROR = (500, 'application/json', {'code': 500, 'msg': 'stub server error'})
+HTML_PAGE = (200, 'text/html', '<html><body>502 Bad Gateway</body></html>')
+HANG = ('hang', None, None)
+
+
+class StubServer:
+    """按顺序返回预设响应的桩服务器，脚本用完后返回正常响应"""
+
+    def __init__(self, port: int, hang_seconds: float = 2.0):
+        self.hang_seconds = hang_seconds
+        self.script = deque()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.httpd.daemon_threads = True
+
+    def load(self, *responses):
+        with self._lock:
+            self.script = deque(responses)
+            self.requests = 0
+
+    def _next(self):
+        with self._lock:
+            self.requests += 1
+            return self.script.popleft() if self.script else OK
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, fmt, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                status, content_type, payload = stub._next()
+                if status == 'hang':
+                    time.sleep(stub.hang_seconds)
+                    status, content_type, payload = OK
+                body = payload if isinstance(payload, str) else json.dumps(payload)
+                body = body.encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='VMOS 客户端熔断与重试检查')
+    parser.add_argument('--port', type=int, default=8981)
+    args = parser.parse_args()
+
+    import requests
+
+    from app import create_app
+    from app.utils.auth import VmosServerError, VmosUtil, vmos_breaker, vmos_retry_budget
+    from app.utils.dynamic_config import set_dynamic_config
+    from app.utils.resilience import CircuitOpenError
+
+    pad_list = '/vcpcloud/api/padApi/userPadList'
+    start_app = '/vcpcloud/api/padApi/startApp'
+
+    stub = StubServer(args.port)
+    stub.start()
+    app = create_app()
+    failures = []
+
+    def check(name, condition, detail=''):
+        print(f"{'OK  ' if condition else 'FAIL'} {name} {detail}")
+        if not condition:
+            failures.append(name)
+
+    def call(path):
+        try:
+            return VmosUtil(path, {'padCodes': ['STUB0001']}).send()
+        except Exception as e:
+            return e
+
+    def fresh():
+        vmos_breaker.reset()
+        vmos_retry_budget.deposit()
+        vmos_retry_budget._tokens = vmos_retry_budget.max_tokens
+
+    try:
+        with app.app_context():
+            set_dynamic_config('VMOS_BASE_URL', f'http://127.0.0.1:{args.port}')
+            set_dynamic_config('ACCESS_KEY', 'stub-access-key')
+            set_dynamic_config('SECRET_ACCESS', 'stub-secret')
+            set_dynamic_config('VMOS_RETRY_BACKOFF', 0.01)
+            set_dynamic_config('VMOS_MAX_RETRIES', 2)
+            set_dynamic_config('VMOS_ENDPOINT_TIMEOUTS', {pad_list: [1, 0.3], start_app: [1, 0.3]})
+
+            fresh()
+            stub.load(SERVER_ERROR, SERVER_ERROR)
+            result = call(pad_list)
+            check('幂等接口 5xx 后重试成功', isinstance(result, dict) and result.get('code') == 200,
+                  f'请求 {stub.requests} 次')
+            check('幂等接口重试次数', stub.requests == 3)
+            check('成功后熔断器关闭', vmos_breaker.state == vmos_breaker.CLOSED)
+
+            fresh()
+            stub.load(SERVER_ERROR)
+            result = call(start_app)
+            check('非幂等接口 5xx 不重试', isinstance(result, VmosServerError) and stub.requests == 1,
+                  f'请求 {stub.requests} 次')
+
+            fresh()
+            stub.load(HANG)
+            started = time.monotonic()
+            result = call(start_app)
+            elapsed = time.monotonic() - started
+            check('读取超时生效', isinstance(result, requests.Timeout) and elapsed < stub.hang_seconds,
+                  f'{elapsed:.2f}s')
+
+            fresh()
+            stub.load(*[SERVER_ERROR] * vmos_breaker.failure_threshold)
+            for _ in range(vmos_breaker.failure_threshold):
+                call(start_app)
+            check('连续失败后熔断器打开', vmos_breaker.state == vmos_breaker.OPEN,
+                  f'{vmos_breaker.get_stats()}')
+            stub.load()
+            result = call(start_app)
+            check('熔断期间快速失败', isinstance(result, CircuitOpenError) and stub.requests == 0)
+
+            # 冷却后进入半开，试探请求拿到 HTML 页面（JSON 解析失败，不可重试）
+            failures_before = vmos_breaker.get_stats()['consecutive_failures']
+            vmos_breaker.recovery_timeout = 0.2
+            time.sleep(0.3)
+            stub.load(HTML_PAGE)
+            result = call(start_app)
+            stats = vmos_breaker.get_stats()
+            check('半开试探解析失败时抛出原异常', isinstance(result, ValueError), f'{type(result).__name__}')
+            check('解析失败不会关闭熔断器', stats['state'] != vmos_breaker.CLOSED, f"state={stats['state']}")
+            check('解析失败不清零失败计数', stats['consecutive_failures'] == failures_before,
+                  f"{stats['consecutive_failures']} == {failures_before}")
+
+            stub.load(OK)
+            result = call(start_app)
+            check('释放试探名额后可再次试探', isinstance(result, dict) and stub.requests == 1)
+            check('试探成功后熔断器关闭', vmos_breaker.state == vmos_breaker.CLOSED)
+    finally:
+        vmos_breaker.recovery_timeout = 30
+        vmos_breaker.reset()
+        stub.stop()
+
+    if failures:
+        sys.exit(f'{len(failures)} 项检查失败')
+    print('全部通过')
+
+
+if __name__ == '__main__':
+    main()
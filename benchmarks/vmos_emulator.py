@@ -0,0 +1,241 @@
+"""本地VMOS API模拟器：实现 app/utils/vmos.py 用到的 /vcpcloud/api/padApi/* 接口，
+校验 VmosUtil 的 HMAC-SHA256 签名，并支持按接口注入延迟和故障，用于压测和联调。
+
+用法:
+    python -m benchmarks.vmos_emulator --port 8900 --access-key AK --secret SK --fleet-size 500 \
+        --latency-ms normal:80:20 --error-rate 0.01 --profile profile.json
+
+然后把 SystemConfig 中的 VMOS_BASE_URL 设为 http://127.0.0.1:8900。
+
+profile.json 按接口名覆盖默认值，例如:
+    {
+        "default": {"latency_ms": "normal:80:20", "error_rate": 0.01},
+        "startApp": {"latency_ms": "lognormal:150:0.5", "error_rate": 0.05, "timeout_rate": 0.01},
+        "userPadList": {"latency_ms": "uniform:200:600"}
+    }
+
+延迟分布: fixed:<ms> | uniform:<min>:<max> | normal:<mean>:<stddev> | lognormal:<median>:<sigma>
+故障类型: error_rate(HTTP 500) | business_error_rate(HTTP 200 + code 500) | timeout_rate(挂起 timeout_ms 后再返回)
+"""
+import argparse
+import binascii
+import datetime
+import hashlib
+import hmac
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_PREFIX = '/vcpcloud/api/padApi/'
+SERVICE = 'armcloud-paas'
+SIGNED_HEADERS = 'content-type;host;x-content-sha256;x-date'
+ENDPOINTS = {
+    'userPadList', 'startApp', 'stopApp', 'switchRoot', 'restart', 'padTaskDetail', 'listInstalledApp',
+    'updateLanguage', 'updateTimeZone', 'gpsInjectInfo', 'replacePad', 'replacement', 'uploadFileV3',
+}
+
+
+def parse_latency(spec: str):
+    """解析延迟分布，返回一个生成毫秒数的函数"""
+    kind, *params = str(spec).split(':')
+    values = [float(p) for p in params]
+    if kind == 'fixed':
+        return lambda: values[0]
+    if kind == 'uniform':
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'normal':
+        return lambda: max(random.gauss(values[0], values[1]), 0)
+    if kind == 'lognormal':
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f'未知的延迟分布: {spec}')
+
+
+class EndpointProfile:
+    def __init__(self, latency_ms='fixed:0', error_rate=0.0, business_error_rate=0.0,
+                 timeout_rate=0.0, timeout_ms=60000):
+        self.latency = parse_latency(latency_ms)
+        self.error_rate = float(error_rate)
+        self.business_error_rate = float(business_error_rate)
+        self.timeout_rate = float(timeout_rate)
+        self.timeout_ms = float(timeout_ms)
+
+
+def expected_signature(secret: str, body: bytes, host: str, x_date: str) -> str:
+    """按VMOS签名规则独立计算签名"""
+    canonical = (
+        f"host:{host}\n"
+        f"x-date:{x_date}\n"
+        f"content-type:application/json;charset=UTF-8\n"
+        f"signedHeaders:{SIGNED_HEADERS}\n"
+        f"x-content-sha256:{hashlib.sha256(body).hexdigest()}"
+    )
+    short_date = x_date[:8]
+    string_to_sign = '\n'.join([
+        'HMAC-SHA256', x_date, f'{short_date}/{SERVICE}/request',
+        hashlib.sha256(canonical.encode()).hexdigest(),
+    ])
+    k_date = hmac.new(secret.encode(), short_date.encode(), hashlib.sha256).digest()
+    k_service = hmac.new(k_date, SERVICE.encode(), hashlib.sha256).digest()
+    k_signing = hmac.new(k_service, b'request', hashlib.sha256).digest()
+    return binascii.hexlify(hmac.new(k_signing, string_to_sign.encode(), hashlib.sha256).digest()).decode()
+
+
+class Emulator:
+    def __init__(self, access_key, secret, fleet_size, profiles, verify=True):
+        self.access_key = access_key
+        self.secret = secret
+        self.verify = verify
+        self.profiles = profiles
+        self.fleet = [{
+            'padCode': f'EMU{i:08d}',
+            'padName': f'emu-{i}',
+            'goodName': 'Emulated Pad',
+            'status': 1,
+            'createTime': '2024-01-01 00:00:00',
+            'expireTime': '2099-01-01 00:00:00',
+        } for i in range(fleet_size)]
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def profile(self, endpoint) -> EndpointProfile:
+        return self.profiles.get(endpoint) or self.profiles['default']
+
+    def record(self, endpoint, outcome, pads=0):
+        with self._lock:
+            entry = self.stats.setdefault(endpoint, {})
+            entry[outcome] = entry.get(outcome, 0) + 1
+            entry['pads'] = entry.get('pads', 0) + pads
+
+    def check_signature(self, headers, body: bytes):
+        authorization = headers.get('authorization', '')
+        fields = dict(
+            part.strip().split('=', 1) for part in authorization.replace('HMAC-SHA256 ', '', 1).split(',') if '=' in part
+        )
+        if fields.get('Credential') != self.access_key:
+            return 'invalid credential'
+        expected = expected_signature(self.secret, body, headers.get('x-host', ''), headers.get('x-date', ''))
+        if not hmac.compare_digest(fields.get('Signature', ''), expected):
+            return 'signature mismatch'
+        return None
+
+    def respond(self, endpoint, payload):
+        pad_codes = payload.get('padCodes') or ([payload['padCode']] if payload.get('padCode') else [])
+        if endpoint == 'userPadList':
+            data = self.fleet
+        elif endpoint == 'padTaskDetail':
+            data = [{'taskId': task_id, 'taskStatus': 3} for task_id in payload.get('taskIds', [])]
+        elif endpoint == 'listInstalledApp':
+            data = [{'padCode': code, 'apps': []} for code in pad_codes]
+        else:
+            data = [{'padCode': code, 'taskId': uuid.uuid4().int % 10 ** 9, 'vmStatus': 1} for code in pad_codes]
+        return {'code': 200, 'msg': 'success', 'ts': int(time.time() * 1000), 'data': data}, len(pad_codes)
+
+
+def make_handler(emulator: Emulator):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json;charset=UTF-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/__emulator/stats':
+                self._send(200, {'fleet_size': len(emulator.fleet), 'endpoints': emulator.stats})
+            else:
+                self._send(404, {'code': 404, 'msg': 'not found'})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            endpoint = self.path[len(API_PREFIX):] if self.path.startswith(API_PREFIX) else None
+            if endpoint not in ENDPOINTS:
+                self._send(404, {'code': 404, 'msg': f'unknown endpoint {self.path}'})
+                return
+
+            if emulator.verify:
+                error = emulator.check_signature(self.headers, body)
+                if error:
+                    emulator.record(endpoint, 'auth_failed')
+                    self._send(401, {'code': 401, 'msg': error})
+                    return
+
+            profile = emulator.profile(endpoint)
+            time.sleep(profile.latency() / 1000)
+
+            roll = random.random()
+            if roll < profile.timeout_rate:
+                emulator.record(endpoint, 'timeout')
+                time.sleep(profile.timeout_ms / 1000)
+            elif roll < profile.timeout_rate + profile.error_rate:
+                emulator.record(endpoint, 'http_error')
+                self._send(500, {'code': 500, 'msg': 'injected server error'})
+                return
+            elif roll < profile.timeout_rate + profile.error_rate + profile.business_error_rate:
+                emulator.record(endpoint, 'business_error')
+                self._send(200, {'code': 500, 'msg': 'injected business error', 'data': None})
+                return
+
+            payload = json.loads(body or b'{}')
+            response, pads = emulator.respond(endpoint, payload)
+            emulator.record(endpoint, 'ok', pads)
+            self._send(200, response)
+
+    return Handler
+
+
+def load_profiles(args) -> dict:
+    default = {'latency_ms': args.latency_ms, 'error_rate': args.error_rate, 'timeout_rate': args.timeout_rate}
+    overrides = {}
+    if args.profile:
+        with open(args.profile, encoding='utf-8') as f:
+            overrides = json.load(f)
+    default.update(overrides.pop('default', {}))
+    profiles = {'default': EndpointProfile(**default)}
+    for endpoint, settings in overrides.items():
+        profiles[endpoint] = EndpointProfile(**{**default, **settings})
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地VMOS API模拟器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--access-key', default='emulator-access-key')
+    parser.add_argument('--secret', default='emulator-secret')
+    parser.add_argument('--fleet-size', type=int, default=200)
+    parser.add_argument('--latency-ms', default='normal:80:20')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--profile', help='按接口覆盖延迟和故障率的JSON文件')
+    parser.add_argument('--no-verify', action='store_true', help='跳过签名校验')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    emulator = Emulator(args.access_key, args.secret, args.fleet_size, load_profiles(args), not args.no_verify)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(emulator))
+    print(f'[{datetime.datetime.now():%H:%M:%S}] VMOS模拟器监听 http://{args.host}:{args.port} '
+          f'(机器 {args.fleet_size} 台, 签名校验 {"开启" if emulator.verify else "关闭"})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
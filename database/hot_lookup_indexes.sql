@@ -0,0 +1,5 @@
+-- 热点查询列索引（与 migrations/versions/3f1c2a9d7b10 一致），CONCURRENTLY 不能放在事务中执行
+-- 创建唯一索引前请先确认 pade_code 没有重复: SELECT pade_code FROM config_data GROUP BY pade_code HAVING count(*) > 1;
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_config_data_pade_code ON config_data(pade_code);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_url_data_config_active_running ON url_data(config_id, is_active, is_running);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_url_data_label_config ON url_data(label, config_id);
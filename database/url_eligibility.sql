@@ -0,0 +1,13 @@
+-- URL 可执行状态生成列（与 migrations/versions/8b4e6d2c1a57 一致），需要 PostgreSQL 12+
+-- 添加 STORED 生成列会重写整张表，请在低峰期执行
+ALTER TABLE url_data ADD COLUMN IF NOT EXISTS is_exhausted BOOLEAN
+    GENERATED ALWAYS AS (COALESCE(current_count, 0) >= max_num) STORED NOT NULL;
+
+COMMENT ON COLUMN url_data.is_exhausted IS '执行次数是否已达上限（生成列）';
+
+-- 启用 / 可执行 / 运行中子集的部分索引，CONCURRENTLY 不能放在事务中执行
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_url_data_active_by_config ON url_data(config_id) WHERE is_active;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_url_data_available_by_config ON url_data(config_id) WHERE is_active AND NOT is_exhausted;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_url_data_running_by_config ON url_data(config_id) WHERE is_running;
+
+VACUUM (ANALYZE) url_data;
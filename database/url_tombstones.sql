@@ -0,0 +1,17 @@
+-- 设备增量同步：按机器查询 updated_at 之后变更的URL
+CREATE INDEX IF NOT EXISTS idx_url_data_config_updated_at ON url_data(config_id, updated_at);
+
+-- 已删除URL的墓碑记录
+CREATE TABLE IF NOT EXISTS url_tombstones (
+    id SERIAL PRIMARY KEY,
+    url_id INTEGER NOT NULL,
+    config_id INTEGER,
+    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_url_tombstones_config_deleted_at ON url_tombstones(config_id, deleted_at);
+CREATE INDEX IF NOT EXISTS idx_url_tombstones_deleted_at ON url_tombstones(deleted_at);
+
+COMMENT ON TABLE url_tombstones IS '已删除URL记录，供设备增量同步';
+COMMENT ON COLUMN url_tombstones.url_id IS '被删除的URL ID';
+COMMENT ON COLUMN url_tombstones.deleted_at IS '删除时间';
@@ -0,0 +1,66 @@
+"""热点查询列索引：pade_code 唯一索引、URL 按机器/状态与标签的复合索引
+
+Revision ID: 3f1c2a9d7b10
+Revises:
+Create Date: 2026-10-17 10:00:00
+
+索引使用 CREATE INDEX CONCURRENTLY 创建，不阻塞线上读写；
+CONCURRENTLY 不能在事务中执行，因此放在 autocommit_block 中。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (索引名, 表名, 列, 是否唯一)
+INDEXES = [
+    # /api/config、/start、/stop、update_phone_number 按 pade_code 查找机器
+    ('ux_config_data_pade_code', 'config_data', ['pade_code'], True),
+    # 机器相关接口按 config_id 过滤 is_active / is_running
+    ('idx_url_data_config_active_running', 'url_data', ['config_id', 'is_active', 'is_running'], False),
+    # 标签接口按 label 过滤，可选 config_id
+    ('idx_url_data_label_config', 'url_data', ['label', 'config_id'], False),
+]
+
+
+def _check_duplicate_pade_codes():
+    """唯一索引创建前检查重复的 pade_code，避免留下 INVALID 索引"""
+    rows = op.get_bind().execute(sa.text(
+        "SELECT pade_code, count(*) AS total FROM config_data "
+        "WHERE pade_code IS NOT NULL GROUP BY pade_code HAVING count(*) > 1 "
+        "ORDER BY pade_code LIMIT 20"
+    )).all()
+    if rows:
+        duplicates = ', '.join(f'{row.pade_code}({row.total})' for row in rows)
+        raise RuntimeError(f'config_data 中存在重复的 pade_code，请先合并后再执行迁移: {duplicates}')
+
+
+def _drop_invalid(name):
+    """CONCURRENTLY 中途失败会留下 INVALID 索引，IF NOT EXISTS 会跳过它，重试前先删除"""
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {'name': name}).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade():
+    _check_duplicate_pade_codes()
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            _drop_invalid(name)
+            op.create_index(name, table, columns, unique=unique,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
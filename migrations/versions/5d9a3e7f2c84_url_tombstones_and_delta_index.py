@@ -0,0 +1,63 @@
+"""设备增量同步：url_tombstones 墓碑表及 url_data (config_id, updated_at) 索引
+
+Revision ID: 5d9a3e7f2c84
+Revises: 8b4e6d2c1a57
+Create Date: 2026-10-17 18:00:00
+
+与 database/url_tombstones.sql 等价；已手动执行过该脚本的库会跳过已存在的表和索引。
+url_data 上的索引用 CREATE INDEX CONCURRENTLY 创建，不阻塞线上读写。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9a3e7f2c84'
+down_revision = '8b4e6d2c1a57'
+branch_labels = None
+depends_on = None
+
+
+# (索引名, 列)
+TOMBSTONE_INDEXES = [
+    ('idx_url_tombstones_config_deleted_at', ['config_id', 'deleted_at']),
+    ('idx_url_tombstones_deleted_at', ['deleted_at']),
+]
+
+DELTA_INDEX = 'idx_url_data_config_updated_at'
+
+
+def _drop_invalid(name):
+    """CONCURRENTLY 中途失败会留下 INVALID 索引，IF NOT EXISTS 会跳过它，重试前先删除"""
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {'name': name}).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table('url_tombstones'):
+        op.create_table(
+            'url_tombstones',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('url_id', sa.Integer(), nullable=False, comment='被删除的URL ID'),
+            sa.Column('config_id', sa.Integer(), nullable=True),
+            sa.Column('deleted_at', sa.DateTime(), nullable=False,
+                      server_default=sa.text('CURRENT_TIMESTAMP'), comment='删除时间'),
+            comment='已删除URL记录，供设备增量同步',
+        )
+    for name, columns in TOMBSTONE_INDEXES:
+        op.create_index(name, 'url_tombstones', columns, if_not_exists=True)
+
+    with op.get_context().autocommit_block():
+        _drop_invalid(DELTA_INDEX)
+        op.create_index(DELTA_INDEX, 'url_data', ['config_id', 'updated_at'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(DELTA_INDEX, table_name='url_data', postgresql_concurrently=True, if_exists=True)
+    op.drop_table('url_tombstones')
@@ -0,0 +1,61 @@
+"""url_data 增加生成列 is_exhausted 及启用/可执行/运行中子集的部分索引
+
+Revision ID: 8b4e6d2c1a57
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-17 14:00:00
+
+添加 STORED 生成列会重写 url_data 并持有排他锁，百万行量级约需数秒，请在低峰期执行；
+部分索引随后用 CREATE INDEX CONCURRENTLY 创建。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d2c1a57'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+# (索引名, 部分索引条件)
+INDEXES = [
+    ('idx_url_data_active_by_config', 'is_active'),
+    ('idx_url_data_available_by_config', 'is_active AND NOT is_exhausted'),
+    ('idx_url_data_running_by_config', 'is_running'),
+]
+
+
+def _drop_invalid(name):
+    """CONCURRENTLY 中途失败会留下 INVALID 索引，IF NOT EXISTS 会跳过它，重试前先删除"""
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {'name': name}).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('url_data')}
+    if 'is_exhausted' not in columns:
+        op.add_column('url_data', sa.Column(
+            'is_exhausted', sa.Boolean(),
+            sa.Computed('COALESCE(current_count, 0) >= max_num', persisted=True),
+            nullable=False
+        ))
+
+    with op.get_context().autocommit_block():
+        for name, where in INDEXES:
+            _drop_invalid(name)
+            op.create_index(name, 'url_data', ['config_id'], postgresql_where=sa.text(where),
+                            postgresql_concurrently=True, if_not_exists=True)
+        # 部分索引的计数依赖可见性映射才能只扫描索引
+        op.execute('VACUUM (ANALYZE) url_data')
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='url_data', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('url_data', 'is_exhausted')
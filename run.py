@@ -1,9 +1,22 @@
+import os
+
+# eventlet 生产模式：requests、time.sleep、threading 等阻塞调用全部变为协作式，
+# 必须在导入其他模块之前执行；设置 EVENTLET_MONKEY_PATCH=false 可关闭（仅用于排查问题）
+if os.getenv('EVENTLET_MONKEY_PATCH', 'true').lower() == 'true':
+    import eventlet
+
+    eventlet.monkey_patch()
+
 from typing import Any
 
 from app import create_app, db, Config, socketio
 from app.models import User, ConfigData, UrlData, SystemConfig
 from app.services.cleanup_scheduler import cleanup_scheduler
-from app.utils.vmos import get_phone_list
+from app.services.deferred_actions import deferred_actions
+from app.services.device_channel import device_push
+from app.services.pad_list_cache import pad_list_cache
+from app.services.url_events import url_events
+from app.services.write_behind import write_behind
 from loguru import logger
 
 app = create_app()
@@ -24,7 +37,7 @@ def init_database():
                 db.session.add(admin_user)
 
             existing_configs = ConfigData.query.count()
-            data_list: Any = get_phone_list()["data"]
+            data_list: Any = pad_list_cache.get()["data"]
             machines = []
             if existing_configs == 0:
                 for data in data_list:
@@ -76,3 +89,7 @@ if __name__ == '__main__':
             socketio.run(app, host='0.0.0.0', port=5000)
     finally:
         cleanup_scheduler.stop()
+        deferred_actions.stop()
+        write_behind.stop()
+        device_push.stop()
+        url_events.stop()